@@ -0,0 +1,27 @@
+"""cr_diff_budget
+
+Revision ID: 7a3e52c1d9b4
+Revises: 1d9095f58579
+Create Date: 2026-10-19 10:12:44.318207
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7a3e52c1d9b4"
+down_revision = "1d9095f58579"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("cr_diffs_pending", sa.Column("degraded", sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column("cr_diffs_pending", sa.Column("timings", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("cr_diffs_pending", "timings")
+    op.drop_column("cr_diffs_pending", "degraded")
@@ -0,0 +1,31 @@
+"""cr_glossary_keywords
+
+Revision ID: b51e9d3c7f20
+Revises: 7a3e52c1d9b4
+Create Date: 2026-10-19 13:05:12.604118
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b51e9d3c7f20"
+down_revision = "7a3e52c1d9b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("cr", sa.Column("glossary", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column("cr", sa.Column("keywords", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column("cr_pending", sa.Column("glossary", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column("cr_pending", sa.Column("keywords", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("cr_pending", "keywords")
+    op.drop_column("cr_pending", "glossary")
+    op.drop_column("cr", "keywords")
+    op.drop_column("cr", "glossary")
@@ -0,0 +1,35 @@
+"""job_runs
+
+Revision ID: d3f84a6c2e15
+Revises: b51e9d3c7f20
+Create Date: 2026-10-19 14:02:47.318562
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d3f84a6c2e15"
+down_revision = "b51e9d3c7f20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_runs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job", sa.Text(), nullable=False),
+        sa.Column("runner", sa.Text(), nullable=False),
+        sa.Column("started", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_job_runs_job"), "job_runs", ["job"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_job_runs_job"), table_name="job_runs")
+    op.drop_table("job_runs")
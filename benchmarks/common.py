@@ -0,0 +1,87 @@
+import json
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+results_dir = Path(__file__).parent / "results"
+
+
+def measure(run: Callable[[], dict[str, float]], repeat: int) -> dict[str, Any]:
+    """
+    Executes `run` `repeat` times, collecting the stage timings it returns, then does one more run with tracemalloc
+    enabled to find its peak memory usage. The traced run is kept separate because tracing slows everything down.
+    """
+    runs = [run() for _ in range(repeat)]
+    stages = {}
+    for stage in dict.fromkeys(stage for r in runs for stage in r):
+        samples = [r.get(stage, 0.0) for r in runs]
+        stages[stage] = {"min": min(samples), "median": statistics.median(samples)}
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"repeat": repeat, "stages": stages, "peak_memory_bytes": peak}
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def write_results(suite: str, cases: list[dict], output: Path | None = None) -> Path:
+    """Stores the benchmark results as a JSON file, so that they can later be compared with another run"""
+    if output is None:
+        results_dir.mkdir(exist_ok=True)
+        output = results_dir / f"{suite}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+
+    document = {
+        "suite": suite,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": cases,
+    }
+    with open(output, "w") as file:
+        json.dump(document, file, indent=2)
+    return output
+
+
+def print_results(cases: list[dict]) -> None:
+    for case in cases:
+        print(f"{case['name']} (peak memory {case['peak_memory_bytes'] / 2**20:.1f} MiB)")
+        for stage, timing in case["stages"].items():
+            print(f"    {stage:<20} {timing['median'] * 1000:10.2f} ms  (min {timing['min'] * 1000:.2f} ms)")
+
+
+def compare_results(baseline_path: Path, cases: list[dict]) -> None:
+    """Prints the median timing of each stage relative to a previously stored run"""
+    with open(baseline_path) as file:
+        baseline = {case["name"]: case for case in json.load(file)["cases"]}
+
+    print(f"Comparison with {baseline_path}:")
+    for case in cases:
+        base = baseline.get(case["name"])
+        if not base:
+            print(f"{case['name']}: not present in baseline")
+            continue
+        print(case["name"])
+        for stage, timing in case["stages"].items():
+            base_timing = base["stages"].get(stage)
+            if not base_timing or not base_timing["median"]:
+                continue
+            ratio = timing["median"] / base_timing["median"]
+            print(f"    {stage:<20} {ratio:6.2f}x")
+        if base["peak_memory_bytes"]:
+            print(f"    {'peak memory':<20} {case['peak_memory_bytes'] / base['peak_memory_bytes']:6.2f}x")
@@ -0,0 +1,70 @@
+"""
+Benchmarks of the difftool pipeline.
+
+Runs CRDiffMaker and MtrDiffMaker over pairs of documents and reports how long each stage of the diff takes, along
+with the peak memory usage of the whole run. Historical CRs from the raw docs directory (and MTR exports created by
+create_mtr_and_diff) are used when available, synthetic documents are generated otherwise.
+
+Usage (from the repository root):
+    python -m benchmarks.difftool [--repeat N] [--output FILE] [--compare BASELINE]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks import fixtures
+from benchmarks.common import compare_results, measure, print_results, write_results
+from src.difftool.diffmaker import CRDiffMaker, DiffMaker, MtrDiffMaker
+
+
+def run_diff(maker: DiffMaker, fixture: fixtures.Fixture, budget: float | None) -> dict[str, float]:
+    start = time.perf_counter()
+    result = maker.diff(fixture.old, fixture.new, budget)
+    total = time.perf_counter() - start
+    return {**result.timings, "total": total}
+
+
+def collect_fixtures(args) -> tuple[list[fixtures.Fixture], list[fixtures.Fixture]]:
+    cr = fixtures.historical_cr(args.cr_dir, args.pairs) if args.cr_dir else []
+    if not cr:
+        cr = [fixtures.synthetic_cr(size, seed=args.seed) for size in args.cr_sizes]
+
+    mtr = fixtures.exported_mtr(args.mtr_dir, args.pairs) if args.mtr_dir else []
+    if not mtr:
+        mtr = [fixtures.synthetic_mtr(size, seed=args.seed) for size in args.mtr_sizes]
+
+    return cr, mtr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the difftool pipeline.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs per fixture")
+    parser.add_argument("--cr-dir", type=Path, default=Path(fixtures.paths.cr_dir), help="Historical CR text files")
+    parser.add_argument("--mtr-dir", type=Path, default=Path("gen/mtr"), help="MTR JSON exports")
+    parser.add_argument("--pairs", type=int, default=2, help="Number of the latest historical pairs to diff")
+    parser.add_argument("--cr-sizes", type=int, nargs="+", default=[500, 3000], help="Synthetic CR rule counts")
+    parser.add_argument("--mtr-sizes", type=int, nargs="+", default=[10], help="Synthetic MTR section counts")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic document generator")
+    parser.add_argument("--budget", type=float, help="Time budget (in seconds) passed to each diff")
+    parser.add_argument("--output", type=Path, help="Where to store the JSON results (default benchmarks/results)")
+    parser.add_argument("--compare", type=Path, help="Previous JSON results to compare this run against")
+    args = parser.parse_args()
+
+    cr_fixtures, mtr_fixtures = collect_fixtures(args)
+    cases = []
+    for fixture in cr_fixtures:
+        result = measure(lambda: run_diff(CRDiffMaker(), fixture, args.budget), args.repeat)
+        cases.append({"name": fixture.name, "kind": "cr", **result})
+    for fixture in mtr_fixtures:
+        result = measure(lambda: run_diff(MtrDiffMaker(), fixture, args.budget), args.repeat)
+        cases.append({"name": fixture.name, "kind": "mtr", **result})
+
+    print_results(cases)
+    output = write_results("difftool", cases, args.output)
+    print(f"Results written to {output}")
+    if args.compare:
+        compare_results(args.compare, cases)
+
+
+if __name__ == "__main__":
+    main()
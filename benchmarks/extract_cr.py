@@ -0,0 +1,75 @@
+"""
+Benchmarks of the CR extractor.
+
+Runs the line-based CRParser and the original regex-based extractor over formatted CR text files and reports how long
+each of them takes, along with their peak memory usage. Historical CRs from the raw docs directory are used when
+available, synthetic documents are generated otherwise.
+
+Usage (from the repository root):
+    python -m benchmarks.extract_cr [--repeat N] [--output FILE] [--compare BASELINE]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks import fixtures
+from benchmarks.common import compare_results, measure, print_results, write_results
+from benchmarks.legacy import extract_legacy
+from src.extractor.cr.parse_cr import CRParser
+from src.extractor.formatter import CRFormatterFactory
+
+
+def run_parser(text: str) -> dict[str, float]:
+    start = time.perf_counter()
+    CRParser(text).parse()
+    return {"total": time.perf_counter() - start}
+
+
+def run_legacy(text: str) -> dict[str, float]:
+    start = time.perf_counter()
+    extract_legacy(text)
+    return {"total": time.perf_counter() - start}
+
+
+def collect_documents(args) -> dict[str, str]:
+    documents = {}
+    if args.cr_dir and args.cr_dir.is_dir():
+        files = sorted(p for p in args.cr_dir.iterdir() if p.suffix == ".txt")[-args.count :]
+        for path in files:
+            text = path.read_text(encoding="utf-8")
+            documents[f"cr-{path.stem}"] = CRFormatterFactory.create_formatter(path.stem[-3:]).format(text)
+    if not documents:
+        for size in args.sizes:
+            documents[f"synthetic-cr-text-{size}"] = fixtures.synthetic_cr_text(size, seed=args.seed)
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CR extractor.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per document")
+    parser.add_argument("--cr-dir", type=Path, default=Path(fixtures.paths.cr_dir), help="Historical CR text files")
+    parser.add_argument("--count", type=int, default=3, help="Number of the latest historical CRs to extract")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3000, 12000], help="Synthetic CR rule counts")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic document generator")
+    parser.add_argument("--no-legacy", action="store_true", help="Skip the original regex-based extractor")
+    parser.add_argument("--output", type=Path, help="Where to store the JSON results (default benchmarks/results)")
+    parser.add_argument("--compare", type=Path, help="Previous JSON results to compare this run against")
+    args = parser.parse_args()
+
+    cases = []
+    for name, text in collect_documents(args).items():
+        result = measure(lambda: run_parser(text), args.repeat)
+        cases.append({"name": f"{name}/parser", "kind": "cr-extract", **result})
+        if not args.no_legacy:
+            result = measure(lambda: run_legacy(text), args.repeat)
+            cases.append({"name": f"{name}/legacy", "kind": "cr-extract", **result})
+
+    print_results(cases)
+    output = write_results("extract_cr", cases, args.output)
+    print(f"Results written to {output}")
+    if args.compare:
+        compare_results(args.compare, cases)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import json
+import random
+import string
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.extractor.cr import extract_cr
+from src.extractor.formatter import CRFormatterFactory
+from src.resources import static_paths as paths
+
+_vocabulary = """
+a an the of to and or if that this it its is are be can may each player players opponent controller owner
+permanent permanents creature card cards spell spells ability abilities battlefield graveyard library hand
+exile stack zone turn step phase combat damage mana cost costs counter counters token tokens target targets
+choose chooses cast activate trigger triggers resolve resolves control controls put puts onto into from with
+without until end beginning untap tap tapped attacking blocking power toughness value number effect effects
+replacement prevention static keyword characteristic copy copies
+""".split()
+
+
+@dataclass
+class Fixture:
+    name: str
+    old: dict | list
+    new: dict | list
+
+
+def _sentence(rnd: random.Random, length: int) -> str:
+    words = [rnd.choice(_vocabulary) for _ in range(length)]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def _rule_text(rnd: random.Random, rule_numbers: list[str]) -> str:
+    sentences = [_sentence(rnd, rnd.randint(6, 25)) for _ in range(rnd.randint(1, 3))]
+    if rule_numbers and rnd.random() < 0.2:
+        sentences.append(f"See rule {rnd.choice(rule_numbers)}.")
+    return " ".join(sentences)
+
+
+def _make_rule(number: str, text: str) -> dict:
+    return {
+        "ruleNumber": number,
+        "fragment": number.split(".")[1],
+        "ruleText": text,
+        "examples": None,
+        "navigation": {"previousRule": None, "nextRule": None},
+    }
+
+
+def synthetic_cr_structure(rnd: random.Random, rule_count: int) -> list[tuple[str, list[str]]]:
+    """Generates a list of (rule number, [subrule letters]) pairs with roughly `rule_count` numbered items in total"""
+    structure = []
+    count = 0
+    section = 100
+    while count < rule_count:
+        for subrule in range(1, rnd.randint(3, 12)):
+            letters = list(string.ascii_lowercase[: rnd.choice([0, 0, 1, 2, 3, 5, 8])])
+            structure.append((f"{section}.{subrule}", letters))
+            count += 1 + len(letters)
+        section += 1
+    return structure
+
+
+def synthetic_cr(rule_count: int, change_ratio: float = 0.03, seed: int = 0) -> Fixture:
+    """
+    Creates a pair of synthetic CR rule dictionaries (in the format produced by extract_cr.extract). The new version
+    contains text edits, added and deleted subrules (which renumber their siblings), and references to renumbered
+    rules, mimicking the kinds of changes a real CR release makes.
+    """
+    rnd = random.Random(seed)
+    structure = synthetic_cr_structure(rnd, rule_count)
+    all_numbers = [num + letter for num, letters in structure for letter in [""] + letters]
+
+    old = {}
+    for num in all_numbers:
+        old[num] = _make_rule(num, _rule_text(rnd, all_numbers))
+
+    new = {}
+    renumbered = {}
+    for num, letters in structure:
+        new[num] = _make_rule(num, old[num]["ruleText"])
+        texts = [old[num + letter]["ruleText"] for letter in letters]
+        old_letters = list(letters)
+        if texts and rnd.random() < change_ratio:
+            # delete a subrule, shifting the following ones up
+            index = rnd.randrange(len(texts))
+            del texts[index]
+            del old_letters[index]
+        if rnd.random() < change_ratio:
+            # add a subrule, shifting the following ones down
+            index = rnd.randint(0, len(texts))
+            texts.insert(index, _rule_text(rnd, all_numbers))
+            old_letters.insert(index, None)
+        for letter, text, old_letter in zip(string.ascii_lowercase, texts, old_letters):
+            if old_letter and old_letter != letter:
+                renumbered[num + old_letter] = num + letter
+            new[num + letter] = _make_rule(num + letter, text)
+
+    for rule in new.values():
+        words = rule["ruleText"].split(" ")
+        for i, word in enumerate(words):
+            target = word.rstrip(".")
+            if target in renumbered:
+                words[i] = word.replace(target, renumbered[target])
+        if rnd.random() < change_ratio:
+            for _ in range(rnd.randint(1, 4)):
+                position = rnd.randrange(len(words))
+                action = rnd.choice(["insert", "replace", "delete"])
+                if action == "insert":
+                    words.insert(position, rnd.choice(_vocabulary))
+                elif action == "replace":
+                    words[position] = rnd.choice(_vocabulary)
+                elif len(words) > 1:
+                    del words[position]
+        rule["ruleText"] = " ".join(words)
+
+    return Fixture(f"synthetic-cr-{rule_count}", old, new)
+
+
+def synthetic_cr_text(rule_count: int, seed: int = 0) -> str:
+    """
+    Renders a synthetic CR plaintext document (as it looks after formatting) with roughly `rule_count` numbered rules,
+    including a table of contents, examples, keyword sections and a glossary.
+    """
+    rnd = random.Random(seed)
+    chapter_count = 9
+    section_count = max(8, rule_count // (chapter_count * 20))
+    chapters = []
+    for chapter in range(1, chapter_count + 1):
+        sections = []
+        for section in range(chapter * 100, chapter * 100 + section_count):
+            rules = []
+            for subrule in range(1, rnd.randint(6, 14)):
+                letters = string.ascii_lowercase[: rnd.choice([0, 0, 1, 2, 3, 5, 8])]
+                rules.append((f"{section}.{subrule}", letters))
+            sections.append((section, " ".join(rnd.choice(_vocabulary) for _ in range(2)).title(), rules))
+        chapters.append((chapter, " ".join(rnd.choice(_vocabulary) for _ in range(2)).title(), sections))
+
+    terms = sorted({" ".join(rnd.choice(_vocabulary) for _ in range(rnd.randint(1, 3))).title() for _ in range(500)})
+    glossary_terms = [term + " (Obsolete)" if rnd.random() < 0.03 else term for term in terms]
+    all_numbers = [num for _, _, sections in chapters for _, _, rules in sections for num, _ in rules]
+
+    def rule_text(number: str) -> str:
+        if number == "207.2c":
+            return "An ability word appears in italics. The ability words are " + ", ".join(terms[:20]) + "."
+        if number.startswith(("701.", "702.")) and number[-1].isdigit():
+            return " and ".join(rnd.choice(terms) for _ in range(rnd.choice([1, 1, 1, 2])))
+        return _rule_text(rnd, all_numbers)
+
+    lines = ["Magic: The Gathering Comprehensive Rules", "", "These rules are effective as of January 1, 2024.", ""]
+    lines += ["Introduction", "", _paragraph(rnd, 5), "", "Contents", ""]
+    for chapter, title, sections in chapters:
+        lines.append(f"{chapter}. {title}")
+        lines += [f"{section}. {section_title}" for section, section_title, _ in sections]
+        lines.append("")
+    lines += ["Glossary", "", "Credits", ""]
+
+    for chapter, title, sections in chapters:
+        lines += [f"{chapter}. {title}", ""]
+        for section, section_title, rules in sections:
+            lines += [f"{section}. {section_title}", ""]
+            for number, letters in rules:
+                lines += [f"{number}. {rule_text(number)}", ""]
+                for letter in letters:
+                    lines.append(f"{number}{letter} {rule_text(number + letter)}")
+                    for _ in range(rnd.choice([0, 0, 0, 0, 1, 2])):
+                        lines.append(f"Example: {_paragraph(rnd, 2)}")
+                    lines.append("")
+
+    lines += ["Glossary", ""]
+    for term in glossary_terms:
+        lines.append(term)
+        lines += [_paragraph(rnd, 1) for _ in range(rnd.choice([1, 1, 1, 2]))]
+        if rnd.random() < 0.3:
+            lines.append(f"See rule {rnd.choice(all_numbers)}, {rnd.choice(['Combat', 'Zones', 'Turn Structure'])}.")
+        lines.append("")
+    lines += ["Credits", "", "Magic: The Gathering Original Game Design: Richard Garfield"]
+    lines += [f"{rnd.choice(_vocabulary).title()}: {_sentence(rnd, 4)}" for _ in range(4)]
+    lines += ["", _paragraph(rnd, 3), "", "Customer Service Information", "", _paragraph(rnd, 2), ""]
+    return "\n".join(lines)
+
+
+def synthetic_rna_cr_text(rule_count: int, seed: int = 0) -> str:
+    """
+    Renders a synthetic CR (see synthetic_cr_text) with the kind of typography the RNA CR was released with - straight
+    quotes, hyphens instead of dashes and spelled out symbols - for the RNA formatter to correct.
+    """
+    rnd = random.Random(seed)
+    fragments = ['"{}', '{}"', "{}'s", "-they {}", "Creature - {}", "{}(tm)", "1-2 {}", "702.3a-c {}", "{}-[cost]"]
+    fragments += ["{} - [", "phased-in {}", "601.2g-h {}", "'{}"]
+    words = synthetic_cr_text(rule_count, seed).split(" ")
+    for index in range(0, len(words), 7):
+        words[index] = rnd.choice(fragments).format(words[index])
+    return " ".join(words)
+
+
+def _paragraph(rnd: random.Random, length: int) -> str:
+    return " ".join(_sentence(rnd, rnd.randint(5, 20)) for _ in range(length))
+
+
+def synthetic_mtr(section_count: int, change_ratio: float = 0.1, seed: int = 0) -> Fixture:
+    """
+    Creates a pair of synthetic MTR section lists (in the format produced by extract_mtr.extract). The new version
+    contains edited, added, deleted and reordered paragraphs, as well as renamed and added sections.
+    """
+    rnd = random.Random(seed)
+    old = [{"section": None, "subsection": None, "title": "Introduction", "content": _paragraph(rnd, 4)}]
+    for section in range(1, section_count + 1):
+        old.append({"section": section, "subsection": None, "title": f"Section {section}", "content": None})
+        for subsection in range(1, rnd.randint(3, 12)):
+            paragraphs = [_paragraph(rnd, rnd.randint(1, 6)) for _ in range(rnd.randint(1, 8))]
+            title = " ".join(rnd.choice(_vocabulary) for _ in range(3)).title()
+            old.append(
+                {"section": section, "subsection": subsection, "title": title, "content": "\n\n".join(paragraphs)}
+            )
+
+    new = []
+    for chunk in old:
+        chunk = chunk.copy()
+        if chunk["content"] and rnd.random() < change_ratio * 3:
+            paragraphs = chunk["content"].split("\n\n")
+            for i in range(len(paragraphs)):
+                if rnd.random() < change_ratio:
+                    words = paragraphs[i].split(" ")
+                    words[rnd.randrange(len(words))] = rnd.choice(_vocabulary)
+                    paragraphs[i] = " ".join(words)
+            if rnd.random() < change_ratio:
+                paragraphs.insert(rnd.randint(0, len(paragraphs)), _paragraph(rnd, 2))
+            if len(paragraphs) > 1 and rnd.random() < change_ratio:
+                del paragraphs[rnd.randrange(len(paragraphs))]
+            if len(paragraphs) > 2 and rnd.random() < change_ratio:
+                paragraphs.append(paragraphs.pop(0))
+            chunk["content"] = "\n\n".join(paragraphs)
+        if chunk["subsection"] and rnd.random() < change_ratio / 2:
+            chunk["title"] += " Rules"
+        new.append(chunk)
+
+    return Fixture(f"synthetic-mtr-{section_count}", old, new)
+
+
+def _set_code(path: Path) -> str:
+    # same assumption as in create_cr_and_diff - the last three letters before the extension are the set code
+    return path.stem[-3:]
+
+
+def historical_cr(cr_dir: Path | str = paths.cr_dir, pair_count: int = 1) -> list[Fixture]:
+    """
+    Loads the most recent pairs of consecutive historical CR text files and extracts their rules. Returns an empty list
+    if the raw documents aren't available locally.
+    """
+    cr_dir = Path(cr_dir)
+    if not cr_dir.is_dir():
+        return []
+    files = sorted((p for p in cr_dir.iterdir() if p.suffix == ".txt" and p.name != Path(paths.current_cr).name))
+    files = files[-(pair_count + 1) :]
+
+    extracted = {}
+    for path in files:
+        text = path.read_text(encoding="utf-8")
+        text = CRFormatterFactory.create_formatter(_set_code(path)).format(text)
+        extracted[path] = extract_cr.extract(text)["rules"]
+
+    return [Fixture(f"cr-{old.stem}-{new.stem}", extracted[old], extracted[new]) for old, new in zip(files, files[1:])]
+
+
+def exported_mtr(mtr_dir: Path | str, pair_count: int = 1) -> list[Fixture]:
+    """
+    Loads the most recent pairs of MTR exports, as written by create_mtr_and_diff (`{"effective_date", "content"}`).
+    Returns an empty list if no such exports are available.
+    """
+    mtr_dir = Path(mtr_dir)
+    if not mtr_dir.is_dir():
+        return []
+    files = sorted(p for p in mtr_dir.iterdir() if p.suffix == ".json")[-(pair_count + 1) :]
+    loaded = {}
+    for path in files:
+        with open(path) as file:
+            loaded[path] = json.load(file)["content"]
+
+    return [Fixture(f"mtr-{old.stem}-{new.stem}", loaded[old], loaded[new]) for old, new in zip(files, files[1:])]
@@ -0,0 +1,67 @@
+"""
+Benchmarks of the CR formatter.
+
+Runs the compiled single-scan RNA formatter and the original chain of replacements over the RNA CR (or a synthetic
+document with the same kind of typography, if the raw documents aren't available), reports how long each of them
+takes, and checks that their output is the same.
+
+Usage (from the repository root):
+    python -m benchmarks.formatter [--repeat N] [--output FILE] [--compare BASELINE]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks import fixtures
+from benchmarks.common import compare_results, measure, print_results, write_results
+from benchmarks.legacy import LegacyRnaCRFormatter
+from src.extractor.formatter import CRFormatter, CRFormatterFactory
+
+
+def run_formatter(formatter: CRFormatter, text: str) -> dict[str, float]:
+    start = time.perf_counter()
+    formatter.format(text)
+    return {"total": time.perf_counter() - start}
+
+
+def collect_documents(args) -> dict[str, str]:
+    documents = {}
+    if args.cr_dir and args.cr_dir.is_dir():
+        for path in sorted(args.cr_dir.glob("*RNA.txt")):
+            documents[f"cr-{path.stem}"] = path.read_text(encoding="utf-8")
+    if not documents:
+        for size in args.sizes:
+            documents[f"synthetic-rna-cr-text-{size}"] = fixtures.synthetic_rna_cr_text(size, seed=args.seed)
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CR formatter.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per document")
+    parser.add_argument("--cr-dir", type=Path, default=Path(fixtures.paths.cr_dir), help="Historical CR text files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3000, 12000], help="Synthetic CR rule counts")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic document generator")
+    parser.add_argument("--output", type=Path, help="Where to store the JSON results (default benchmarks/results)")
+    parser.add_argument("--compare", type=Path, help="Previous JSON results to compare this run against")
+    args = parser.parse_args()
+
+    compiled = CRFormatterFactory.create_formatter("RNA")
+    legacy = LegacyRnaCRFormatter()
+    cases = []
+    for name, text in collect_documents(args).items():
+        result = measure(lambda: run_formatter(compiled, text), args.repeat)
+        cases.append({"name": f"{name}/compiled", "kind": "cr-format", **result})
+        result = measure(lambda: run_formatter(legacy, text), args.repeat)
+        cases.append({"name": f"{name}/legacy", "kind": "cr-format", **result})
+        if compiled.format(text) != legacy.format(text):
+            print(f"{name}: the compiled formatter's output differs from the original one")
+
+    print_results(cases)
+    output = write_results("formatter", cases, args.output)
+    print(f"Results written to {output}")
+    if args.compare:
+        compare_results(args.compare, cases)
+
+
+if __name__ == "__main__":
+    main()
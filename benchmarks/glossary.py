@@ -0,0 +1,86 @@
+"""
+Adversarial inputs for the CR glossary parser.
+
+Runs CRParser over documents whose glossary is malformed in ways that are expensive for a backtracking regex (no blank
+lines, huge single lines, terms without definitions, randomly mutated glossaries) at two sizes, and checks that the
+runtime grows linearly with the input. The fuzzed documents also check that the parser doesn't crash. Exits with 1 if
+any case grows faster than allowed.
+
+Usage (from the repository root):
+    python -m benchmarks.glossary [--size N] [--factor F] [--seed S]
+"""
+import argparse
+import random
+import sys
+import time
+
+from benchmarks import fixtures
+from src.extractor.cr.parse_cr import CRParser
+
+
+def _document(glossary: str) -> str:
+    return "Contents\n1. Game Concepts\nGlossary\nCredits\n\n100. General\n\n100.1. Rule.\n\nGlossary\n\n" + glossary
+
+
+def _fuzzed(size: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    text = fixtures.synthetic_cr_text(1000, seed=seed)
+    glossary = text[text.rindex("\nGlossary\n") + 10 : text.rindex("\nCredits\n")].split("\n")
+    lines = (glossary * (size // len(glossary) + 1))[:size]
+    for _ in range(len(lines) // 5):
+        index = rnd.randrange(len(lines))
+        mutation = rnd.randrange(4)
+        if mutation == 0:
+            lines[index] = ""
+        elif mutation == 1:
+            del lines[index]
+        elif mutation == 2:
+            lines[index] = lines[index].replace(".", "")
+        else:
+            lines.insert(index, " " * rnd.randint(1, 8) + lines[index])
+    return "\n".join(lines)
+
+
+cases = {
+    "no-blank-lines": lambda size, seed: "Term\n" + "word word word\n" * size,
+    "single-line": lambda size, seed: "x" * (size * 40),
+    "terms-only": lambda size, seed: "Term Without Definition\n\n" * size,
+    "whitespace-lines": lambda size, seed: ("Term\n" + " " * 50 + "\n") * size,
+    "continuations-only": lambda size, seed: "Term\nDefinition.\n\n" + "See rule 100.1.\n\n" * size,
+    "fuzzed": lambda size, seed: _fuzzed(size, seed),
+}
+
+
+def time_parse(text: str, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        CRParser(text).parse()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the CR glossary parser runs in linear time.")
+    parser.add_argument("--size", type=int, default=5000, help="Number of lines of the smaller documents")
+    parser.add_argument("--factor", type=int, default=8, help="How many times larger the larger documents are")
+    parser.add_argument("--slack", type=float, default=3.0, help="Allowed deviation from linear growth")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the fuzzed documents")
+    args = parser.parse_args()
+
+    failed = 0
+    for name, make in cases.items():
+        small = time_parse(_document(make(args.size, args.seed)))
+        large = time_parse(_document(make(args.size * args.factor, args.seed)))
+        # documents too small to time reliably are only checked against a fixed floor
+        ratio = large / max(small, 1e-3)
+        status = "OK" if ratio <= args.factor * args.slack else "SUPERLINEAR"
+        failed += status != "OK"
+        print(f"{name:<20} {small * 1000:8.1f} ms -> {large * 1000:8.1f} ms (x{ratio:.1f})  {status}")
+
+    print(f"{len(cases)} cases, {failed} grew faster than linearly (x{args.factor * args.slack:.0f} allowed).")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
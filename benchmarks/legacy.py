@@ -0,0 +1,175 @@
+"""
+The superseded implementations, kept only to compare the current ones against (in the benchmarks and in
+verify_cr_parser). They aren't used by the application.
+
+- extract_legacy: the original regex-based CR extractor, replaced by CRParser
+- LegacyRnaCRFormatter: the original chain of replacements correcting the RNA CR, replaced by the compiled corrections
+  of CompiledCRFormatter
+"""
+import re
+
+from src.cr.keyword_def import ability_words_rule, keyword_action_regex, keyword_regex
+from src.cr.schemas import ToCSection, ToCSubsection
+from src.extractor.cr.parse_cr import split_ability_words, split_keywords
+from src.extractor.formatter import CRFormatter
+
+
+# lifted directly from an old VensersJournal file. Returns the extracted data along with the per-section structure
+def extract_legacy(comp_rules: str) -> tuple[dict, dict]:
+    rules_json = {}
+    rules_flattened = {}
+    glossary_json = {}
+
+    toc = extract_toc(comp_rules)
+    start_index = comp_rules.find("Glossary")
+    comp_rules = comp_rules[start_index:]
+
+    comp_rules = re.sub(r"\n\s{4,}(\w)", r" \1", comp_rules)
+
+    sections = re.findall(r"^\d{3}\..*?(?=^\d{3}\. |Glossary)", comp_rules, re.MULTILINE | re.DOTALL)
+
+    rule_from_previous_section = ""
+    rule_object_ref = {}
+    keywords = {
+        "keywordAbilities": [],
+        "keywordActions": [],
+        "abilityWords": [],
+    }
+
+    for index, section in enumerate(sections):
+        currentSection = []
+        rules = re.findall(
+            r"^(\d{3}\.[^\s.]{1,4})[\s.]*(.*)"
+            "(?:\nExample: (.*))?(?:\nExample: (.*))?"
+            "(?:\nExample: (.*))?(?:\nExample: (.*))?",
+            section,
+            re.MULTILINE,
+        )
+        for idx, rule in enumerate(rules):
+            nonempty_examples = []
+            for ex in rule[2:5]:
+                if ex != "":
+                    nonempty_examples.append(ex)
+            if len(nonempty_examples) == 0:
+                nonempty_examples = None
+
+            previous_rule = ""
+            next_rule = ""
+
+            if idx - 1 < 0:
+                if rule_from_previous_section:
+                    previous_rule = rule_from_previous_section
+                else:
+                    previous_rule = None
+            else:
+                previous_rule = rules[idx - 1][0]
+
+            try:
+                next_rule = rules[idx + 1][0]
+            except IndexError:
+                next_rule = None
+
+            try:
+                if not rule_object_ref[rule_from_previous_section.split(".")[1]]["navigation"]["nextRule"]:
+                    rule_object_ref[rule_from_previous_section.split(".")[1]]["navigation"]["nextRule"] = rule[0]
+            except (KeyError, IndexError):
+                pass
+            new_rule = {
+                "ruleNumber": rule[0],
+                "fragment": rule[0].split(".")[1],
+                "ruleText": rule[1],
+                "examples": nonempty_examples,
+                "navigation": {"previousRule": previous_rule, "nextRule": next_rule},
+            }
+            currentSection.append(new_rule)
+            rules_flattened[new_rule["ruleNumber"]] = new_rule
+            rule_object_ref = new_rule
+            if re.fullmatch(keyword_regex, new_rule["ruleNumber"]):
+                keywords["keywordAbilities"].extend(split_keywords(new_rule["ruleText"]))
+            elif re.fullmatch(keyword_action_regex, new_rule["ruleNumber"]):
+                keywords["keywordActions"].extend(split_keywords(new_rule["ruleText"]))
+            elif new_rule["ruleNumber"] == ability_words_rule:
+                keywords["abilityWords"] = split_ability_words(new_rule["ruleText"])
+
+        previous_section = None
+        next_section = None
+
+        if index - 1 < 0:
+            pass
+        else:
+            prev = sections[index - 1]
+            previous_section = {"name": prev[: prev.find("\n")], "id": prev[:3]}
+        try:
+            next = sections[index + 1]
+            next_section = {"name": next[: next.find("\n")], "id": next[:3]}
+        except IndexError:
+            pass
+        rules_json[section[:3]] = {
+            "rules": currentSection,
+            "name": section[5 : section.find("\n")],
+            "section": section[:3],
+            "previousSection": previous_section,
+            "nextSection": next_section,
+        }
+
+        rule_from_previous_section = rule[0]
+
+    # needs some reworking when actually used
+    glossary = re.findall(r"^([^.\s\n][^.\n]*)\n((?:.+\n?)+)", comp_rules, re.MULTILINE)[:-1]
+    for entry in glossary:
+        glossary_json[entry[0].lower()] = {"term": entry[0], "definition": re.sub(r"\n$", "", entry[1])}
+
+    return {"rules": rules_flattened, "keywords": keywords, "glossary": glossary_json, "toc": toc}, rules_json
+
+
+def extract_toc(comp_rules: str) -> list[ToCSection]:
+    toc_start = re.search(r"^Contents", comp_rules, re.MULTILINE)
+    toc_end = re.search(r"^Glossary", comp_rules, re.MULTILINE)
+
+    toc_entries = re.findall(r"^(\d+)\. (.*)", comp_rules[toc_start.end() : toc_end.start()], re.MULTILINE)
+    toc_sections = []
+    current_section: ToCSection | None = None
+    for number, title in toc_entries:
+        if len(number) < 3:  # 1- (and in the future possibly 2-) digit number denotes a section
+            if current_section:
+                toc_sections.append(current_section)
+            current_section = ToCSection(number=int(number), title=title, subsections=[])
+        else:
+            current_section.subsections.append(ToCSubsection(number=int(number), title=title))
+
+    if current_section:
+        toc_sections.append(current_section)
+    return toc_sections
+
+
+class LegacyRnaCRFormatter(CRFormatter):
+    def format(self, file: str) -> str:
+        # quotation mark replacements
+        file = file.replace(' "', " “")
+        file = file.replace('("', "(“")
+        file = file.replace('"', "”")
+        file = file.replace("'", "’")
+        file = file.replace(" ’", " ‘")
+        # copyright symbols
+        file = file.replace("(tm)", "™")
+        file = file.replace("(r)", "®")
+        # replacing hyphens -- this part is tailored to the exact incorrect rules
+        file = file.replace("}-[", "}—[")
+        file = re.sub(r"(\d\w)-(\w)", r"\1–\2", file)  # sub-rule range
+        file = re.sub(r"(\d)-(\d)", r"\1–\2", file)  # number range
+        file = re.sub(  # type line
+            r"(Artifact|Creature|Enchantment|Planeswalker|Instant|Sorcery|Plane) -", r"\1 —", file
+        )
+        file = file.replace("-[cost]", "—[cost]")  # ability words
+        file = re.sub(  # other random rules that needed to be corrected
+            r"-(they|for|Conspiracy™|even|either|in|or|chooses|not|whose|the|unless|read|that|any|.”) ",
+            r"—\1 ",
+            file,
+        )
+        file = file.replace("- [", "— [")
+
+        # reverting overcorrections
+        file = re.sub(r"(phased|fill)—in", r"\1-in", file)
+        # technically correct with an en dash, but all the surrounding versions also have a hyphen, so we keep it there
+        file = file.replace("601.2g–h", "601.2g-h")
+        return file
@@ -0,0 +1,101 @@
+"""
+Benchmarks of the API startup.
+
+Starts fresh interpreters that import the application, run its startup hooks and serve a first request (one that
+doesn't need the database), and reports how long each of those stages takes, along with the peak memory of the
+process. It also lists the heavy dependencies that were imported by the time the first request was served, as those
+should only be imported when they're first needed.
+
+The database doesn't have to be available, dummy connection settings are used if none are set.
+
+Usage (from the repository root):
+    python -m benchmarks.startup [--repeat N] [--output FILE] [--compare BASELINE]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import compare_results, print_results, write_results
+
+heavy_modules = ["boto3", "tika", "bs4", "apscheduler", "thefuzz", "requests", "psycopg2", "pdfminer", "msgpack"]
+
+# runs in the child interpreter, prints the timings as JSON
+child_script = """
+import asyncio, json, resource, sys, time
+
+
+async def main():
+    # the application is imported inside a running event loop, as uvicorn does
+    start = time.perf_counter()
+    import src.main
+    imported = time.perf_counter()
+    from fastapi.testclient import TestClient
+    client_imported = time.perf_counter()
+    with TestClient(src.main.app) as client:
+        started = time.perf_counter()
+        response = client.get("/cr/unofficial-glossary")
+        served = time.perf_counter()
+        assert response.status_code == 200, response.status_code
+        heavy = [name for name in {heavy_modules!r} if name in sys.modules]
+    print(json.dumps({{
+        "stages": {{
+            "import": imported - start,
+            "startup": started - client_imported,
+            "first request": served - started,
+            "total": served - start - (client_imported - imported),
+        }},
+        "heavy_modules": heavy,
+        "peak_memory_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }}))
+
+
+asyncio.run(main())
+"""
+
+
+def run_child() -> dict:
+    env = {"DB_USER": "user", "DB_PASS": "password", "DB_HOST": "localhost", "DB_DATABASE": "academy_ruins"}
+    env = {**env, **os.environ, "PYTHONPATH": str(Path(__file__).parents[1])}
+    script = child_script.format(heavy_modules=heavy_modules)
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env)
+    if out.returncode:
+        raise RuntimeError(f"The application failed to start:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API startup.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of interpreters to start")
+    parser.add_argument("--output", type=Path, help="Where to store the JSON results (default benchmarks/results)")
+    parser.add_argument("--compare", type=Path, help="Previous JSON results to compare this run against")
+    args = parser.parse_args()
+
+    runs = [run_child() for _ in range(args.repeat)]
+    stages = {}
+    for stage in runs[0]["stages"]:
+        samples = [run["stages"][stage] for run in runs]
+        stages[stage] = {"min": min(samples), "median": statistics.median(samples)}
+    heavy = sorted({name for run in runs for name in run["heavy_modules"]})
+    case = {
+        "name": "api-startup",
+        "kind": "startup",
+        "repeat": args.repeat,
+        "stages": stages,
+        "peak_memory_bytes": max(run["peak_memory_bytes"] for run in runs),
+        "heavy_modules": heavy,
+    }
+
+    print_results([case])
+    print(f"Heavy modules imported before the first request: {', '.join(heavy) or 'none'}")
+    output = write_results("startup", [case], args.output)
+    print(f"Results written to {output}")
+    if args.compare:
+        compare_results(args.compare, [case])
+
+
+if __name__ == "__main__":
+    main()
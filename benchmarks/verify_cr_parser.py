@@ -0,0 +1,85 @@
+"""
+Validation harness for the CR parser.
+
+Extracts each CR text file in the given directory (the raw docs CR directory by default) with both CRParser and the
+original regex-based extractor, and compares their output: the rules, keywords, glossary, table of contents and the
+per-section structure. Exits with status 1 if any of them differ.
+
+Usage (from the repository root):
+    python -m benchmarks.verify_cr_parser [CR_DIR]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.legacy import extract_legacy
+from src.extractor.cr.parse_cr import CRParser
+from src.extractor.formatter import CRFormatterFactory
+from src.resources import static_paths as paths
+
+
+def _first_difference(legacy, parsed) -> str | None:
+    if isinstance(legacy, dict) and isinstance(parsed, dict):
+        if list(legacy) != list(parsed):
+            missing = legacy.keys() - parsed.keys()
+            extra = parsed.keys() - legacy.keys()
+            if not (missing or extra):
+                return "different order of keys"
+            return f"missing keys {sorted(missing)[:5]}, extra keys {sorted(extra)[:5]}"
+        for key in legacy:
+            difference = _first_difference(legacy[key], parsed[key])
+            if difference:
+                return f"{key}: {difference}"
+        return None
+    if legacy != parsed:
+        return f"{legacy!r:.80} != {parsed!r:.80}"
+    return None
+
+
+def verify_file(path: Path) -> list[str]:
+    # same assumption as in create_cr_and_diff - the last three letters before the extension are the set code
+    text = CRFormatterFactory.create_formatter(path.stem[-3:]).format(path.read_text(encoding="utf-8"))
+
+    start = time.perf_counter()
+    legacy, legacy_sections = extract_legacy(text)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parser = CRParser(text)
+    parsed = parser.parse()
+    parser_time = time.perf_counter() - start
+
+    differences = []
+    for key in legacy:
+        difference = _first_difference(legacy[key], parsed[key])
+        if difference:
+            differences.append(f"{key} -> {difference}")
+    difference = _first_difference(legacy_sections, parser.sections)
+    if difference:
+        differences.append(f"sections -> {difference}")
+
+    status = "OK" if not differences else "MISMATCH"
+    print(f"{path.name:<40} {status:<9} legacy {legacy_time * 1000:8.1f} ms, parser {parser_time * 1000:8.1f} ms")
+    for difference in differences:
+        print(f"    {difference}")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the CR parser with the original regex-based extractor.")
+    parser.add_argument("cr_dir", type=Path, nargs="?", default=Path(paths.cr_dir), help="Directory of CR text files")
+    args = parser.parse_args()
+
+    files = sorted(p for p in args.cr_dir.glob("*.txt"))
+    if not files:
+        print(f"No CR text files found in {args.cr_dir}.")
+        return
+
+    failed = sum(bool(verify_file(path)) for path in files)
+    print(f"{len(files)} CRs verified, {failed} mismatched.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
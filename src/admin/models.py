@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, Integer, Text
+
+from src.models import Base
+
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True)
+    job = Column(Text, nullable=False, index=True)
+    runner = Column(Text, nullable=False)  # the process that ran the job (see utils/leader.py)
+    started = Column(DateTime(timezone=True), nullable=False)
+    finished = Column(DateTime(timezone=True))
+    error = Column(Text)
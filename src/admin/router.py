@@ -1,16 +1,14 @@
 import os
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from src.admin import service
-from src.db import get_db
-from src.extractor.cr.refresh_cr import refresh_cr
-from src.extractor.ipg.refresh_ipg import refresh_ipg
-from src.extractor.mtr.refresh_mtr import refresh_mtr
+from src.db import bypass_memoization, get_db
 from src.schemas import ResponseModel
+from src.utils import leader, loop_lag, memoize, response_cache
 
-router = APIRouter(include_in_schema=False)
+router = APIRouter(include_in_schema=False, dependencies=[Depends(bypass_memoization)])
 
 
 @router.get("/admin/update-link/{doctype}")
@@ -27,11 +25,18 @@ def update_cr(
         raise HTTPException(400, f"No new {doctype} link is pending")
 
     db.commit()
+    # the extractors (and their dependencies) are imported only once they're needed
     if doctype == "cr":
+        from src.extractor.cr.refresh_cr import refresh_cr
+
         background_tasks.add_task(refresh_cr, new_link)
     elif doctype == "mtr":
+        from src.extractor.mtr.refresh_mtr import refresh_mtr
+
         background_tasks.add_task(refresh_mtr, new_link)
     elif doctype == "ipg":
+        from src.extractor.ipg.refresh_ipg import refresh_ipg
+
         background_tasks.add_task(refresh_ipg, new_link)
     return {"new_link": new_link, "type": doctype}
 
@@ -47,8 +52,11 @@ def confirm_cr(body: Confirm, token: str, response: Response, db: Session = Depe
         response.status_code = 403
         return {"detail": "Incorrect admin key"}
 
-    service.apply_pending_cr_and_diff(db, body.code, body.name)
-    db.commit()
+    new_cr = service.apply_pending_cr_and_diff(db, body.code, body.name)
+    with service.replaced_glossary_and_keywords(db, new_cr):
+        db.commit()
+    # the other workers purge their caches once they get the invalidation
+    response_cache.purge("cr:current")
     return {"detail": "success"}
 
 
@@ -58,4 +66,46 @@ def confirm_mtr(token: str, db: Session = Depends(get_db)):
         raise HTTPException(403, "Incorrect admin key")
     service.apply_pending_mtr_and_diff(db)
     db.commit()
+    response_cache.purge("mtr:current")
     return {"detail": "success"}
+
+
+@router.get("/admin/cache-stats")
+def cache_stats(token: str):
+    if token != os.environ["ADMIN_KEY"]:
+        raise HTTPException(403, "Incorrect admin key")
+    return {
+        "memoized": memoize.stats(),
+        "responses": {
+            "entries": len(response_cache.cache),
+            "bytes": response_cache.cache.size,
+            "maxBytes": response_cache.cache.max_bytes,
+        },
+    }
+
+
+@router.get("/admin/status")
+def status(token: str, request: Request, db: Session = Depends(get_db)):
+    if token != os.environ["ADMIN_KEY"]:
+        raise HTTPException(403, "Incorrect admin key")
+    scheduler_leader = service.get_scheduler_leader(db)
+    local_scheduler = getattr(request.app.state, "scheduler", None)
+    return {
+        "loopLag": loop_lag.monitor.stats(),
+        "scheduler": {
+            "leader": scheduler_leader and {"name": scheduler_leader[0], "connectedSince": scheduler_leader[1]},
+            "process": leader.process_name,
+            "isLeader": bool(local_scheduler and local_scheduler.is_leader),
+            "lastRuns": [
+                {
+                    "job": run.job,
+                    "runner": run.runner,
+                    "started": run.started,
+                    "finished": run.finished,
+                    "durationSeconds": run.finished and (run.finished - run.started).total_seconds(),
+                    "error": run.error,
+                }
+                for run in service.get_last_job_runs(db)
+            ],
+        },
+    }
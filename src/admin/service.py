@@ -1,11 +1,17 @@
-from sqlalchemy import select
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, text
 from sqlalchemy.orm import Session
 
+from src.admin.models import JobRun
 from src.cr.models import Cr, PendingCr
 from src.diffs.models import CrDiff, CrDiffItem, MtrDiff, PendingCrDiff, PendingMtrDiff
 from src.link.models import PendingRedirect, Redirect
 from src.mtr.models import Mtr, PendingMtr
 from src.mtr.service import get_pending_mtr
+from src.resources.cache import GlossaryCache, KeywordCache
+from src.utils import invalidation, leader
 
 
 def apply_pending_redirect(db: Session, resource: str) -> str | None:
@@ -20,10 +26,11 @@ def apply_pending_redirect(db: Session, resource: str) -> str | None:
     else:
         db.add(Redirect(resource=resource, link=ret))
     db.delete(pending)
+    invalidation.publish(db, "links")
     return ret
 
 
-def apply_pending_cr_and_diff(db: Session, set_code: str, set_name: str) -> None:
+def apply_pending_cr_and_diff(db: Session, set_code: str, set_name: str) -> Cr:
     pendingCr: PendingCr = db.execute(select(PendingCr)).scalar_one()
     pendingDiff: PendingCrDiff = db.execute(select(PendingCrDiff)).scalar_one()
     diff_items = [CrDiffItem.from_change(x) for x in pendingDiff.changes]
@@ -35,6 +42,8 @@ def apply_pending_cr_and_diff(db: Session, set_code: str, set_name: str) -> None
         set_code=set_code,
         file_name=pendingCr.file_name,
         toc=pendingCr.toc,
+        glossary=pendingCr.glossary,
+        keywords=pendingCr.keywords,
     )
     newDiff = CrDiff(
         creation_day=pendingDiff.creation_day,
@@ -46,6 +55,33 @@ def apply_pending_cr_and_diff(db: Session, set_code: str, set_name: str) -> None
     db.add(newDiff)
     db.delete(pendingCr)
     db.delete(pendingDiff)
+    invalidation.publish(db, "cr")
+    return newCr
+
+
+@contextmanager
+def replaced_glossary_and_keywords(db: Session, cr: Cr):
+    """
+    Replaces the live glossary and keywords (served for the latest CR) with the ones of the newly confirmed CR, as part
+    of the transaction that confirms it, which should be committed inside the block. If the block fails, the previous
+    ones are restored, so that the files never disagree with the latest confirmed CR. The other workers reload them
+    once the transaction commits.
+    """
+    if cr.glossary is None or cr.keywords is None:
+        # CRs that were pending before the glossary and keywords were stored along with them
+        yield
+        return
+    glossary, keywords = GlossaryCache(), KeywordCache()
+    previous_glossary, previous_keywords = dict(glossary.data()), dict(keywords.data())
+    invalidation.publish(db, "glossary", "keywords")
+    try:
+        glossary.replace(cr.glossary)
+        keywords.replace(cr.keywords)
+        yield
+    except BaseException:
+        glossary.replace(previous_glossary)
+        keywords.replace(previous_keywords)
+        raise
 
 
 def apply_pending_mtr_and_diff(db: Session):
@@ -64,3 +100,29 @@ def apply_pending_mtr_and_diff(db: Session):
     db.delete(pending)
     db.add(diff)
     db.delete(pending_diff)
+    invalidation.publish(db, "mtr")
+
+
+job_run_retention = timedelta(days=90)
+
+
+def record_job_run(
+    db: Session, job: str, runner: str, started: datetime, finished: datetime, error: str | None = None
+) -> None:
+    db.execute(delete(JobRun).where(JobRun.started < finished - job_run_retention))
+    db.add(JobRun(job=job, runner=runner, started=started, finished=finished, error=error))
+
+
+def get_last_job_runs(db: Session) -> list[JobRun]:
+    """The latest run of each job"""
+    stmt = select(JobRun).distinct(JobRun.job).order_by(JobRun.job, JobRun.started.desc())
+    return db.execute(stmt).scalars().all()
+
+
+def get_scheduler_leader(db: Session):
+    """The name of the process holding the leader lock and since when it's connected, or None if there's no leader"""
+    stmt = text(
+        "SELECT a.application_name, a.backend_start FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid "
+        "WHERE l.locktype = 'advisory' AND l.classid = 0 AND l.objid = :key AND l.objsubid = 1 AND l.granted"
+    )
+    return db.execute(stmt, {"key": leader.lock_key}).first()
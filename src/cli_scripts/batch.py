@@ -0,0 +1,25 @@
+"""
+Helpers for processing the historical corpus of documents in parallel (see create_cr_and_diff and create_mtr_and_diff).
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable
+
+
+def run_batch(
+    function: Callable, tasks: dict[str, tuple], jobs: int | None = None, stage: str = "done"
+) -> dict[str, Any]:
+    """
+    Runs `function(*args)` for each of the named tasks in a process pool, printing the progress as the tasks finish.
+    The results are returned keyed by the task names, in the same order as `tasks` (regardless of the order in which
+    they finished), so that anything written from them is deterministic.
+    """
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(function, *args): name for name, args in tasks.items()}
+        for done, future in enumerate(as_completed(futures), 1):
+            name = futures[future]
+            results[name] = future.result()
+            print(f"[{done}/{len(tasks)}] {stage} {name} ({time.perf_counter() - start:.1f} s)")
+    return {name: results[name] for name in tasks}
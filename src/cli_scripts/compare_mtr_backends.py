@@ -0,0 +1,62 @@
+"""
+Compares the MTR text backends (see extractor/mtr/text_backend.py).
+
+Extracts the given MTR PDF with two backends and diffs the resulting sections with MtrDiffMaker, the same way two MTR
+versions are diffed. An empty diff means the backends are interchangeable for that document. Use it to check a new
+backend (or a new version of one) before switching MTR_PDF_BACKEND.
+
+Usage:
+    python -m src.cli_scripts.compare_mtr_backends MTR_PDF [--backends tika pdfminer] [--output DIFF_JSON]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from src.difftool.diffmaker import MtrDiffMaker
+from src.extractor.mtr.extract_mtr import extract_text
+from src.extractor.mtr.text_backend import backends, get_backend
+
+
+def _section_name(item: dict | None) -> str:
+    if not item:
+        return "-"
+    return f'{item["section"] or 0}.{item["subsection"] or 0} {item["title"]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff the MTR sections extracted by two PDF text backends.")
+    parser.add_argument("file", type=Path, help="The MTR PDF")
+    parser.add_argument("--backends", nargs=2, default=["tika", "pdfminer"], choices=list(backends))
+    parser.add_argument("--output", type=Path, help="Write the diff to this JSON file")
+    args = parser.parse_args()
+
+    load_dotenv()
+    extracted = []
+    for name in args.backends:
+        start = time.perf_counter()
+        text = get_backend(name).to_text(args.file)
+        text_time = time.perf_counter() - start
+        effective_date, sections = extract_text(text)
+        print(f"{name:<10} {text_time:6.2f} s to text, {len(sections)} sections, effective {effective_date}")
+        extracted.append((effective_date, sections))
+
+    (old_date, old_sections), (new_date, new_sections) = extracted
+    if old_date != new_date:
+        print(f"Effective dates differ: {old_date} != {new_date}")
+    diff = MtrDiffMaker().diff(old_sections, new_sections).diff
+    for change in diff:
+        print(f"    {_section_name(change['old'])}  ->  {_section_name(change['new'])}")
+    print(f"{len(diff)} of {len(old_sections)} sections differ between {args.backends[0]} and {args.backends[1]}.")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"backends": args.backends, "changes": diff}, file, indent=4)
+    sys.exit(1 if diff or old_date != new_date else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,73 @@
+import argparse
 import json
 import os
+from pathlib import Path
 
-from src.difftool.diffmaker import CRDiffMaker
-from src.extractor.cr import extract_cr
+from src.cli_scripts.batch import run_batch
+from src.difftool.diffmaker import CRDiffMaker, Diff
+from src.extractor.artifact_cache import extract_cr_cached
 from src.extractor.formatter import CRFormatterFactory
+from src.resources import static_paths as paths
+
+
+def set_code(path) -> str:
+    # assumes the last three letters before extension are the set code
+    return str(path)[-7:-4]
+
+
+def extract_file(path) -> dict:
+    with open(path, "r") as file:
+        text = file.read()
+    text = CRFormatterFactory.create_formatter(set_code(path)).format(text)
+    return extract_cr_cached(text)
+
+
+def diff_rules(old_rules: dict, new_rules: dict, forced_matches=None) -> Diff:
+    return CRDiffMaker(forced_matches).diff(old_rules, new_rules)
 
 
 def diff(old_txt, new_txt, old_set_code=None, new_set_code=None, forced_matches=None):
     old_txt = CRFormatterFactory.create_formatter(old_set_code).format(old_txt)
     new_txt = CRFormatterFactory.create_formatter(new_set_code).format(new_txt)
 
-    old_json = extract_cr.extract(old_txt)
-
-    new_json = extract_cr.extract(new_txt)
-    diff_json = CRDiffMaker(forced_matches).diff(old_json["rules"], new_json["rules"])
+    old_json = extract_cr_cached(old_txt)
+    new_json = extract_cr_cached(new_txt)
+    diff_json = diff_rules(old_json["rules"], new_json["rules"], forced_matches)
 
     return old_json, new_json, diff_json
 
 
+def save_cr(code: str, extracted: dict):
+    with open(os.path.join(cr_out_dir, code + ".json"), "w") as file:
+        json.dump(extracted["rules"], file)
+    with open(os.path.join(gloss_dir, code + ".json"), "w") as file:
+        json.dump(extracted["glossary"], file)
+    with open(os.path.join(key_dir, code + ".json"), "w") as file:
+        json.dump(extracted["keywords"], file)
+    with open(os.path.join(toc_dir, code + ".json"), "w") as file:
+        json.dump([c.model_dump() for c in extracted["toc"]], file)
+
+
+def save_diff(diff_code: str, dff: Diff):
+    with open(os.path.join(diff_dir, diff_code + ".json"), "w") as file:
+        json.dump(dff.diff, file)
+    with open(os.path.join(maps_dir, diff_code + ".json"), "w") as file:
+        json.dump(dff.moved, file)
+
+
+def make_out_dirs():
+    for directory in [cr_out_dir, diff_dir, maps_dir, gloss_dir, key_dir, toc_dir]:
+        os.makedirs(directory, exist_ok=True)
+
+
 def diff_save(old, new, forced_matches=None):
     if forced_matches:
         for i in range(len(forced_matches)):
             if isinstance(forced_matches[i], str):
                 forced_matches[i] = (forced_matches[i], forced_matches[i])
 
-    # assumes the last three letters before extension are the set code
-    o_code = old[-7:-4]
-    n_code = new[-7:-4]
-    diff_code = o_code + "-" + n_code
+    o_code = set_code(old)
+    n_code = set_code(new)
 
     with open(old, "r") as old_file:
         old_txt = old_file.read()
@@ -36,50 +76,53 @@ def diff_save(old, new, forced_matches=None):
 
     old, new, dff = diff(old_txt, new_txt, o_code, n_code, forced_matches)
 
-    with open(os.path.join(cr_out_dir, o_code + ".json"), "w") as file:
-        json.dump(old["rules"], file)
-    with open(os.path.join(cr_out_dir, n_code + ".json"), "w") as file:
-        json.dump(new["rules"], file)
-    with open(os.path.join(gloss_dir, o_code + ".json"), "w") as file:
-        json.dump(old["glossary"], file)
-    with open(os.path.join(gloss_dir, n_code + ".json"), "w") as file:
-        json.dump(new["glossary"], file)
-    with open(os.path.join(key_dir, o_code + ".json"), "w") as file:
-        json.dump(old["keywords"], file)
-    with open(os.path.join(key_dir, n_code + ".json"), "w") as file:
-        json.dump(new["keywords"], file)
-    with open(os.path.join(diff_dir, diff_code + ".json"), "w") as file:
-        json.dump(dff.diff, file)
-    with open(os.path.join(maps_dir, diff_code + ".json"), "w") as file:
-        json.dump(dff.moved, file)
-    with open(os.path.join(toc_dir, o_code + ".json"), "w") as file:
-        json.dump([c.model_dump() for c in old["toc"]], file)
-    with open(os.path.join(toc_dir, n_code + ".json"), "w") as file:
-        json.dump([c.model_dump() for c in new["toc"]], file)
+    make_out_dirs()
+    save_cr(o_code, old)
+    save_cr(n_code, new)
+    save_diff(o_code + "-" + n_code, dff)
     print(o_code, n_code)
 
 
-def diffall():
-    filepaths = sorted([os.path.join(cr_in_dir, path) for path in os.listdir(cr_in_dir)], reverse=True)
-    for i in range(len(filepaths) - 1):
-        new = filepaths[i]
-        old = filepaths[i + 1]
-        diff_save(old, new)
+def diffall(jobs: int | None = None):
+    """
+    Diffs each pair of consecutive historical CRs. Every CR is extracted once, then the pairs are diffed in parallel.
+    """
+    current = os.path.basename(paths.current_cr)
+    filepaths = sorted([os.path.join(cr_in_dir, p) for p in os.listdir(cr_in_dir) if p != current], reverse=True)
+    extracted = run_batch(extract_file, {path: (path,) for path in filepaths}, jobs, "extracted")
 
+    pairs = {set_code(old) + "-" + set_code(new): (old, new) for new, old in zip(filepaths, filepaths[1:])}
+    tasks = {code: (extracted[old]["rules"], extracted[new]["rules"]) for code, (old, new) in pairs.items()}
+    diffs = run_batch(diff_rules, tasks, jobs, "diffed")
 
-cr_in_dir = "../static/raw_docs/cr"
-cr_out_dir = "../../gen/cr"
-diff_dir = "../../gen/diff_unchecked"
-maps_dir = "../../gen/map"
-gloss_dir = "../../gen/gloss"
-key_dir = "../../gen/keywords"
-toc_dir = "../../gen/toc"
+    make_out_dirs()
+    for path, result in extracted.items():
+        save_cr(set_code(path), result)
+    for diff_code, dff in diffs.items():
+        save_diff(diff_code, dff)
 
-if __name__ == "__main__":
-    # diffall()
-    import sys
 
-    old = sys.argv[1]
-    new = sys.argv[2]
-    forced = [("702.165b", "702.165b")]
-    diff_save(old, new, forced)
+__root = Path(__file__).parents[2]
+cr_in_dir = str(__root / "src" / "static" / "raw_docs" / "cr")
+cr_out_dir = str(__root / "gen" / "cr")
+diff_dir = str(__root / "gen" / "diff_unchecked")
+maps_dir = str(__root / "gen" / "map")
+gloss_dir = str(__root / "gen" / "gloss")
+key_dir = str(__root / "gen" / "keywords")
+toc_dir = str(__root / "gen" / "toc")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract and diff CR text files, saving the results into gen/.")
+    parser.add_argument("old", nargs="?", help="The old CR file")
+    parser.add_argument("new", nargs="?", help="The new CR file")
+    parser.add_argument("--all", action="store_true", help="Diff all consecutive pairs of historical CRs")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.all:
+        diffall(args.jobs)
+    elif args.old and args.new:
+        forced = [("702.165b", "702.165b")]
+        diff_save(args.old, args.new, forced)
+    else:
+        parser.error("either pass the old and new CR file, or --all")
@@ -1,12 +1,13 @@
+import argparse
 import json
-import sys
 from datetime import date
 from pathlib import Path
 
 from dotenv import load_dotenv
 
+from src.cli_scripts.batch import run_batch
 from src.difftool.diffmaker import MtrDiffMaker
-from src.extractor.mtr.extract_mtr import extract
+from src.extractor.artifact_cache import extract_mtr_cached
 
 load_dotenv()
 
@@ -19,64 +20,79 @@ def mtr_to_text(effective: date, sections: list[dict]) -> str:
     return ret
 
 
+def diff_sections(old_sections: list[dict], new_sections: list[dict]) -> list:
+    return MtrDiffMaker().diff(old_sections, new_sections).diff
+
+
 def parse_and_diff(old: str, new: str):
-    old_date, old_sections = extract(old)
-    new_date, new_sections = extract(new)
-    diff = MtrDiffMaker().diff(old_sections, new_sections).diff
+    old_date, old_sections = extract_mtr_cached(old)
+    new_date, new_sections = extract_mtr_cached(new)
+    diff = diff_sections(old_sections, new_sections)
 
     return old_date, old_sections, new_date, new_sections, diff
 
 
+def save_mtr(effective: date, sections: list[dict]):
+    with open(mtr_out_dir / (effective.isoformat() + ".json"), "w") as file:
+        json.dump({"effective_date": effective.isoformat(), "content": sections}, file, indent=4)
+    with open(mtr_out_dir / (effective.isoformat() + ".txt"), "w") as file:
+        file.write(mtr_to_text(effective, sections))
+
+
+def save_diff(effective: date, diff: list):
+    with open(mtr_diff_dir / (effective.isoformat() + ".json"), "w") as file:
+        json.dump({"effective_date": effective.isoformat(), "changes": diff}, file, indent=4)
+
+
+def make_out_dirs():
+    mtr_out_dir.mkdir(parents=True, exist_ok=True)
+    mtr_diff_dir.mkdir(parents=True, exist_ok=True)
+
+
 def diff_save(old: str, new: str):
     old_date, old_sections, new_date, new_sections, diff = parse_and_diff(old, new)
-    old_file = mtr_out_dir / (old_date.isoformat() + ".json")
-    new_file = mtr_out_dir / (new_date.isoformat() + ".json")
-    diff_file = mtr_diff_dir / (new_date.isoformat() + ".json")
-    with open(old_file, "w") as file:
-        json.dump({"effective_date": old_date.isoformat(), "content": old_sections}, file, indent=4)
-    with open(new_file, "w") as file:
-        json.dump({"effective_date": new_date.isoformat(), "content": new_sections}, file, indent=4)
-    with open(diff_file, "w") as file:
-        json.dump({"effective_date": new_date.isoformat(), "changes": diff}, file, indent=4)
-
-    old_txt = mtr_out_dir / (old_date.isoformat() + ".txt")
-    new_txt = mtr_out_dir / (new_date.isoformat() + ".txt")
-    with open(old_txt, "w") as file:
-        file.write(mtr_to_text(old_date, old_sections))
-    with open(new_txt, "w") as file:
-        file.write(mtr_to_text(new_date, new_sections))
-
-
-mtr_out_dir = Path("../..") / "gen" / "mtr"
-mtr_diff_dir = Path("../..") / "gen" / "mtr-diff"
-
-batch_input = [
-    # "2023-03-29",
-    # "2022-11-15",
-    "2022-07-01",
-    "2022-03-07",
-    # "2022-02-24",
-    # "2022-01-25",
-    # "2021-07-23",
-    # "2021-03-21",
-    # "2020-02-05",
-    # "2020-10-12",
-    # "2020-09-25",
-]
-
-
-def diff_batch():
-    mtrdir = Path("../../mtr")
-    for i in range(1, len(batch_input)):
-        old = mtrdir / ("mtr-" + batch_input[i] + ".pdf")
-        new = mtrdir / ("mtr-" + batch_input[i - 1] + ".pdf")
-        print(new)
-        diff_save(old, new)
+    make_out_dirs()
+    save_mtr(old_date, old_sections)
+    save_mtr(new_date, new_sections)
+    save_diff(new_date, diff)
+
+
+__root = Path(__file__).parents[2]
+mtr_in_dir = __root / "src" / "static" / "raw_docs" / "mtr"
+mtr_out_dir = __root / "gen" / "mtr"
+mtr_diff_dir = __root / "gen" / "mtr-diff"
+
+
+def diff_batch(jobs: int | None = None, mtr_dir: Path = mtr_in_dir):
+    """
+    Diffs each pair of consecutive MTRs in the directory. Every MTR is extracted once, then the pairs are diffed in
+    parallel. With the tika backend, set TIKA_URL to a running server, so that the workers don't each try to start one.
+    """
+    files = sorted(mtr_dir.glob("mtr-*.pdf"), reverse=True)
+    extracted = run_batch(extract_mtr_cached, {path.name: (path,) for path in files}, jobs, "extracted")
+
+    pairs = {new.name: (old.name, new.name) for new, old in zip(files, files[1:])}
+    tasks = {name: (extracted[old][1], extracted[new][1]) for name, (old, new) in pairs.items()}
+    diffs = run_batch(diff_sections, tasks, jobs, "diffed")
+
+    make_out_dirs()
+    for effective_date, sections in extracted.values():
+        save_mtr(effective_date, sections)
+    for name, diff in diffs.items():
+        save_diff(extracted[name][0], diff)
 
 
 if __name__ == "__main__":
-    # diff_batch()
-    # exit()
-    old = sys.argv[1]
-    new = sys.argv[2]
-    diff_save(old, new)
+    parser = argparse.ArgumentParser(description="Extract and diff MTR PDFs, saving the results into gen/.")
+    parser.add_argument("old", nargs="?", help="The old MTR file")
+    parser.add_argument("new", nargs="?", help="The new MTR file")
+    parser.add_argument("--all", type=Path, metavar="DIR", help="Diff all consecutive pairs of MTRs in this directory")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.all:
+        diff_batch(args.jobs, args.all)
+    elif args.old and args.new:
+        diff_save(args.old, args.new)
+    else:
+        parser.error("either pass the old and new MTR file, or --all")
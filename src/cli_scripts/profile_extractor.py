@@ -0,0 +1,107 @@
+"""
+Profiles the document extractors, to find out where they spend their time and memory.
+
+The extractor is first run a few times on its own to measure its runtime, then the same number of times under cProfile
+to collect per-function timings, and finally once more with tracemalloc enabled to find its peak memory usage and the
+lines that allocated the most of its result. The phases are kept separate because each kind of instrumentation slows
+the extractor down (and distorts the others' results).
+
+Exposed as the `profile` command of the academyruins CLI (see run.py).
+"""
+import cProfile
+import pstats
+import statistics
+import time
+import tracemalloc
+from enum import Enum
+from pathlib import Path
+from typing import Callable
+
+from src.extractor.cr.parse_cr import CRParser
+from src.extractor.formatter import CRFormatterFactory
+from src.extractor.mtr import extract_mtr
+
+
+class Extractor(str, Enum):
+    cr = "cr"
+    mtr = "mtr"
+
+
+def make_run(extractor: Extractor, file: Path, set_code: str | None = None) -> Callable[[], object]:
+    """
+    Reads the input file and returns a function that runs the extractor over it. CR text is formatted as part of the
+    run. MTR input can be either the PDF (which is converted to text by the configured backend once, outside of the
+    profiled run) or a text file with the backend's output.
+    """
+    if extractor == Extractor.mtr:
+        if file.suffix.lower() == ".pdf":
+            content = extract_mtr.read_pdf(file)
+            if content is None:
+                raise ValueError(
+                    "Reading MTR PDFs requires a text backend (see MTR_PDF_BACKEND), or pass the parsed text instead"
+                )
+        else:
+            content = file.read_text(encoding="utf-8")
+        return lambda: extract_mtr.extract_text(content)
+
+    text = file.read_text(encoding="utf-8")
+    # same assumption as in create_cr_and_diff - the last three letters before the extension are the set code
+    formatter = CRFormatterFactory.create_formatter(set_code or file.stem[-3:])
+    return lambda: CRParser(formatter.format(text)).parse()
+
+
+def _print_allocations(snapshot: tracemalloc.Snapshot, top: int) -> None:
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+    )
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        print(f"    {stat.size / 2**10:10.1f} KiB {stat.count:8} blocks  {frame.filename}:{frame.lineno}")
+
+
+def profile_extractor(
+    extractor: Extractor,
+    file: Path,
+    runs: int = 5,
+    top: int = 25,
+    sort: str = "cumulative",
+    set_code: str | None = None,
+    output: Path | None = None,
+) -> None:
+    run = make_run(extractor, file, set_code)
+    run()  # warm-up, so that one-off costs (imports, regex compilation) don't skew the results
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    print(f"{extractor.value} extractor, {file.name}, {runs} runs")
+    print(f"    median {statistics.median(timings) * 1000:.2f} ms, min {min(timings) * 1000:.2f} ms")
+
+    profiler = cProfile.Profile()
+    for _ in range(runs):
+        profiler.enable()
+        run()
+        profiler.disable()
+    print(f"\nTop {top} functions by {sort} time (all {runs} runs):")
+    stats = pstats.Stats(profiler).strip_dirs().sort_stats(sort)
+    stats.print_stats(top)
+    if output:
+        # pstats format, which can be viewed with snakeviz or turned into a flame graph with flameprof
+        profiler.dump_stats(output)
+        print(f"Profile written to {output}")
+
+    tracemalloc.start()
+    try:
+        result = run()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    print(f"Peak memory {peak / 2**20:.2f} MiB, top {top} lines by memory held by the result:")
+    _print_allocations(snapshot, top)
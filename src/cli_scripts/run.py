@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Annotated, Union
 
 import typer
@@ -21,6 +22,84 @@ def run(
     uvicorn.run("src.main:app", port=port, host=host, reload=reload)
 
 
+@app.command()
+def profile(
+    extractor: Annotated[str, typer.Argument(help="Which extractor to profile: cr or mtr.")],
+    file: Annotated[Path, typer.Argument(exists=True, dir_okay=False, help="The document to extract.")],
+    runs: Annotated[int, typer.Option(min=1, help="How many times the extractor is run in each phase.")] = 5,
+    top: Annotated[int, typer.Option(help="How many functions and allocation sites to list.")] = 25,
+    sort: Annotated[str, typer.Option(help="pstats sort key of the function list, e.g. cumulative or tottime.")] = (
+        "cumulative"
+    ),
+    set_code: Annotated[
+        Union[str, None], typer.Option(help="Set code used to pick the CR formatter (default: from the file name).")
+    ] = None,
+    output: Annotated[
+        Union[Path, None],
+        typer.Option(help="Write the profile to this file (pstats format, usable by snakeviz or flameprof)."),
+    ] = None,
+):
+    """
+    Profile a document extractor, reporting its per-function timings, allocations and peak memory.
+    """
+    from src.cli_scripts.profile_extractor import Extractor, profile_extractor
+
+    try:
+        extractor = Extractor(extractor)
+    except ValueError:
+        raise typer.BadParameter(f"Unknown extractor {extractor}")
+    profile_extractor(extractor, file, runs, top, sort, set_code, output)
+
+
+@app.command()
+def index_docs():
+    """
+    Index the raw documents (size, modification time and hash) and write the compressed versions of the text ones.
+    New documents are indexed and compressed as they're downloaded, this is needed only for existing documents.
+    """
+    from src.resources import raw_docs
+    from src.resources import static_paths as paths
+    from src.resources.cache import flush
+
+    documents = [
+        path for directory in (paths.cr_dir, paths.mtr_dir, paths.ipg_dir) for path in Path(directory).glob("*")
+    ]
+    documents = [path for path in documents if path.suffix in (".txt", ".pdf")]
+    for path in documents:
+        raw_docs.precompress(path)
+        raw_docs.document_info(path)
+    flush()
+    print(f"Indexed {len(documents)} documents")
+
+
+@app.command()
+def backfill_glossaries():
+    """
+    Store the glossary and keywords of the CRs confirmed before those were kept along with each CR, extracted from their
+    files, so that they can be requested by set. Needed only once, after upgrading the schema.
+    """
+    from src.extractor.cr.refresh_cr import backfill_glossary_and_keywords
+
+    updated, failed = backfill_glossary_and_keywords()
+    print(f"Updated {updated} CRs" + (f", {failed} couldn't be extracted (see the log)" if failed else ""))
+
+
+@app.command()
+def openapi(
+    output: Annotated[Union[Path, None], typer.Option(help="Where to write the document.")] = None,
+):
+    """
+    Render the OpenAPI document, which is then served in production instead of generating it in each worker. Set ENV to
+    the environment the document is for (the production document includes the logo).
+    """
+    from src.main import app as api
+    from src.openapi import prebuilt
+    from src.resources import static_paths as paths
+
+    path = prebuilt.write(api.openapi(), output or paths.openapi_schema)
+    print(f"OpenAPI document written to {path}")
+
+
 @app.callback()
 def options(
     envfile: Annotated[
@@ -0,0 +1,162 @@
+"""
+Regression harness for the CR diff tool.
+
+Recomputes stored CR diffs from the rules snapshots at both of their ends and compares the result item-for-item with
+the stored diff items. Use it to prove that a change to the difftool (e.g. an optimization of the matcher) doesn't
+change its output.
+
+The snapshots are read either from the database (every CrDiff with its source and destination Cr), or from local
+exports produced by create_cr_and_diff (`cr/<code>.json`, `diff_unchecked/<old>-<new>.json` and
+`map/<old>-<new>.json` inside the given directory).
+
+Note that some stored diffs were created with forced matches or manually corrected, so a mismatch against the
+database doesn't necessarily mean a regression. Record a baseline run before making changes and compare against it.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from src.difftool.diffmaker import CRDiffMaker
+
+ItemKey = tuple[str | None, str | None]
+
+
+@dataclass
+class DiffPair:
+    name: str
+    old_rules: dict
+    new_rules: dict
+    changes: list[dict]
+    moves: list[tuple[str, str]]
+
+
+@dataclass
+class PairReport:
+    name: str
+    runtime: float
+    item_count: int
+    missing: list[ItemKey] = field(default_factory=list)  # items in the stored diff that weren't recomputed
+    extra: list[ItemKey] = field(default_factory=list)  # recomputed items that aren't in the stored diff
+    changed: list[ItemKey] = field(default_factory=list)  # items present in both, but with different text
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing or self.extra or self.changed)
+
+
+def _key_items(changes: list[dict], moves: list) -> dict[ItemKey, tuple]:
+    """
+    Converts a diff into the values that would be stored in cr_diff_items (see CrDiffItem.from_change and
+    CrDiffItem.from_move), keyed by their rule numbers
+    """
+    items = {}
+    for change in changes:
+        old = change["old"] or {}
+        new = change["new"] or {}
+        items[(old.get("ruleNum"), new.get("ruleNum"))] = (old.get("ruleText"), new.get("ruleText"))
+    for old_number, new_number in moves:
+        items[(old_number, new_number)] = (None, None)
+    return items
+
+
+def verify_pair(pair: DiffPair) -> PairReport:
+    start = time.perf_counter()
+    result = CRDiffMaker().diff(pair.old_rules, pair.new_rules)
+    runtime = time.perf_counter() - start
+
+    stored = _key_items(pair.changes, pair.moves)
+    computed = _key_items(result.diff, result.moved)
+    report = PairReport(pair.name, runtime, len(stored))
+    report.missing = sorted(stored.keys() - computed.keys(), key=str)
+    report.extra = sorted(computed.keys() - stored.keys(), key=str)
+    report.changed = sorted((k for k in stored.keys() & computed.keys() if stored[k] != computed[k]), key=str)
+    return report
+
+
+def load_db_pairs() -> list[DiffPair]:
+    from sqlalchemy import select
+
+    from src.db import SessionLocal
+    from src.diffs.models import CrDiff
+    from src.diffs.service import format_cr_change
+    from src.models import get_full_base
+
+    get_full_base()  # relationships of the diff models need all the other models to be loaded
+    pairs = []
+    with SessionLocal() as session:
+        for diff in session.execute(select(CrDiff).order_by(CrDiff.creation_day)).scalars():
+            pairs.append(
+                DiffPair(
+                    name=f"{diff.source.set_code}-{diff.dest.set_code}",
+                    old_rules=diff.source.data,
+                    new_rules=diff.dest.data,
+                    changes=[format_cr_change(item) for item in diff.get_changes()],
+                    moves=[(item.old_number, item.new_number) for item in diff.get_moves()],
+                )
+            )
+    return pairs
+
+
+def load_local_pairs(gen_dir: Path) -> list[DiffPair]:
+    pairs = []
+    for diff_file in sorted((gen_dir / "diff_unchecked").glob("*.json")):
+        old_code, new_code = diff_file.stem.split("-")
+        with open(gen_dir / "cr" / f"{old_code}.json") as file:
+            old_rules = json.load(file)
+        with open(gen_dir / "cr" / f"{new_code}.json") as file:
+            new_rules = json.load(file)
+        with open(diff_file) as file:
+            changes = json.load(file)
+        moves = []
+        map_file = gen_dir / "map" / diff_file.name
+        if map_file.is_file():
+            with open(map_file) as file:
+                moves = [tuple(m) for m in json.load(file)]
+        pairs.append(DiffPair(diff_file.stem, old_rules, new_rules, changes, moves))
+    return pairs
+
+
+def print_report(report: PairReport, verbose: bool) -> None:
+    status = "OK" if report.ok else "MISMATCH"
+    print(
+        f"{report.name:<12} {status:<9} {report.runtime:8.2f} s  {report.item_count:5} items  "
+        f"missing {len(report.missing)}, extra {len(report.extra)}, changed {len(report.changed)}"
+    )
+    if verbose:
+        for label, keys in [("missing", report.missing), ("extra", report.extra), ("changed", report.changed)]:
+            for old_number, new_number in keys:
+                print(f"    {label}: {old_number} -> {new_number}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute stored CR diffs and compare them with the stored items.")
+    parser.add_argument("--local", type=Path, help="Use local exports in this directory instead of the database")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="List the mismatched items of each pair")
+    args = parser.parse_args()
+
+    load_dotenv()
+    pairs = load_local_pairs(args.local) if args.local else load_db_pairs()
+    if not pairs:
+        print("No diffs to verify.")
+        return
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        reports = list(executor.map(verify_pair, pairs))
+
+    for report in reports:
+        print_report(report, args.verbose)
+    failed = sum(not r.ok for r in reports)
+    print(f"{len(reports)} diffs verified in {time.perf_counter() - start:.2f} s, {failed} mismatched.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
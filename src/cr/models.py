@@ -13,6 +13,8 @@ class Cr(Base):
     set_name = Column(String(50))
     data = Column(JSONB(astext_type=Text()))
     toc = Column(JSONB(astext_type=Text()))
+    glossary = Column(JSONB(astext_type=Text()))
+    keywords = Column(JSONB(astext_type=Text()))
     file_name = Column(Text)
 
 
@@ -23,4 +25,6 @@ class PendingCr(Base):
     creation_day = Column(Date)
     data = Column(JSONB(astext_type=Text()))
     toc = Column(JSONB(astext_type=Text()))
+    glossary = Column(JSONB(astext_type=Text()))
+    keywords = Column(JSONB(astext_type=Text()))
     file_name = Column(Text)
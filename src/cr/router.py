@@ -1,22 +1,22 @@
 import re
 from typing import Dict, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
-from thefuzz import fuzz, process
 
 from src.cr import schemas, service
 from src.cr.keyword_def import get_best_rule
 from src.db import get_db
 from src.openapi.no422 import no422
 from src.openapi.strings import crTag, filesTag
+from src.resources import raw_docs
 from src.resources import static_paths as paths
 from src.resources.cache import GlossaryCache
 from src.schemas import Error, FileFormat
+from src.utils import response_cache
 
-router = APIRouter()
-glossary = GlossaryCache()
+router = APIRouter(dependencies=[Depends(response_cache.tag("cr:current"))])
 
 
 @router.get("/cr", summary="All Rules", response_model=Dict[str, schemas.FullRule], tags=[crTag.name])
@@ -32,25 +32,65 @@ def get_all_rules(db: Session = Depends(get_db)):
     return rules.data
 
 
-@router.get("/cr/keywords", summary="Keywords", response_model=schemas.KeywordDict, tags=[crTag.name])
-def get_keywords():
+@router.get(
+    "/cr/keywords",
+    summary="Keywords",
+    response_model=schemas.KeywordDict,
+    responses={404: {"description": "Keywords for the specified set not found", "model": Error}},
+    tags=[crTag.name],
+)
+def get_keywords(
+    set_code: str
+    | None = Query(
+        default=None, alias="set", description="Code of the set whose CR to use (case insensitive), the latest if empty"
+    ),
+    db: Session = Depends(get_db),
+):
     """
     Get a list of all keywords
 
     Returns an object with a list of all keyword abilities, keyword actions, and ability words. Variants of keyword
     abilities (e.g. "partner with" or "friends forever") are not included. Keyword abilities and keyword actions are
     kept in their natural case, ability words are all lower-cased.
+
+    By default, the keywords of the latest CR are returned. Use the `set` parameter to get them as they were in the CR
+    of an earlier set. Returns 404 if the set is unknown, or if the keywords of its CR couldn't be extracted.
     """
-    return FileResponse(paths.keyword_dict)
+    if set_code is None:
+        return FileResponse(paths.keyword_dict)
+    keywords = service.get_keywords(db, set_code.upper())
+    if keywords is None:
+        raise HTTPException(404, "Keywords not available for this set")
+    return JSONResponse(keywords)
 
 
-@router.get("/cr/glossary", summary="Glossary", response_model=dict[str, schemas.GlossaryTerm], tags=[crTag.name])
-def get_glossary():
+@router.get(
+    "/cr/glossary",
+    summary="Glossary",
+    response_model=dict[str, schemas.GlossaryTerm],
+    responses={404: {"description": "Glossary for the specified set not found", "model": Error}},
+    tags=[crTag.name],
+)
+def get_glossary(
+    set_code: str
+    | None = Query(
+        default=None, alias="set", description="Code of the set whose CR to use (case insensitive), the latest if empty"
+    ),
+    db: Session = Depends(get_db),
+):
     """
     Get the full parsed glossary. Returns a dictionary of terms, where keys are lower-cased names of each glossary
     entry and the values contain the actual name of the entry and its content
+
+    By default, the glossary of the latest CR is returned. Use the `set` parameter to get it as it was in the CR of an
+    earlier set. Returns 404 if the set is unknown, or if the glossary of its CR couldn't be extracted.
     """
-    return FileResponse(paths.glossary_dict)
+    if set_code is None:
+        return FileResponse(paths.glossary_dict)
+    glossary_dict = service.get_glossary(db, set_code.upper())
+    if glossary_dict is None:
+        raise HTTPException(404, "Glossary not available for this set")
+    return JSONResponse(glossary_dict)
 
 
 @router.get("/cr/toc", summary="Table of Contents", response_model=list[schemas.ToCSection], tags=[crTag.name])
@@ -92,6 +132,7 @@ def get_glossary_term(
     A successful response includes the actual name of the glossary entry and its content.
     """
     term = term.lower()
+    glossary = GlossaryCache()
 
     if unofficial:
         searches = glossary.all_searches()
@@ -101,6 +142,8 @@ def get_glossary_term(
         getter = glossary.get
 
     if fuzzy:
+        from thefuzz import fuzz, process
+
         choice = process.extractOne(term, searches.keys(), scorer=fuzz.token_sort_ratio)
         found = choice[1] >= 60
         gloss_key = searches[choice[0]]
@@ -252,7 +295,7 @@ def get_trace(
 
 
 @router.get("/file/cr", summary="Raw Latest CR", tags=[filesTag.name])
-def raw_latest_cr(db: Session = Depends(get_db)):
+def raw_latest_cr(request: Request, db: Session = Depends(get_db)):
     """
     Returns the raw text of the latest CR. This route is similar to the `/link/cr` route, with three main differences:
     1. This route returns a response directly rather than a redirect to WotC servers.
@@ -266,9 +309,10 @@ def raw_latest_cr(db: Session = Depends(get_db)):
     route may be better suited for you.
     """
     cr = service.get_latest_cr(db)
-    file_name = cr.file_name
-    path = "src/static/raw_docs/cr/" + file_name  # FIXME hardcoded path
-    return FileResponse(path)
+    response = raw_docs.serve(request, paths.cr_dir + "/" + cr.file_name, immutable=False)
+    if not response:
+        raise HTTPException(404, "CR file not found")
+    return response
 
 
 @router.get(
@@ -278,6 +322,7 @@ def raw_latest_cr(db: Session = Depends(get_db)):
     tags=[filesTag.name],
 )
 def raw_cr_by_set_code(
+    request: Request,
     response: Response,
     set_code: str = Path(description="Code of the requested set (case insensitive)", min_length=3, max_length=5),
     format: Union[FileFormat, None] = Query(default=FileFormat.any),
@@ -298,8 +343,11 @@ def raw_cr_by_set_code(
         response.status_code = 404
         return {"detail": "CR for this set not available in specified format"}
 
-    path = "src/static/raw_docs/cr/" + cr.file_name  # FIXME hardcoded path
-    return FileResponse(path)
+    file_response = raw_docs.serve(request, paths.cr_dir + "/" + cr.file_name)
+    if not file_response:
+        response.status_code = 404
+        return {"detail": "CR file for this set not found"}
+    return file_response
 
 
 @router.get("/metadata/cr", include_in_schema=False)
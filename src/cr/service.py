@@ -6,18 +6,47 @@ from src.cr.models import Cr
 from src.cr.schemas import Trace
 from src.diffs.models import CrDiff, CrDiffItem
 from src.diffs.schemas import CrDiffMetadata
+from src.utils import invalidation
+from src.utils.lru import LRUCache
+from src.utils.memoize import memoized
 
+# glossaries and keyword lists of past CRs, which are requested far less often than the latest ones
+_glossaries = LRUCache(maxsize=8)
+_keyword_lists = LRUCache(maxsize=8)
+invalidation.subscribe("cr", _glossaries.clear)
+invalidation.subscribe("cr", _keyword_lists.clear)
 
+
+@memoized("cr", maxsize=1)
 def get_latest_cr(db: Session) -> Cr:
     stmt = select(Cr).order_by(Cr.creation_day.desc()).limit(1)
     result = db.execute(stmt).scalars().first()
     return result
 
 
+@memoized("cr", maxsize=4)
 def get_cr_by_set_code(db: Session, code: str) -> Cr | None:
     return db.execute(select(Cr).where(Cr.set_code == code)).scalar_one_or_none()
 
 
+def _get_cr_column(db: Session, cache: LRUCache, column, code: str) -> dict | None:
+    value = cache.get(code)
+    if value is None:
+        value = db.execute(select(column).where(Cr.set_code == code)).scalar_one_or_none()
+        if value is not None:
+            cache.put(code, value)
+    return value
+
+
+def get_glossary(db: Session, code: str) -> dict | None:
+    return _get_cr_column(db, _glossaries, Cr.glossary, code)
+
+
+def get_keywords(db: Session, code: str) -> dict | None:
+    return _get_cr_column(db, _keyword_lists, Cr.keywords, code)
+
+
+@memoized("cr", maxsize=1024)
 def get_rule(db: Session, number: str) -> dict | None:
     stmt = select(Cr.data[number]).order_by(Cr.creation_day.desc())
     return db.execute(stmt).scalars().first()
@@ -1,23 +1,71 @@
 import os
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Depends
+from sqlalchemy.orm import Session, sessionmaker
 
-_user = os.environ["DB_USER"]
-_pass = os.environ["DB_PASS"]
-_host = os.environ["DB_HOST"]
-_db = os.environ["DB_DATABASE"]
+"""
+The engine is created (and the connection settings read) only once it's first needed, so that importing the
+application - or any module that uses sessions - doesn't have to load the database driver.
+"""
 
-SQLALCHEMY_DATABASE_URL = f"postgresql+psycopg2://{_user}:{_pass}@{_host}/{_db}"
+_engine = None
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = sessionmaker(bind=engine, future=True)
+def database_url() -> str:
+    _user = os.environ["DB_USER"]
+    _pass = os.environ["DB_PASS"]
+    _host = os.environ["DB_HOST"]
+    _db = os.environ["DB_DATABASE"]
+    return f"postgresql+psycopg2://{_user}:{_pass}@{_host}/{_db}"
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        from sqlalchemy import create_engine
+
+        _engine = create_engine(database_url())
+    return _engine
+
+
+def raw_connection(**connect_kwargs):
+    """
+    Opens a DBAPI connection outside the connection pool, in autocommit mode, for long-lived sessions (listening for
+    notifications, holding advisory locks). The keyword arguments are passed to the driver.
+    """
+    engine = get_engine()
+    connect_args, default_kwargs = engine.dialect.create_connect_args(engine.url)
+    connection = engine.dialect.connect(*connect_args, **{**default_kwargs, **connect_kwargs})
+    connection.autocommit = True
+    return connection
+
+
+def __getattr__(name):
+    # `from src.db import engine` keeps working
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazySessionMaker(sessionmaker):
+    def __call__(self, **local_kw) -> Session:
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionMaker(future=True)
 
 
 def get_db():
-    db = SessionLocal()
+    # the routes may reuse the memoized results of the services (see src.utils.memoize)
+    db = SessionLocal(info={"memoize": True})
     try:
         yield db
     finally:
         db.close()
+
+
+def bypass_memoization(db: Session = Depends(get_db)):
+    """Dependency for the routes that must always query the latest data (admin and pending routes)"""
+    db.info["memoize"] = False
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import ARRAY, Column, Date, ForeignKey, Integer, Text
+from sqlalchemy import ARRAY, Boolean, Column, Date, ForeignKey, Integer, Text, false
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
@@ -80,6 +80,8 @@ class PendingCrDiff(Base):
     dest_id = Column(ForeignKey("cr_pending.id", ondelete="CASCADE"), nullable=False)
     changes = Column(JSONB(astext_type=Text()))
     moves = Column(ARRAY(Text, dimensions=2))
+    degraded = Column(Boolean, nullable=False, server_default=false())  # diff ran out of time and used fallbacks
+    timings = Column(JSONB(astext_type=Text()))  # seconds spent in each stage of the diff
 
     dest = relationship("PendingCr")
     source = relationship("Cr")
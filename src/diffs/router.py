@@ -1,15 +1,16 @@
 from datetime import date
 from typing import Union
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
-from src.db import get_db
+from src.db import bypass_memoization, get_db
 from src.diffs import schemas, service
 from src.diffs.models import PendingCrDiff
 from src.difftool.diffsorter import CRDiffSorter
 from src.openapi.strings import diffTag
+from src.utils import response_cache
 
 router = APIRouter(tags=[diffTag.name])
 
@@ -21,6 +22,7 @@ router = APIRouter(tags=[diffTag.name])
     responses={200: {"model": schemas.CRDiff}, 404: {"model": schemas.CrDiffError}},
 )
 def cr_diff(
+    request: Request,
     response: Response,
     old: str | None = Query(None, description="Set code of the old set.", min_length=3, max_length=5),
     new: str | None = Query(None, description="Set code of the new set", min_length=3, max_length=5),
@@ -62,6 +64,11 @@ def cr_diff(
             "new": new,
         }
 
+    response_cache.add_keys(request, f"diff:cr:{diff.id}")
+    if not (old or new) or nav:
+        # the latest diff and the navigation change with the next CR
+        response_cache.add_keys(request, "cr:current")
+
     sorter = CRDiffSorter()
     changes = sorter.sort_diffs([service.format_cr_change(change) for change in diff.get_changes()])
     moves = [{"from": m.old_number, "to": m.new_number} for m in diff.get_moves()]
@@ -95,6 +102,7 @@ def cr_diff(
     responses={200: {"model": schemas.MtrDiff}, 404: {"model": schemas.MtrDiffError}},
 )
 def mtr_diff(
+    request: Request,
     effective_date: date = Path(description="Effective date of the “new“ set of the diff"),
     db: Session = Depends(get_db),
 ):
@@ -102,6 +110,7 @@ def mtr_diff(
     if diff is None:
         raise HTTPException(404, {"detail": "No diff found at this date.", "effective_date": effective_date})
 
+    response_cache.add_keys(request, f"diff:mtr:{diff.id}")
     return {
         "changes": diff.changes,
         "effectiveDate": effective_date,
@@ -114,7 +123,7 @@ def latest_mtr_diff(db: Session = Depends(get_db)):
     return RedirectResponse("./" + mtr.dest.effective_date.isoformat())
 
 
-@router.get("/metadata/cr-diffs", include_in_schema=False)
+@router.get("/metadata/cr-diffs", include_in_schema=False, dependencies=[Depends(response_cache.tag("cr:current"))])
 def cr_diff_metadata(db: Session = Depends(get_db)):
     meta = service.get_cr_diff_metadata(db)
 
@@ -129,23 +138,40 @@ def cr_diff_metadata(db: Session = Depends(get_db)):
     return {"data": ret}
 
 
-@router.get("/metadata/mtr-diffs", response_model=list[schemas.MtrDiffMetadataItem], include_in_schema=False)
+@router.get(
+    "/metadata/mtr-diffs",
+    response_model=list[schemas.MtrDiffMetadataItem],
+    include_in_schema=False,
+    dependencies=[Depends(response_cache.tag("mtr:current"))],
+)
 def mtr_diff_metadata(db: Session = Depends(get_db)):
     meta = service.get_mtr_diff_metadata(db)
     return meta
 
 
-@router.get("/pending/cr", include_in_schema=False, response_model=schemas.PendingCRDiffResponse)
+@router.get(
+    "/pending/cr",
+    include_in_schema=False,
+    response_model=schemas.PendingCRDiffResponse,
+    dependencies=[Depends(bypass_memoization)],
+)
 def cr_preview(response: Response, db: Session = Depends(get_db)):
     diff: PendingCrDiff = service.get_pending_cr_diff(db)
     if not diff:
         response.status_code = 404
         return {"detail": "No diffs are pending"}
 
-    return {"data": {"changes": diff.changes, "source_set": diff.source.set_name}}
+    return {
+        "data": {
+            "changes": diff.changes,
+            "source_set": diff.source.set_name,
+            "degraded": diff.degraded,
+            "timings": diff.timings,
+        }
+    }
 
 
-@router.get("/pending/mtr", include_in_schema=False)
+@router.get("/pending/mtr", include_in_schema=False, dependencies=[Depends(bypass_memoization)])
 def mtr_preview(db: Session = Depends(get_db)):
     mtr = service.get_pending_mtr_diff(db)
     if not mtr:
@@ -57,6 +57,8 @@ class CRDiff(CrDiffMetadata):
 class PendingCRDiff(ResponseModel):
     changes: list[CRDiffItem]
     source_set: str = Field(..., alias="sourceSet")
+    degraded: bool = Field(False, description="Whether the diff ran out of time and used cheaper heuristics")
+    timings: dict[str, float] | None = Field(None, description="Seconds spent in each stage of the diff")
 
 
 class PendingCRDiffResponse(ResponseModel):
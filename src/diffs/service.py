@@ -6,8 +6,10 @@ from sqlalchemy.orm import Session, aliased
 from src.cr.models import Cr
 from src.diffs.models import CrDiff, CrDiffItem, MtrDiff, PendingCrDiff, PendingMtrDiff
 from src.mtr.models import Mtr
+from src.utils.memoize import memoized
 
 
+@memoized("cr", maxsize=32)
 def get_cr_diff(db: Session, old_code: str | None, new_code: str | None) -> CrDiff | None:
     src = aliased(Cr)
     dst = aliased(Cr)
@@ -25,10 +27,12 @@ def get_cr_diff(db: Session, old_code: str | None, new_code: str | None) -> CrDi
     return db.execute(stmt).scalars().first()
 
 
+@memoized("mtr", maxsize=1)
 def get_latest_mtr_diff(db: Session) -> MtrDiff:
     return db.execute(select(MtrDiff).join(MtrDiff.dest).order_by(Mtr.effective_date.desc())).scalars().first()
 
 
+@memoized("mtr", maxsize=16)
 def get_mtr_diff(db: Session, date: datetime.date) -> MtrDiff | None:
     return db.execute(select(MtrDiff).join(MtrDiff.dest).where(Mtr.effective_date == date)).scalar_one_or_none()
 
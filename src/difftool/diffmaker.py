@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from src.difftool.diffsorter import CRDiffSorter, DiffSorter, MtrDiffSorter
+from src.difftool.diffstats import DiffStats
 from src.difftool.itemdiffer import CRItemDiffer, ItemDiffer, MtrItemDiffer
 from src.difftool.matcher import CRMatcher, Matcher, MtrMatcher
 
@@ -9,6 +10,8 @@ from src.difftool.matcher import CRMatcher, Matcher, MtrMatcher
 class Diff:
     diff: list[(any, any)]  # list of changed item in a release
     moved: list[(str, str)]  # list of moved (but identical in content) items in a release
+    degraded: bool = False  # whether the time budget ran out and cheaper heuristics were used for some items
+    timings: dict[str, float] = field(default_factory=dict)  # seconds spent in each stage of the diff
 
 
 class DiffMaker:
@@ -21,25 +24,36 @@ class DiffMaker:
         self.matcher = matcher
         self.sorter = sorter
 
-    def diff(self, old_doc, new_doc) -> Diff:
+    def diff(self, old_doc, new_doc, budget: float | None = None) -> Diff:
         """
         Returns the list of diffs between old_doc and new_doc.
+
+        If a budget (in seconds) is given and the diff takes longer than that, the remaining items are matched using
+        cheaper heuristics, the remaining matched items are diffed cheaply (see ItemDiffer.diff_items_cheaply), and
+        the result is marked as degraded.
         """
-        matches = self.matcher.align_matches(old_doc, new_doc)
+        stats = DiffStats(budget)
+        matches = self.matcher.align_matches(old_doc, new_doc, stats)
         diffs = []
         moved = []
-        for match_old, match_new in matches:
-            old_item = old_doc.get(match_old)
-            new_item = new_doc.get(match_new)
-            diff = self.differ.diff_items(old_item, new_item)
-            if diff:
-                diffs.append({"old": diff[0], "new": diff[1]})
-            elif match_old != match_new:
-                moved.append((match_old, match_new))
+        with stats.stage("item diffing"):
+            for match_old, match_new in matches:
+                old_item = old_doc.get(match_old)
+                new_item = new_doc.get(match_new)
+                if stats.budget_exceeded():
+                    stats.degraded = True
+                    diff = self.differ.diff_items_cheaply(old_item, new_item)
+                else:
+                    diff = self.differ.diff_items(old_item, new_item)
+                if diff:
+                    diffs.append({"old": diff[0], "new": diff[1]})
+                elif match_old != match_new:
+                    moved.append((match_old, match_new))
 
-        sorted_diffs = self.sorter.sort_diffs(diffs)
-        sorted_moves = self.sorter.sort_moved(moved)
-        return Diff(sorted_diffs, sorted_moves)
+        with stats.stage("sorting"):
+            sorted_diffs = self.sorter.sort_diffs(diffs)
+            sorted_moves = self.sorter.sort_moved(moved)
+        return Diff(sorted_diffs, sorted_moves, stats.degraded, stats.timings)
 
 
 class CRDiffMaker(DiffMaker):
@@ -59,5 +73,5 @@ class MtrDiffMaker(DiffMaker):
     def __init__(self):
         super().__init__(MtrMatcher(), MtrItemDiffer(), MtrDiffSorter())
 
-    def diff(self, old_doc, new_doc) -> Diff:
-        return super().diff(MtrDiffMaker.key_by_title(old_doc), MtrDiffMaker.key_by_title(new_doc))
+    def diff(self, old_doc, new_doc, budget: float | None = None) -> Diff:
+        return super().diff(MtrDiffMaker.key_by_title(old_doc), MtrDiffMaker.key_by_title(new_doc), budget)
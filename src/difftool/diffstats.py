@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+
+
+class DiffStats:
+    """
+    Tracks the time spent in each stage of a single diff, along with its optional time budget.
+
+    When the budget runs out, the stages are expected to fall back to cheaper heuristics and mark the diff as degraded,
+    so that an admin can decide whether it should be recomputed without a limit.
+    """
+
+    def __init__(self, budget: float | None = None):
+        self.budget = budget  # in seconds, None means unlimited
+        self.timings: dict[str, float] = {}
+        self.degraded = False
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def budget_exceeded(self) -> bool:
+        return self.budget is not None and time.perf_counter() - self._start > self.budget
@@ -1,8 +1,9 @@
-import difflib
-import re
 from abc import ABC, abstractmethod
 from typing import Union
 
+from src.difftool.paragraphaligner import ParagraphAligner
+from src.difftool.tokendiff import TokenDiffer, is_rule_mention, split_word_chunks, split_words, wrap_change
+
 
 class ItemDiffer(ABC):
     """
@@ -16,11 +17,7 @@ class ItemDiffer(ABC):
         """
         Inserts diff markers around a list of words
         """
-        if not rule_slice:
-            return []
-        rule_slice[0] = self.DIFF_START_MARKER + rule_slice[0]
-        rule_slice[-1] += self.DIFF_END_MARKER
-        return rule_slice
+        return wrap_change(rule_slice, self.DIFF_START_MARKER, self.DIFF_END_MARKER)
 
     @abstractmethod
     def diff_items(self, old_item, new_item) -> Union[None, tuple]:
@@ -30,23 +27,29 @@ class ItemDiffer(ABC):
         """
         pass
 
+    def diff_items_cheaply(self, old_item, new_item) -> Union[None, tuple]:
+        """
+        Same as diff_items, but without aligning the versions, for when the time budget of the diff ran out. Differs
+        that can't do that any cheaper just diff the items as usual.
+        """
+        return self.diff_items(old_item, new_item)
+
 
 class CRItemDiffer(ItemDiffer):
+    def __init__(self):
+        self.token_differ = TokenDiffer(self.DIFF_START_MARKER, self.DIFF_END_MARKER)
+
     def _format_item(self, number: str, text: str) -> dict:
         return {"ruleNum": number, "ruleText": text}
 
-    def _is_change(self, rule_slice: list[str]) -> (list[str], bool):
+    @staticmethod
+    def _is_change(rule_slice: list[str]) -> bool:
         """
         Check that the marked block is actually a change of something other than rule renumbering.
         """
-        # matches a mention of a rule number / range of numbers
         if not rule_slice:
             return False
-        rule_regex = r"(?:\d{3}(?:\.\d+[a-z]?)?)"
-        rule_mention_regex = r"(?:rule )?" + rule_regex + r"\.?\)?[,.]?"
-        rule_mention_range_regex = r"(?:rules )?" + rule_regex + r"–(?:[a-z]|" + rule_regex + r")\.?\)?[,.]?"
-        text = " ".join(rule_slice)
-        return not re.fullmatch(rule_mention_regex, text) and not re.fullmatch(rule_mention_range_regex, text)
+        return not is_rule_mention(" ".join(rule_slice))
 
     def diff_items(self, old_item, new_item) -> Union[None, tuple]:
         old_rule_num = old_item and old_item["ruleNumber"]
@@ -64,35 +67,9 @@ class CRItemDiffer(ItemDiffer):
             return None
 
         # we want to diff on whole words, not individual characters
-        old_text = old_rule_text.split(" ")
-        new_text = new_rule_text.split(" ")
-
-        seq = difflib.SequenceMatcher(None, old_text, new_text)
-        matches = seq.get_matching_blocks()
-
-        diffed_old, diffed_new = [], []
-        old_offset, new_offset = 0, 0
-        changed = False
-        # get_matching block produces a list of triplets such that old_text[o:o+l] == new_text[n:n+l]
-        # the parts we want to diff are between these blocks, i.e. o1+l to o2 (n1+l to n2)
-        # this loop goes through these triplets, adding each matched block unchanged and the rest wrapped with diff tags
-        for o, n, l in matches:
-            block = old_text[old_offset:o]
-            if self._is_change(block):
-                block = self._wrap_change(block)
-                changed = True
-            diffed_old.extend(block)
-
-            block = new_text[new_offset:n]
-            if self._is_change(block):
-                block = self._wrap_change(block)
-                changed = True
-            diffed_new.extend(block)
-
-            diffed_old.extend(old_text[o : o + l])
-            diffed_new.extend(new_text[n : n + l])
-            old_offset = o + l
-            new_offset = n + l
+        diffed_old, diffed_new, changed = self.token_differ.diff(
+            split_words(old_rule_text), split_words(new_rule_text), self._is_change
+        )
 
         if not changed:
             # it's possible the only changes were due to rules renumbering, which we don't count
@@ -103,8 +80,30 @@ class CRItemDiffer(ItemDiffer):
             self._format_item(new_rule_num, " ".join(diffed_new)),
         )
 
+    def diff_items_cheaply(self, old_item, new_item) -> Union[None, tuple]:
+        if not old_item or not new_item or old_item["ruleText"].strip() == new_item["ruleText"].strip():
+            return self.diff_items(old_item, new_item)
+        # the whole text is marked as changed, even if only the rule numbers mentioned in it changed
+        diffed_old = self._wrap_change(split_words(old_item["ruleText"].strip()))
+        diffed_new = self._wrap_change(split_words(new_item["ruleText"].strip()))
+        return (
+            self._format_item(old_item["ruleNumber"], " ".join(diffed_old)),
+            self._format_item(new_item["ruleNumber"], " ".join(diffed_new)),
+        )
+
 
 class MtrItemDiffer(ItemDiffer):
+    # bound of the paragraph matcher (in pairs of word/non-word chunks), which without autojunk is quadratic or worse -
+    # pairs of paragraphs of up to a thousand chunks (about 500 words) each are still diffed in full
+    max_paragraph_cost = 1000 * 1000
+
+    def __init__(self):
+        # spaces are junk, so that the matcher doesn't align paragraphs on whitespace alone
+        self.token_differ = TokenDiffer(
+            self.DIFF_START_MARKER, self.DIFF_END_MARKER, junk=[" "], autojunk=False, max_cost=self.max_paragraph_cost
+        )
+        self.aligner = ParagraphAligner()
+
     def _format(self, item, content):
         """Turns a list of diffed paragraphs into an actual diff item"""
         joined = "\n\n".join(content)
@@ -112,49 +111,15 @@ class MtrItemDiffer(ItemDiffer):
         item["content"] = joined
         return item
 
-    @staticmethod
-    def _split_paragraph(paragraph: str) -> [str]:
-        """Splits a paragraph into individual blocks to be fed into the sequence matcher"""
-        return re.split(r"(\W)", paragraph)
-
     def _diff_paragraph(self, old_para: str, new_para: str) -> (str, str):
         """Produces a diff of one pair of paragraphs"""
+        if old_para == new_para:
+            return old_para, new_para
 
         # we don't want diffs starting in the middle of a word - split the input into word/non-word chunks
-        old_split = self._split_paragraph(old_para)
-        new_split = self._split_paragraph(new_para)
-
-        seq = difflib.SequenceMatcher(lambda x: x == " ", old_split, new_split, autojunk=False)
-        matches = seq.get_matching_blocks()
-
-        diffed_old, diffed_new = [], []
-        old_offset, new_offset = 0, 0
-        # go through the matching blocks
-        for o, n, l in matches:
-            # add everything between the last match and this one, marked as changed
-            block = old_split[old_offset:o]
-            diffed_old.extend(self._wrap_change(block))
-            block = new_split[new_offset:n]
-            diffed_new.extend(self._wrap_change(block))
-
-            # add this match, as is
-            diffed_old.extend(old_split[o : o + l])
-            diffed_new.extend(new_split[n : n + l])
-            old_offset = o + l
-            new_offset = n + l
-
+        diffed_old, diffed_new, _ = self.token_differ.diff(split_word_chunks(old_para), split_word_chunks(new_para))
         return "".join(diffed_old), "".join(diffed_new)
 
-    @staticmethod
-    def _find_paragraph_match(old_para: str, new_paragraphs: list[str]) -> str | None:
-        prefix_suffix_match_length = min(30, len(old_para))
-        best_match = difflib.get_close_matches(old_para, new_paragraphs, n=1, cutoff=0.4)
-        if not best_match:
-            best_match = [x for x in new_paragraphs if x.startswith(old_para[:prefix_suffix_match_length])]
-        if not best_match:
-            best_match = [x for x in new_paragraphs if x.endswith(old_para[-prefix_suffix_match_length:])]
-        return best_match[0] if best_match else None
-
     def diff_items(self, old_item: dict | None, new_item: dict | None) -> None | tuple[dict | None, dict | None]:
         if not old_item:
             return None, new_item
@@ -172,28 +137,26 @@ class MtrItemDiffer(ItemDiffer):
         diffed_old_paras = []
         diffed_new_paras = []
 
-        new_match_start = 0
-        for old_index, old_para in enumerate(old_paragraphs):
-            # for each old paragraph, we find its closest match among the new paragraphs in this section
-            # we start the search only after the last match to avoid two matched pairs "crossing"
-            best_match = self._find_paragraph_match(old_para, new_paragraphs[new_match_start:])
-            if best_match:
-                # add all new paragraphs between the last match and this one, marked as newly added
-                new_index = new_paragraphs.index(best_match)
-                for i in range(new_match_start, new_index):
-                    diffed_new_paras.extend(self._wrap_change([new_paragraphs[i]]))
-                new_match_start = new_index + 1
-
-                # diff the matched paragraphs and add the result to both sides
-                para_diffed_old, para_diffed_new = self._diff_paragraph(old_para, best_match)
-                diffed_old_paras.append(para_diffed_old)
-                diffed_new_paras.append(para_diffed_new)
-            else:
-                # if an old paragraph doesn't have a match, it's deleted
-                diffed_old_paras.extend(self._wrap_change([old_para]))
-
-        # finally, add all the remaining unmatched new paragraphs marked as added
-        for i in range(new_match_start, len(new_paragraphs)):
+        old_start, new_start = 0, 0
+        for old_index, new_index in self.aligner.align(old_paragraphs, new_paragraphs):
+            # paragraphs between the last aligned pair and this one don't have a counterpart - they were deleted/added
+            for i in range(old_start, old_index):
+                diffed_old_paras.extend(self._wrap_change([old_paragraphs[i]]))
+            for i in range(new_start, new_index):
+                diffed_new_paras.extend(self._wrap_change([new_paragraphs[i]]))
+
+            # diff the matched paragraphs and add the result to both sides
+            para_diffed_old, para_diffed_new = self._diff_paragraph(
+                old_paragraphs[old_index], new_paragraphs[new_index]
+            )
+            diffed_old_paras.append(para_diffed_old)
+            diffed_new_paras.append(para_diffed_new)
+            old_start, new_start = old_index + 1, new_index + 1
+
+        # finally, add all the remaining unmatched paragraphs
+        for i in range(old_start, len(old_paragraphs)):
+            diffed_old_paras.extend(self._wrap_change([old_paragraphs[i]]))
+        for i in range(new_start, len(new_paragraphs)):
             diffed_new_paras.extend(self._wrap_change([new_paragraphs[i]]))
 
         return self._format(old_item, diffed_old_paras), self._format(new_item, diffed_new_paras)
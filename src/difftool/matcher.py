@@ -1,6 +1,7 @@
 import difflib
 from abc import ABC, abstractmethod
 
+from src.difftool.diffstats import DiffStats
 from src.difftool.matchscoregraph import MatchScoreGraph
 
 
@@ -15,7 +16,7 @@ class Matcher(ABC):
         self.forced = forced_matches
 
     @abstractmethod
-    def align_matches(self, old, new) -> list[tuple]:
+    def align_matches(self, old, new, stats: DiffStats | None = None) -> list[tuple]:
         pass
 
 
@@ -38,7 +39,7 @@ class CRMatcher(Matcher):
             del old[num]
             del new[num]
 
-    def align_matches(self, old, new) -> list[tuple[any, any]]:
+    def align_matches(self, old, new, stats: DiffStats | None = None) -> list[tuple[any, any]]:
         """
         Finds likely pairings between two CR versions.
 
@@ -47,7 +48,11 @@ class CRMatcher(Matcher):
         rules, edges are weighed by how alike two rules/vertices are). Once this graph is constructed, the overall
         maximum edge (the most likely match) is successively removed along with its two vertices. Once the graph has no
         edges, all remaining rules are without a partner and are marked as additions/deletions .
+
+        If the time budget in `stats` runs out while the candidates are being scored, the rules that weren't scored
+        yet are only matched by identical text or identical rule number, and the diff is marked as degraded.
         """
+        stats = stats or DiffStats()
         matched_pairs = []
 
         old_unmatched = old.copy()  # old rules that don't yet have a match
@@ -60,13 +65,39 @@ class CRMatcher(Matcher):
                 del new_unmatched[match[1]]
             matched_pairs.append(match)
 
-        self.prune_identical_rules(old_unmatched, new_unmatched)
-        new_unmatched_texts = [item["ruleText"] for item in new_unmatched.values()]
+        with stats.stage("prune"):
+            self.prune_identical_rules(old_unmatched, new_unmatched)
+        with stats.stage("candidate scoring"):
+            score_graph, unscored = self.score_candidates(old_unmatched, new_unmatched, stats)
+        with stats.stage("graph pairing"):
+            matched_pairs.extend(self.pair_candidates(score_graph, old_unmatched, new_unmatched))
+        if unscored:
+            stats.degraded = True
+            with stats.stage("fallback matching"):
+                matched_pairs.extend(self.match_cheaply(unscored, old_unmatched, new_unmatched))
 
+        # add the rest as unpaired
+        for old in old_unmatched:
+            matched_pairs.append((old, None))
+        for new in new_unmatched:
+            matched_pairs.append((None, new))
+        return matched_pairs
+
+    def score_candidates(
+        self, old_unmatched: dict, new_unmatched: dict, stats: DiffStats | None = None
+    ) -> tuple[MatchScoreGraph, list[str]]:
+        """
+        Finds the closest fuzzy matches for each unmatched old rule and builds the weighted graph of candidate pairings.
+        Also returns the numbers of old rules that weren't scored because the time budget ran out.
+        """
+        new_unmatched_texts = [item["ruleText"] for item in new_unmatched.values()]
         score_graph = MatchScoreGraph()
 
         # find best matches for each word and add them to the graph
-        for old_num in old_unmatched:
+        old_nums = list(old_unmatched)
+        for index, old_num in enumerate(old_nums):
+            if stats and stats.budget_exceeded():
+                return score_graph, old_nums[index:]
             # we compare similarity based on whole words, not individual chars
             old_text = old_unmatched[old_num]["ruleText"].split(" ")
             split_new_texts = [x.split(" ") for x in new_unmatched_texts]
@@ -79,20 +110,43 @@ class CRMatcher(Matcher):
                     score = difflib.SequenceMatcher(None, match, old_text).ratio()
                     score_graph.add_edge(new_num, old_num, score)
 
-        # pair old and new rules based on the graph edges
+        return score_graph, []
+
+    @staticmethod
+    def pair_candidates(score_graph: MatchScoreGraph, old_unmatched: dict, new_unmatched: dict) -> list[tuple]:
+        """
+        Pairs old and new rules based on the graph edges, removing each paired rule from its unmatched dictionary.
+        """
+        pairs = []
         while score_graph.edge_count > 0:
             new_num, old_num, weight = score_graph.get_max_edge()
-            matched_pairs.append((old_num, new_num))
+            pairs.append((old_num, new_num))
             del old_unmatched[old_num]
             del new_unmatched[new_num]
             score_graph.remove_nodes(new_num, old_num)
+        return pairs
 
-        # add the rest as unpaired
-        for old in old_unmatched:
-            matched_pairs.append((old, None))
-        for new in new_unmatched:
-            matched_pairs.append((None, new))
-        return matched_pairs
+    @staticmethod
+    def match_cheaply(old_nums: list[str], old_unmatched: dict, new_unmatched: dict) -> list[tuple]:
+        """
+        Fallback for rules that couldn't be scored within the time budget. Pairs them with a new rule with identical
+        text, or failing that, with the new rule of the same number.
+        """
+        new_by_text = {}
+        for new_num, item in new_unmatched.items():
+            new_by_text.setdefault(item["ruleText"], []).append(new_num)
+
+        pairs = []
+        for old_num in old_nums:
+            if old_num not in old_unmatched:
+                continue
+            candidates = [n for n in new_by_text.get(old_unmatched[old_num]["ruleText"], []) if n in new_unmatched]
+            new_num = candidates[0] if candidates else (old_num if old_num in new_unmatched else None)
+            if new_num:
+                pairs.append((old_num, new_num))
+                del old_unmatched[old_num]
+                del new_unmatched[new_num]
+        return pairs
 
 
 class MtrMatcher(Matcher):
@@ -141,17 +195,20 @@ class MtrMatcher(Matcher):
             del old[old_title]
         return pairs
 
-    def align_matches(self, old, new) -> list[tuple]:
+    def align_matches(self, old, new, stats: DiffStats | None = None) -> list[tuple]:
+        stats = stats or DiffStats()
         old = old.copy()
         new = new.copy()
 
-        self.prune_identical_rules(old, new)
+        with stats.stage("prune"):
+            self.prune_identical_rules(old, new)
 
-        # Match primarily on title. If the versions have the same title, they're considered the same section
-        matched_pairs = self.match_by_title(old, new)
-        # If there are remaining sections that have the same number, they were probably just renamed.
-        # (This assumption can break in certain condition, but let's cross that bridge when we get to it.)
-        matched_pairs.extend(self.match_by_number(old, new))
+        with stats.stage("candidate scoring"):
+            # Match primarily on title. If the versions have the same title, they're considered the same section
+            matched_pairs = self.match_by_title(old, new)
+            # If there are remaining sections that have the same number, they were probably just renamed.
+            # (This assumption can break in certain condition, but let's cross that bridge when we get to it.)
+            matched_pairs.extend(self.match_by_number(old, new))
         # The rest are just added/deleted sections
         matched_pairs.extend((title, None) for title in old)
         matched_pairs.extend((None, title) for title in new)
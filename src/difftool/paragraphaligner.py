@@ -0,0 +1,131 @@
+import bisect
+import difflib
+
+Pair = tuple[int, int]
+
+
+class ParagraphAligner:
+    """
+    Pairs up the paragraphs of two versions of a document item, so that they can be diffed one by one.
+
+    Paragraphs that are present unchanged in both versions are aligned first. Any paragraph fingerprint that is
+    unique in both versions serves as an anchor, and the longest non-crossing chain of anchors is kept (as in a
+    patience diff). The ranges between anchors are aligned recursively. Only the paragraphs that are still unaligned
+    after that are paired up by a fuzzy text comparison, which is limited to the gap they're in.
+    """
+
+    fuzzy_cutoff = 0.4  # minimum similarity ratio of two fuzzily matched paragraphs
+    affix_length = 30  # length of the prefix/suffix used as a last resort for fuzzy matching
+
+    @staticmethod
+    def _fingerprint(paragraph: str) -> str:
+        return " ".join(paragraph.split())
+
+    def align(self, old: list[str], new: list[str]) -> list[Pair]:
+        """
+        Returns an ordered list of (old index, new index) pairs of aligned paragraphs. Paragraphs missing from the
+        list don't have a counterpart in the other version.
+        """
+        old_keys = [self._fingerprint(p) for p in old]
+        new_keys = [self._fingerprint(p) for p in new]
+        pairs = []
+        self._align_range(old, new, old_keys, new_keys, 0, len(old), 0, len(new), pairs)
+        return pairs
+
+    def _align_range(self, old, new, old_keys, new_keys, olo, ohi, nlo, nhi, pairs: list[Pair]) -> None:
+        # identical paragraphs at the start and end of the range are trivially aligned
+        while olo < ohi and nlo < nhi and old_keys[olo] == new_keys[nlo]:
+            pairs.append((olo, nlo))
+            olo, nlo = olo + 1, nlo + 1
+        suffix = []
+        while olo < ohi and nlo < nhi and old_keys[ohi - 1] == new_keys[nhi - 1]:
+            ohi, nhi = ohi - 1, nhi - 1
+            suffix.append((ohi, nhi))
+
+        anchors = self._unique_anchors(old_keys, new_keys, olo, ohi, nlo, nhi)
+        if anchors:
+            for old_index, new_index in anchors:
+                self._align_range(old, new, old_keys, new_keys, olo, old_index, nlo, new_index, pairs)
+                pairs.append((old_index, new_index))
+                olo, nlo = old_index + 1, new_index + 1
+            self._align_range(old, new, old_keys, new_keys, olo, ohi, nlo, nhi, pairs)
+        else:
+            pairs.extend(self._fuzzy_align(old, new, olo, ohi, nlo, nhi))
+
+        pairs.extend(reversed(suffix))
+
+    @staticmethod
+    def _unique_anchors(old_keys, new_keys, olo, ohi, nlo, nhi) -> list[Pair]:
+        """Finds the longest non-crossing chain of paragraphs that occur exactly once in both ranges"""
+        old_count, new_count, new_position = {}, {}, {}
+        for i in range(olo, ohi):
+            old_count[old_keys[i]] = old_count.get(old_keys[i], 0) + 1
+        for j in range(nlo, nhi):
+            new_count[new_keys[j]] = new_count.get(new_keys[j], 0) + 1
+            new_position[new_keys[j]] = j
+
+        candidates = [
+            (i, new_position[old_keys[i]])
+            for i in range(olo, ohi)
+            if old_count[old_keys[i]] == 1 and new_count.get(old_keys[i]) == 1
+        ]
+
+        # longest increasing subsequence (by new index) of the candidates, which are already sorted by old index
+        tails: list[int] = []  # new index at the end of the best chain of each length
+        tail_candidates: list[int] = []  # index into candidates of the end of the best chain of each length
+        previous: list[int | None] = []
+        for index, (_, j) in enumerate(candidates):
+            length = bisect.bisect_left(tails, j)
+            if length == len(tails):
+                tails.append(j)
+                tail_candidates.append(index)
+            else:
+                tails[length] = j
+                tail_candidates[length] = index
+            previous.append(tail_candidates[length - 1] if length > 0 else None)
+
+        chain = []
+        index = tail_candidates[-1] if tail_candidates else None
+        while index is not None:
+            chain.append(candidates[index])
+            index = previous[index]
+        return chain[::-1]
+
+    def _fuzzy_align(self, old: list[str], new: list[str], olo, ohi, nlo, nhi) -> list[Pair]:
+        """
+        Pairs up the paragraphs of a range without any identical paragraphs. For each old paragraph, its closest match
+        is searched for only after the last match, so that the matched pairs never cross.
+        """
+        pairs = []
+        start = nlo
+        for i in range(olo, ohi):
+            if start >= nhi:
+                break
+            match = self._find_match(old[i], new, start, nhi)
+            if match is not None:
+                pairs.append((i, match))
+                start = match + 1
+        return pairs
+
+    def _find_match(self, paragraph: str, new: list[str], start: int, end: int) -> int | None:
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(paragraph)
+        best, best_score = None, self.fuzzy_cutoff
+        for j in range(start, end):
+            matcher.set_seq1(new[j])
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score > best_score or (best is None and score >= best_score):
+                best, best_score = j, score
+        if best is not None:
+            return best
+
+        affix_length = min(self.affix_length, len(paragraph))
+        for j in range(start, end):
+            if new[j].startswith(paragraph[:affix_length]):
+                return j
+        for j in range(start, end):
+            if new[j].endswith(paragraph[-affix_length:]):
+                return j
+        return None
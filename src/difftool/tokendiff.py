@@ -0,0 +1,129 @@
+import difflib
+import re
+from typing import Callable, Iterable
+
+# a mention of a rule number / range of numbers, as it appears in the CR text
+_rule_number = r"(?:\d{3}(?:\.\d+[a-z]?)?)"
+rule_mention_regex = re.compile(r"(?:rule )?" + _rule_number + r"\.?\)?[,.]?")
+rule_mention_range_regex = re.compile(r"(?:rules )?" + _rule_number + r"–(?:[a-z]|" + _rule_number + r")\.?\)?[,.]?")
+
+_word_chunk_regex = re.compile(r"(\W)")
+
+
+def is_rule_mention(text: str) -> bool:
+    """Checks whether the text consists of nothing but a reference to a rule (or a range of rules)"""
+    return bool(rule_mention_regex.fullmatch(text) or rule_mention_range_regex.fullmatch(text))
+
+
+def split_words(text: str) -> list[str]:
+    """Splits text into whole words (as separated by spaces)"""
+    return text.split(" ")
+
+
+def split_word_chunks(text: str) -> list[str]:
+    """Splits text into alternating word/non-word chunks, so that diffs never start in the middle of a word"""
+    return _word_chunk_regex.split(text)
+
+
+def wrap_change(tokens: list[str], start_marker: str, end_marker: str) -> list[str]:
+    """Inserts diff markers around a list of tokens"""
+    if not tokens:
+        return []
+    tokens[0] = start_marker + tokens[0]
+    tokens[-1] += end_marker
+    return tokens
+
+
+class TokenDiffer:
+    """
+    Shared diffing engine for document items. Diffs two token sequences and wraps the differing runs in diff markers.
+
+    The alignment is the one computed by difflib.SequenceMatcher (including its junk heuristics), which keeps the
+    produced markers identical to the ones already stored in the database. Identical sequences skip the matcher.
+
+    The matcher takes time proportional to the product of the lengths of the sequences (or worse, without autojunk).
+    If that product exceeds `max_cost`, the common prefix and suffix are matched directly and only the rest goes
+    through the matcher, and if even that is too long, the rest is marked as changed as a whole.
+    """
+
+    def __init__(
+        self,
+        start_marker: str,
+        end_marker: str,
+        junk: Iterable[str] = (),
+        autojunk: bool = True,
+        max_cost: int | None = None,
+    ):
+        self.start_marker = start_marker
+        self.end_marker = end_marker
+        self.junk = frozenset(junk)
+        self.autojunk = autojunk
+        self.max_cost = max_cost
+
+    def matching_blocks(self, old: list[str], new: list[str]) -> list[difflib.Match]:
+        """
+        Returns a list of triplets (o, n, l) such that old[o:o+l] == new[n:n+l], in the same format as
+        difflib.SequenceMatcher.get_matching_blocks().
+        """
+        if self.max_cost is None or len(old) * len(new) <= self.max_cost:
+            return self._sequence_matcher_blocks(old, new)
+
+        prefix = 0
+        while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < min(len(old), len(new)) - prefix and old[-suffix - 1] == new[-suffix - 1]:
+            suffix += 1
+        old_middle = old[prefix : len(old) - suffix]
+        new_middle = new[prefix : len(new) - suffix]
+
+        blocks = [difflib.Match(0, 0, prefix)]
+        if len(old_middle) * len(new_middle) <= self.max_cost:
+            # without the sentinel block at the end
+            for o, n, size in self._sequence_matcher_blocks(old_middle, new_middle)[:-1]:
+                blocks.append(difflib.Match(prefix + o, prefix + n, size))
+        blocks.append(difflib.Match(len(old) - suffix, len(new) - suffix, suffix))
+        if suffix:
+            blocks.append(difflib.Match(len(old), len(new), 0))
+        return blocks
+
+    def _sequence_matcher_blocks(self, old: list[str], new: list[str]) -> list[difflib.Match]:
+        isjunk = self.junk.__contains__ if self.junk else None
+        seq = difflib.SequenceMatcher(isjunk, old, new, autojunk=self.autojunk)
+        return seq.get_matching_blocks()
+
+    def diff(
+        self, old: list[str], new: list[str], is_change: Callable[[list[str]], bool] = bool
+    ) -> tuple[list[str], list[str], bool]:
+        """
+        Produces the diffed versions of both token lists. The differing runs between matched blocks are only wrapped
+        in diff markers if `is_change` returns True for them (by default, any non-empty run is a change). Also returns
+        whether any run was marked as changed.
+        """
+        if old == new:
+            return list(old), list(new), False
+
+        diffed_old, diffed_new = [], []
+        old_offset, new_offset = 0, 0
+        changed = False
+        # the parts we want to diff are between the matched blocks, i.e. o1+l to o2 (n1+l to n2)
+        # this loop goes through these blocks, adding each matched block unchanged and the rest wrapped with diff tags
+        for o, n, l in self.matching_blocks(old, new):
+            block = old[old_offset:o]
+            if is_change(block):
+                block = wrap_change(block, self.start_marker, self.end_marker)
+                changed = True
+            diffed_old.extend(block)
+
+            block = new[new_offset:n]
+            if is_change(block):
+                block = wrap_change(block, self.start_marker, self.end_marker)
+                changed = True
+            diffed_new.extend(block)
+
+            diffed_old.extend(old[o : o + l])
+            diffed_new.extend(new[n : n + l])
+            old_offset = o + l
+            new_offset = n + l
+
+        return diffed_old, diffed_new, changed
@@ -0,0 +1,82 @@
+import datetime
+import gzip
+import hashlib
+from pathlib import Path
+
+from src.cr.schemas import ToCSection
+from src.extractor.cr import extract_cr
+from src.extractor.cr.parse_cr import CRParser
+from src.extractor.mtr import extract_mtr
+from src.extractor.mtr.text_backend import get_backend
+from src.resources import artifact_format
+from src.resources import static_paths as paths
+from src.utils.logger import logger
+
+
+class ArtifactCache:
+    """
+    Content-addressed store of extraction results. Each result is keyed by the SHA-256 of the document it was
+    extracted from and the version of the extractor, so a result is never stale - a changed document or extractor
+    simply produces a new key. The results are stored gzipped, in the configured artifact format (see
+    resources/artifact_format.py).
+    """
+
+    def __init__(self, directory: Path | str = paths.artifact_cache_dir, fmt: str | None = None):
+        self.directory = Path(directory)
+        self.fmt = fmt or artifact_format.artifact_format()
+
+    @staticmethod
+    def key(kind: str, version: int, source: bytes) -> str:
+        return f"{kind}-v{version}-{hashlib.sha256(source).hexdigest()}"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (key + artifact_format.suffixes[self.fmt] + ".gz")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            return artifact_format.loads(gzip.decompress(path.read_bytes()))
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError):
+            logger.warning(f"Discarding unreadable artifact {path}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, value) -> None:
+        artifact_format.write_atomic(self._path(key), gzip.compress(artifact_format.dumps(value, self.fmt)))
+
+
+def extract_cr_cached(comp_rules: str, cache: ArtifactCache | None = None) -> dict:
+    """Same as extract_cr.extract, but returns the stored result if the same (formatted) text was extracted before"""
+    cache = cache or ArtifactCache()
+    key = cache.key("cr", CRParser.version, comp_rules.encode("utf-8"))
+    cached = cache.get(key)
+    if cached is not None:
+        cached["toc"] = [ToCSection(**section) for section in cached["toc"]]
+        return cached
+
+    result = extract_cr.extract(comp_rules)
+    cache.put(key, {**result, "toc": [section.model_dump() for section in result["toc"]]})
+    return result
+
+
+def extract_mtr_cached(
+    filepath: Path | str, backend: str | None = None, cache: ArtifactCache | None = None
+) -> (datetime.date, [dict]):
+    """
+    Same as extract_mtr.extract, but returns the stored result if the same PDF was extracted before with the same
+    text backend (which skips the PDF to text conversion as well).
+    """
+    text_backend = get_backend(backend)
+    if text_backend is None:
+        return None
+    cache = cache or ArtifactCache()
+    key = cache.key(f"mtr-{text_backend.name}", extract_mtr.extractor_version, Path(filepath).read_bytes())
+    cached = cache.get(key)
+    if cached is not None:
+        return datetime.date.fromisoformat(cached["effective_date"]), cached["sections"]
+
+    effective_date, sections = extract_mtr.extract(filepath, text_backend.name)
+    cache.put(key, {"effective_date": effective_date.isoformat(), "sections": sections})
+    return effective_date, sections
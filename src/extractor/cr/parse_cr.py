@@ -0,0 +1,310 @@
+import re
+
+from src.cr.keyword_def import ability_words_rule, keyword_action_regex, keyword_regex
+from src.cr.schemas import ToCSection, ToCSubsection
+
+Lines = list[str]
+
+
+class CRParser:
+    """
+    Parses the (formatted) plaintext CR into its structured representations.
+
+    Instead of running a cascade of regexes over the whole document, the text is split into lines once. The table of
+    contents is read and the wrapped lines are joined back together during that split, and the sections, rules and
+    glossary are then read with a small state machine each, looking at one line at a time.
+
+    The output is identical to the one of the original regex-based extractor (extract_legacy in benchmarks/legacy.py),
+    including its quirks, so that the rules stored from earlier CRs stay comparable:
+    - everything before the first occurrence of "Glossary" (the table of contents entry) is skipped
+    - a section ends at the next section header or at the next occurrence of "Glossary", even in the middle of a line
+    - only the first three examples of each rule are kept
+
+    The glossary is the exception. The original extractor searched for it in all of the text after the table of
+    contents and dropped its last entry (assumed to be the credits). Here it's read from the glossary section only,
+    which gives the same result for a well-formed CR but doesn't depend on what comes before or after it.
+    """
+
+    section_start_regex = re.compile(r"\d{3}\.")
+    section_header_regex = re.compile(r"\d{3}\. ")
+    rule_number_regex = re.compile(r"\d{3}\.[^\s.]{1,4}")
+    rule_separator_regex = re.compile(r"[\s.]*")
+    toc_entry_regex = re.compile(r"(\d+)\. (.*)")
+    keyword_regex = re.compile(keyword_regex)
+    keyword_action_regex = re.compile(keyword_action_regex)
+    keyword_sections = (keyword_regex.pattern[:3], keyword_action_regex.pattern[:3], ability_words_rule[:3])
+
+    version = 3  # increase whenever the output changes, to invalidate extraction results stored in the ArtifactCache
+
+    glossary_marker = "Glossary"
+    credits_marker = "Credits"
+    obsolete_regex = re.compile(r"\s*\(obsolete\)$", re.IGNORECASE)
+    contents_marker = "Contents"
+    example_prefix = "Example: "
+    max_examples = 3
+    max_example_lines = 4  # example lines consumed after a rule, the ones past max_examples are ignored
+    join_indent = 4  # minimum amount of whitespace after a line break for the next line to be joined with the previous
+
+    def __init__(self, comp_rules: str):
+        self.comp_rules = comp_rules
+        self.rules = {}
+        self.sections = {}  # the per-section structure that's saved by extract_cr.save_structured
+        self.glossary = {}
+        self.keywords = {
+            "keywordAbilities": [],
+            "keywordActions": [],
+            "abilityWords": [],
+        }
+        self.toc: list[ToCSection] = []
+
+    def parse(self) -> dict:
+        lines = self._read_lines()
+        self._parse_sections(lines)
+        self._parse_glossary(lines)
+        return {"rules": self.rules, "keywords": self.keywords, "glossary": self.glossary, "toc": self.toc}
+
+    def _read_lines(self) -> Lines:
+        """
+        Reads the table of contents and returns the lines of the text after the start of its "Glossary" entry, with
+        wrapped lines joined together. A line is joined with the last non-blank line before it if the line break is
+        followed by at least `join_indent` whitespace characters (including those of any blank lines in between) and
+        then a word character.
+        """
+        toc_entries = []
+        in_contents = False
+        toc_done = False
+        lines = []
+        wrapped = []  # the parts of the last non-blank line, joined once the line is complete
+        blank = []  # blank lines after the last non-blank line, they're dropped if the next line is joined
+        blank_width = 0  # number of characters in those lines, including their line breaks
+
+        for line in self.comp_rules.split("\n"):
+            if not toc_done:
+                if line.startswith(self.glossary_marker):
+                    toc_done = True
+                elif in_contents:
+                    toc_entries.append(self.toc_entry_regex.match(line))
+                elif line.startswith(self.contents_marker):
+                    in_contents = True
+                    toc_entries.append(self.toc_entry_regex.match(line, len(self.contents_marker)))
+
+            if not wrapped:
+                start = line.find(self.glossary_marker)
+                if start >= 0:
+                    wrapped.append(line[start:])
+                continue
+
+            content = line.lstrip()
+            if not content:
+                blank.append(line)
+                blank_width += len(line) + 1
+                continue
+            indent = len(line) - len(content) + blank_width
+            if indent >= self.join_indent and (content[0].isalnum() or content[0] == "_"):
+                wrapped.append(content)
+            else:
+                lines.append(" ".join(wrapped))
+                lines.extend(blank)
+                wrapped = [line]
+            blank.clear()
+            blank_width = 0
+        if wrapped:
+            lines.append(" ".join(wrapped))
+        lines.extend(blank)
+
+        if not toc_done:
+            raise ValueError("Couldn't find the end of the table of contents")
+        self.toc = self._build_toc([m.groups() for m in toc_entries if m])
+        return lines
+
+    @staticmethod
+    def _build_toc(entries: list[tuple[str, str]]) -> list[ToCSection]:
+        toc_sections = []
+        current_section: ToCSection | None = None
+        for number, title in entries:
+            if len(number) < 3:  # 1- (and in the future possibly 2-) digit number denotes a section
+                if current_section:
+                    toc_sections.append(current_section)
+                current_section = ToCSection(number=int(number), title=title, subsections=[])
+            else:
+                current_section.subsections.append(ToCSubsection(number=int(number), title=title))
+
+        if current_section:
+            toc_sections.append(current_section)
+        return toc_sections
+
+    def _split_sections(self, lines: Lines) -> list[Lines]:
+        """
+        Splits the lines into sections. Each section is returned as a list of lines, the last of which is either
+        empty (if the section ends with a line break) or the part of a line before "Glossary".
+        """
+        sections = []
+        index = 0
+        while index < len(lines):
+            if not self.section_start_regex.match(lines[index]):
+                index += 1
+                continue
+
+            start = index
+            cut = lines[start].find(self.glossary_marker, 4)  # searched for only after the section number
+            if cut >= 0:
+                sections.append([lines[start][:cut]])
+                index += 1
+                continue
+
+            for index in range(start + 1, len(lines)):
+                line = lines[index]
+                cut = line.find(self.glossary_marker)
+                if cut == 0 or self.section_header_regex.match(line):
+                    sections.append(lines[start:index] + [""])
+                    break
+                if cut > 0:
+                    sections.append(lines[start:index] + [line[:cut]])
+                    index += 1
+                    break
+            else:
+                # a section that's never terminated isn't a section at all
+                break
+        return sections
+
+    def _split_rules(self, section: Lines) -> list[tuple[str, str, list[str]]]:
+        """Returns (rule number, rule text, examples) for each rule of a section"""
+        rules = []
+        index = 0
+        while index < len(section):
+            number = self.rule_number_regex.match(section[index])
+            if not number:
+                index += 1
+                continue
+
+            line = section[index]
+            text_start = self.rule_separator_regex.match(line, number.end()).end()
+            # the separator between the rule number and its text may span several lines
+            while text_start == len(line) and index + 1 < len(section):
+                index += 1
+                line = section[index]
+                text_start = self.rule_separator_regex.match(line).end()
+
+            examples = []
+            while (
+                len(examples) < self.max_example_lines
+                and index + 1 < len(section)
+                and section[index + 1].startswith(self.example_prefix)
+            ):
+                index += 1
+                examples.append(section[index][len(self.example_prefix) :])
+
+            rules.append((number.group(), line[text_start:], examples))
+            index += 1
+        return rules
+
+    @staticmethod
+    def _section_title(section: Lines) -> str:
+        # the title line of a section that was cut short by "Glossary" loses its last character, as it always has
+        return section[0] if len(section) > 1 else section[0][:-1]
+
+    def _parse_sections(self, lines: Lines) -> None:
+        sections = self._split_sections(lines)
+        last_rule = None
+        for index, section in enumerate(sections):
+            rules = self._split_rules(section)
+            current_section = []
+            for idx, (number, text, examples) in enumerate(rules):
+                nonempty_examples = [ex for ex in examples[: self.max_examples] if ex != ""] or None
+                new_rule = {
+                    "ruleNumber": number,
+                    "fragment": number.split(".")[1],
+                    "ruleText": text,
+                    "examples": nonempty_examples,
+                    "navigation": {
+                        "previousRule": rules[idx - 1][0] if idx > 0 else last_rule,
+                        "nextRule": rules[idx + 1][0] if idx + 1 < len(rules) else None,
+                    },
+                }
+                current_section.append(new_rule)
+                self.rules[number] = new_rule
+                self._add_keywords(new_rule)
+            if rules:
+                last_rule = rules[-1][0]
+
+            previous_section = None
+            next_section = None
+            if index > 0:
+                prev = sections[index - 1]
+                previous_section = {"name": self._section_title(prev), "id": prev[0][:3]}
+            if index + 1 < len(sections):
+                next = sections[index + 1]
+                next_section = {"name": self._section_title(next), "id": next[0][:3]}
+            self.sections[section[0][:3]] = {
+                "rules": current_section,
+                "name": self._section_title(section)[5:],
+                "section": section[0][:3],
+                "previousSection": previous_section,
+                "nextSection": next_section,
+            }
+
+    def _add_keywords(self, rule: dict) -> None:
+        if not rule["ruleNumber"].startswith(self.keyword_sections):
+            return
+        if self.keyword_regex.fullmatch(rule["ruleNumber"]):
+            self.keywords["keywordAbilities"].extend(split_keywords(rule["ruleText"]))
+        elif self.keyword_action_regex.fullmatch(rule["ruleNumber"]):
+            self.keywords["keywordActions"].extend(split_keywords(rule["ruleText"]))
+        elif rule["ruleNumber"] == ability_words_rule:
+            self.keywords["abilityWords"] = split_ability_words(rule["ruleText"])
+
+    @staticmethod
+    def _is_glossary_term(line: str) -> bool:
+        return bool(line) and not line[0].isspace() and "." not in line
+
+    def _glossary_lines(self, lines: Lines) -> Lines:
+        """The lines between the glossary header (the last "Glossary" line) and the credits header"""
+        start = 0
+        for index in range(len(lines) - 1, 0, -1):
+            if lines[index].strip() == self.glossary_marker:
+                start = index + 1
+                break
+        for index in range(start, len(lines)):
+            if lines[index].strip() == self.credits_marker:
+                return lines[start:index]
+        return lines[start:]
+
+    def _parse_glossary(self, lines: Lines) -> None:
+        """
+        The glossary is a list of blocks separated by blank lines. A block is an entry if its first line is a term (a
+        line without any periods) followed by the definition. Any other block continues the definition of the
+        previous entry. Every line is looked at once, so unlike a regex over the whole text, this can't backtrack.
+        """
+        term = None
+        definition = []
+        block = []
+        for line in self._glossary_lines(lines) + [""]:
+            if line.strip():
+                block.append(line)
+                continue
+            if len(block) > 1 and self._is_glossary_term(block[0]):
+                self._add_glossary_entry(term, definition)
+                term, definition = block[0], block[1:]
+            elif term is not None:
+                definition += block
+            block = []
+        self._add_glossary_entry(term, definition)
+
+    def _add_glossary_entry(self, term: str | None, definition: Lines) -> None:
+        if term is None:
+            return
+        # normalized, so that the obsolete terms can be found by the key without the suffix (see GlossaryCache)
+        term = self.obsolete_regex.sub(" (Obsolete)", term.rstrip())
+        self.glossary[term.lower()] = {"term": term, "definition": "\n".join(definition)}
+
+
+def split_ability_words(rules_text: str):
+    splitter = re.compile(r", (?:and )?")
+    trimmed = rules_text.rstrip(". ")
+    list_str = re.findall(r"The ability words are (.*)", trimmed)[0]
+    return splitter.split(list_str)
+
+
+def split_keywords(title: str):
+    """Sometimes one title contains multiple keywords ("Daybound and Nightbound"). We want to separate those."""
+    return title.split(" and ")
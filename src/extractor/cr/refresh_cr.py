@@ -1,5 +1,6 @@
+import codecs
 import datetime
-import re
+import os
 
 import requests
 from sqlalchemy import select
@@ -10,67 +11,117 @@ from src.cr.models import Cr, PendingCr
 from src.db import SessionLocal
 from src.diffs.models import PendingCrDiff
 from src.difftool.diffmaker import CRDiffMaker
+from src.extractor.artifact_cache import extract_cr_cached
 from src.extractor.cr import extract_cr
+from src.extractor.download_doc import DocumentDownloader, Download
 from src.link import service as links_service
+from src.resources import raw_docs
 from src.resources import static_paths as paths
-from src.resources.cache import GlossaryCache, KeywordCache
-from src.utils import notifier
+from src.utils import invalidation, notifier
 from src.utils.logger import logger
 
+starting_phrase = "Magic: The Gathering"
+# some phrases with non-ASCII diacritics (mostly Arabian Nights card names)
+canary_phrases = ["Magic: The Gathering®", "™", "Ring of Ma’rûf", "Dandân", "Ghazbán Ogre"]
+fallback_encodings = ["UTF-8", "UTF-16BE", "WINDOWS-1252", "UTF-16LE", "ISO-8859-1"]
+boms = {codecs.BOM_UTF8: "UTF-8", codecs.BOM_UTF16_BE: "UTF-16BE", codecs.BOM_UTF16_LE: "UTF-16LE"}
 
-def get_response_text(response: requests.Response) -> str | None:
+
+def _find_encoded(content: bytes, phrase: bytes, start: int, alignment: int) -> bool:
+    """Searches for an encoded phrase, only accepting matches that start on a character boundary"""
+    position = content.find(phrase, start)
+    while position >= 0 and (position - start) % alignment:
+        position = content.find(phrase, position + 1)
+    return position >= 0
+
+
+def _matches_encoding(content: bytes, encoding: str) -> int | None:
+    """
+    Checks whether the raw CR is encoded with the given encoding, without decoding it. Returns the length of its BOM
+    (0 if there's none), or None if the encoding doesn't match.
+    """
+    try:
+        bom = "\ufeff".encode(encoding)
+    except UnicodeEncodeError:
+        bom = None
+    start = len(bom) if bom and content.startswith(bom) else 0
+
+    try:
+        encoded_start = starting_phrase.encode(encoding)
+        encoded_phrases = [phrase.encode(encoding) for phrase in canary_phrases]
+    except UnicodeEncodeError:
+        # the encoding can't represent some of the phrases, so they can't be in the decoded text either
+        return None
+    if not content.startswith(encoded_start, start):
+        return None
+    # in UTF-16 every (ASCII) character takes up two bytes, a match must be aligned to them
+    alignment = len(encoded_start) // len(starting_phrase)
+    if all(_find_encoded(content, phrase, start, alignment) for phrase in encoded_phrases):
+        return start
+    return None
+
+
+def decode_cr(content: bytes, declared_encoding: str | None = None) -> str | None:
     """
     Since WotC can't just decide on a consistent character encoding for its text files, and I don't really care for
-    manually changing it every other set, this method performs a simple heuristic to decide which encodings should be
-    tried out.
+    manually changing it every other set, this method performs a simple heuristic to decide which encoding is used.
 
-    It runs through a list of common encodings and checks whether the file
+    A BOM, if present, decides which encoding is tried first. Otherwise, the encoding declared by the server is tried
+    first, followed by a list of common encodings. An encoding is accepted if the file
     a) starts with the phrase "Magic: The Gathering", and
     b) contains some properly encoded common phrases that I don't expect to disappear from the CR anytime soon.
+    Both are checked on the raw bytes, by encoding the phrases instead of decoding the file, so that the whole file is
+    decoded only once.
 
     It also re-formats the text by replacing all line endings with just LF and removing a BOM if present.
     """
-    encodings = [response.encoding, "UTF-8", "UTF-16BE", "WINDOWS-1252", "UTF-16LE", "ISO-8859-1"]
-
-    starting_phrase = "Magic: The Gathering"
-    # some phrases with non-ASCII diacritics (mostly Arabian Nights card names)
-    phrases = ["Magic: The Gathering®", "™", "Ring of Ma’rûf", "Dandân", "Ghazbán Ogre"]
-
-    bom = re.compile("^\ufeff")
-
-    for encoding in encodings:
-        response.encoding = encoding
-        text = response.text
-        text = bom.sub("", text)
-        if text.startswith(starting_phrase) and all((phrase in text) for phrase in phrases):
+    encodings = [boms[bom] for bom in boms if content.startswith(bom)] + [declared_encoding] + fallback_encodings
+    for encoding in dict.fromkeys(e for e in encodings if e):
+        try:
+            bom_length = _matches_encoding(content, encoding)
+        except LookupError:
+            continue  # unknown encoding declared by the server
+        if bom_length is not None:
+            text = content[bom_length:].decode(encoding, errors="replace")
             return text.replace("\r\n", "\n").replace("\r", "\n")
 
     return None
 
 
-def download_cr(uri: str) -> tuple[str, str] | None:
-    response = requests.get(uri)
-    if not response.ok:
-        msg = f"Couldn't download CR from link (code {response.status_code}). Tried link: {uri}"
+def download_cr(uri: str) -> tuple[str, str, Download] | None:
+    """
+    Downloads the CR, stores it as UTF-8 and returns its text. Returns None if it couldn't be downloaded, or if it
+    hasn't changed since the last (confirmed) download.
+    """
+    file_name = "cr-" + datetime.date.today().isoformat() + ".txt"
+    try:
+        # the file as it was published, in its original encoding
+        download = DocumentDownloader().download(uri, paths.cr_original_dir + "/" + file_name)
+    except requests.RequestException as e:
+        msg = f"Couldn't download CR from link ({e}). Tried link: {uri}"
         logger.error(msg)
         notifier.notify(msg, "CR parsing error", uri, "Tried link")
         return None
+    if download is None:
+        logger.info(f"CR at {uri} hasn't changed since the last download")
+        return None
 
-    text = get_response_text(response)
+    text = decode_cr(download.path.read_bytes(), download.encoding)
     if text is None:
         logger.error("Couldn't determine encoding for new CR")
         notifier.notify("Couldn't determine encoding for new CR", "CR parsing error")
         return None
 
     # save to file
-    file_name = "cr-" + datetime.date.today().isoformat() + ".txt"
     file_path = paths.cr_dir + "/" + file_name
     with open(file_path, "w", encoding="utf-8") as output:
         output.write(text)
     with open(paths.current_cr, "w", encoding="utf-8") as output:
         output.write(text)
+    raw_docs.precompress(file_path)
+    raw_docs.document_info(file_path)
 
-    return text, file_name
+    return text, file_name, download
 
 
 def refresh_cr(link):
@@ -83,13 +134,18 @@ def refresh_cr(link):
             new_cr = download_cr(link)
             if new_cr is None:
                 return
-            new_text, file_name = new_cr
-
-            result = extract_cr.extract(new_text)
-            diff_result = CRDiffMaker().diff(current_cr.data, result["rules"])
-            # TODO add to database instead?
-            KeywordCache().replace(result["keywords"])
-            GlossaryCache().replace(result["glossary"])
+            new_text, file_name, download = new_cr
+
+            result = extract_cr_cached(new_text)
+            extract_cr.save_structured(result["sections"])
+            diff_result = CRDiffMaker().diff(current_cr.data, result["rules"], get_diff_budget())
+            if diff_result.degraded:
+                timings = ", ".join(f"{stage}: {seconds:.1f} s" for stage, seconds in diff_result.timings.items())
+                logger.warning("CR diff ran out of time and used fallback matching (%s)", timings)
+                notifier.notify(
+                    f"The CR diff ran out of time, some rules were matched only by text or number ({timings})",
+                    "CR diff degraded",
+                )
             set_pending_cr_and_diff(
                 session,
                 result["rules"],
@@ -97,16 +153,88 @@ def refresh_cr(link):
                 diff_result.diff,
                 file_name,
                 diff_result.moved,
+                diff_result.degraded,
+                diff_result.timings,
+                result["glossary"],
+                result["keywords"],
             )
+            invalidation.publish(session, "cr")
+    DocumentDownloader().confirm(download)
+
+
+def backfill_glossary_and_keywords() -> tuple[int, int]:
+    """
+    Extracts the glossary and keywords of the CRs that were confirmed before those were stored along with each CR, from
+    their files in the CR directory. Returns how many CRs were updated and how many couldn't be (their file is missing
+    or can't be parsed).
+    """
+    updated = failed = 0
+    with SessionLocal() as session:
+        with session.begin():
+            crs = session.execute(select(Cr).where((Cr.glossary.is_(None)) | (Cr.keywords.is_(None)))).scalars()
+            for cr in crs:
+                try:
+                    with open(paths.cr_dir + "/" + cr.file_name, "r", encoding="utf-8") as file:
+                        result = extract_cr.extract(file.read())
+                except Exception as e:
+                    logger.warning(f"Couldn't extract the glossary and keywords of the {cr.set_code} CR: {e}")
+                    failed += 1
+                    continue
+                cr.glossary = result["glossary"]
+                cr.keywords = result["keywords"]
+                updated += 1
+            if updated:
+                invalidation.publish(session, "cr")
+    return updated, failed
+
+
+def get_diff_budget() -> float | None:
+    """
+    Time limit for the CR diff (in seconds), configured by the CR_DIFF_BUDGET env variable. None means unlimited, which
+    is also used if the value isn't a positive number, rather than failing the refresh of an already downloaded CR.
+    """
+    budget = os.environ.get("CR_DIFF_BUDGET")
+    if not budget:
+        return None
+    try:
+        seconds = float(budget)
+    except ValueError:
+        seconds = 0.0
+    if not seconds > 0:
+        logger.warning(f"Invalid CR_DIFF_BUDGET {budget!r}, diffing the CR without a time limit")
+        return None
+    return seconds
 
 
 def set_pending_cr_and_diff(
-    db: Session, new_rules: dict, new_toc: list, new_diff: list, file_name: str, new_moves: list
+    db: Session,
+    new_rules: dict,
+    new_toc: list,
+    new_diff: list,
+    file_name: str,
+    new_moves: list,
+    degraded: bool = False,
+    timings: dict | None = None,
+    glossary: dict | None = None,
+    keywords: dict | None = None,
 ):
-    new_cr = PendingCr(creation_day=datetime.date.today(), data=new_rules, file_name=file_name, toc=new_toc)
+    new_cr = PendingCr(
+        creation_day=datetime.date.today(),
+        data=new_rules,
+        file_name=file_name,
+        toc=new_toc,
+        glossary=glossary,
+        keywords=keywords,
+    )
     curr_cr_id: Cr = db.execute(select(Cr.id).order_by(Cr.creation_day.desc())).scalars().first()
     new_diff = PendingCrDiff(
-        creation_day=datetime.date.today(), source_id=curr_cr_id, dest=new_cr, changes=new_diff, moves=new_moves
+        creation_day=datetime.date.today(),
+        source_id=curr_cr_id,
+        dest=new_cr,
+        changes=new_diff,
+        moves=new_moves,
+        degraded=degraded,
+        timings=timings,
     )
     db.add(new_cr)
     db.add(new_diff)
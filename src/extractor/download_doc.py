@@ -1,21 +1,154 @@
+import hashlib
+import os
+from dataclasses import dataclass
 from datetime import date
+from pathlib import Path
 from typing import Literal
 
 import requests
 
+from src.resources import raw_docs
 from src.resources import static_paths as paths
+from src.resources.cache import DownloadValidatorCache
+from src.utils.logger import logger
 
 
-def download_doc(link: str, kind: Literal["mtr", "ipg"]):
+@dataclass
+class Download:
+    link: str
+    path: Path
+    sha256: str
+    encoding: str | None  # character encoding declared by the server, if any
+    validators: dict  # what's remembered about the link once the download is confirmed
 
-    directory = paths.docs_dir + "/" + kind
-    filename = kind + "-" + date.today().isoformat() + ".pdf"
-    filepath = directory + "/" + filename
 
-    r = requests.get(link, stream=True)
+class DocumentDownloader:
+    """
+    Downloads documents, skipping the ones that haven't changed since their last download.
+
+    The validators (ETag, Last-Modified) of each link are stored, and sent with the next request to the same link, so
+    the server can answer with 304 Not Modified. Servers that don't support that are covered by comparing the SHA-256
+    of the downloaded file with that of the previous download.
+
+    The response is streamed into a partial file in paths.partial_downloads_dir, which is renamed to the target path
+    only once it's complete. If the download is interrupted, the next one resumes it with a Range request (as long as
+    the server provided a validator to make sure the document didn't change in between).
+
+    The validators of a download are stored only when it's confirmed (see confirm), so that a document that failed to
+    be processed isn't skipped the next time.
+    """
+
+    chunk_size = 2**16
+    timeout = (10, 60)  # (connect, read) in seconds
+
+    def __init__(self):
+        self.validators = DownloadValidatorCache()
+
+    @staticmethod
+    def _partial_path(link: str) -> Path:
+        return Path(paths.partial_downloads_dir) / (hashlib.sha256(link.encode()).hexdigest()[:16] + ".part")
+
+    @staticmethod
+    def _response_validators(response: requests.Response) -> dict:
+        return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    @staticmethod
+    def _if_range(validators: dict) -> str | None:
+        # If-Range only works with strong ETags
+        etag = validators.get("etag")
+        if etag and not etag.startswith("W/"):
+            return etag
+        return validators.get("last_modified")
+
+    def _request_headers(self, state: dict, partial_path: Path) -> tuple[dict, int]:
+        partial = state.get("partial")
+        if partial and partial_path.is_file() and self._if_range(partial):
+            offset = partial_path.stat().st_size
+            return {"Range": f"bytes={offset}-", "If-Range": self._if_range(partial)}, offset
+
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers, 0
+
+    def _hash_file(self, path: Path, digest) -> None:
+        with open(path, "rb") as file:
+            while chunk := file.read(self.chunk_size):
+                digest.update(chunk)
 
-    with open(filepath, "wb") as fd:
-        for chunk in r.iter_content(chunk_size=None):
-            fd.write(chunk)
+    def download(self, link: str, target: Path | str, restarted: bool = False) -> Download | None:
+        """
+        Downloads the document at `link` to `target`. Returns None (and doesn't write anything) if the document didn't
+        change since the last confirmed download from the same link. A partial download the server refuses to resume
+        (416) is discarded and the download restarted once, `restarted` marks that second attempt.
+        """
+        target = Path(target)
+        state = self.validators.get(link) or {}
+        partial_path = self._partial_path(link)
+        partial_path.parent.mkdir(parents=True, exist_ok=True)
+        headers, offset = self._request_headers(state, partial_path)
+
+        with requests.get(link, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304:
+                return None
+            if response.status_code == 416 and not restarted:
+                # the partial file doesn't fit the document anymore, start over
+                logger.info(f"Discarding partial download of {link}")
+                partial_path.unlink(missing_ok=True)
+                self._clear_partial(link)
+                return self.download(link, target, restarted=True)
+            # a 416 after restarting is raised as well
+            response.raise_for_status()
+
+            resumed = offset > 0 and response.status_code == 206
+            digest = hashlib.sha256()
+            if resumed:
+                logger.info(f"Resuming download of {link} at byte {offset}")
+                self._hash_file(partial_path, digest)
+
+            validators = self._response_validators(response)
+            if self._if_range(validators):
+                # remember what's being downloaded, so that it can be resumed if the download fails
+                self.validators.set(link, {**state, "partial": validators})
+
+            with open(partial_path, "ab" if resumed else "wb") as file:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    file.write(chunk)
+                    digest.update(chunk)
+            encoding = requests.utils.get_encoding_from_headers(response.headers)
+
+        sha256 = digest.hexdigest()
+        new_state = {**validators, "sha256": sha256}
+        if sha256 == state.get("sha256"):
+            partial_path.unlink()
+            self.validators.set(link, new_state)
+            return None
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(partial_path, target)
+        self._clear_partial(link)
+        return Download(link, target, sha256, encoding, new_state)
+
+    def _clear_partial(self, link: str) -> None:
+        state = self.validators.get(link)
+        if state and "partial" in state:
+            self.validators.set(link, {k: v for k, v in state.items() if k != "partial"})
+
+    def confirm(self, download: Download) -> None:
+        """Stores the validators of a processed download, so that the same document isn't downloaded again"""
+        self.validators.set(download.link, download.validators)
+
+
+def download_doc(link: str, kind: Literal["mtr", "ipg"]) -> Download | None:
+    """Downloads a PDF document, returns None if it hasn't changed since the last (confirmed) download"""
+    directory = paths.docs_dir + "/" + kind
+    filename = kind + "-" + date.today().isoformat() + ".pdf"
 
-    return directory, filename
+    download = DocumentDownloader().download(link, Path(directory) / filename)
+    if download is None:
+        logger.info(f"Document at {link} hasn't changed since the last download")
+    else:
+        raw_docs.document_info(download.path, download.sha256)
+    return download
@@ -5,8 +5,48 @@ from abc import ABC, abstractmethod
 WotC is pretty good about typography in their CR files. However, sometimes they mess things up. Most notably,
 the RNA file has all the usual typographical niceties removed, which creates large nonsensical diffs around it.
 These classes create a structure that allows me to automatically reformat these offending files as they're parsed.
+
+The corrections for each broken release are declared as data (see `corrections` below) and applied by
+CompiledCRFormatter in a single scan of the document, so correcting another release doesn't add more passes over it.
 """
 
+Correction = tuple[str, str]  # (regex, replacement) - the replacement can refer to the regex's groups like in re.sub
+
+type_line_words = ["Artifact", "Creature", "Enchantment", "Planeswalker", "Instant", "Sorcery", "Plane"]
+em_dash_words = ["they", "for", "Conspiracy™", "even", "either", "in", "or", "chooses", "not", "whose", "the"]
+em_dash_words += ["unless", "read", "that", "any"]
+symbol = r"(?:™|®|\(tm\)|\(r\))"  # the symbols are corrected too, so the rules after them have to match both forms
+
+corrections: dict[str, list[Correction]] = {
+    "RNA": [
+        # reverting overcorrections (these come first, so that the rules below never apply to them)
+        # technically correct with an en dash, but all the surrounding versions also have a hyphen, so we keep it there
+        (r"601\.2g[-–]h", "601.2g-h"),
+        (r"[-—](?:(?<=phased.)|(?<=fill.))in", "-in"),
+        # quotation mark replacements
+        (r'"(?<=[ (]")', "“"),
+        (r'"', "”"),
+        (r"['’](?<= .)", "‘"),
+        (r"'", "’"),
+        # copyright symbols
+        (r"\(tm\)", "™"),
+        (r"\(r\)", "®"),
+        # replacing hyphens -- this part is tailored to the exact incorrect rules
+        (r"-(?<=\}-)(?=\[)", "—"),
+        (r"-(?<=\d\w-)(?=\w)", "–"),  # sub-rule range
+        (r"-(?<=\d-)(?=\d)", "–"),  # number range
+        ("-(?:" + "|".join(f"(?<={word} -)" for word in type_line_words) + ")", "—"),  # type line
+        (r"-(?=\[cost\])", "—"),  # ability words
+        (  # other random rules that needed to be corrected (the text after the dash is matched before it's corrected)
+            r"-(?=(?:"
+            + "|".join(em_dash_words).replace("™", r"(?:™|\(tm\))")
+            + rf'|(?:{symbol}|[^\n (])"|(?:{symbol}|.)”) )',
+            "—",
+        ),
+        (r"-(?= \[)", "—"),
+    ],
+}
+
 
 class CRFormatter(ABC):
     @abstractmethod
@@ -19,42 +59,59 @@ class EmptyCRFormatter(CRFormatter):
         return file
 
 
-class RnaCRFormatter(CRFormatter):
+class CompiledCRFormatter(CRFormatter):
+    """
+    Applies a list of corrections in a single scan of the text. Their regexes are combined into one regex of
+    alternatives, and the alternative that matched picks the replacement from a dispatch table.
+
+    Unlike a chain of replacements, the corrections all see the original text, and a match consumes the text it
+    covers. Where several corrections could start at the same position, the one listed first wins. Context that
+    shouldn't be consumed (or replaced) has to be matched with lookarounds.
+
+    Every correction has to start with a single character (or character class) it consumes, with any lookbehind
+    following it. The combined regex starts with a lookahead for those characters, which lets the regex engine skip
+    the text between the matches quickly instead of trying every alternative at every position.
+    """
+
+    leading_token_regex = re.compile(r"(\\.|\[(?:\\.|[^]\\])+]|[^\\[(){}|.*+?^$])(?![*?{])")
+
+    def __init__(self, corrections_list: list[Correction]):
+        self.dispatch = {}
+        alternatives = []
+        leading_tokens = []
+        group = 1
+        for pattern, replacement in corrections_list:
+            regex = re.compile(pattern)
+            leading_token = self.leading_token_regex.match(pattern)
+            if not leading_token:
+                raise ValueError(f"The correction {pattern!r} doesn't start with a single character or class")
+            leading_tokens.append(leading_token.group())
+            alternatives.append(f"({pattern})")
+            if "\\" in replacement:
+                # the groups of the correction are numbered differently in the combined regex, so the correction's
+                # own regex is matched again at the same position to expand the replacement
+                self.dispatch[group] = lambda m, r=regex, t=replacement: r.match(m.string, m.start()).expand(t)
+            else:
+                self.dispatch[group] = replacement
+            group += regex.groups + 1
+        self.regex = re.compile(f"(?={'|'.join(dict.fromkeys(leading_tokens))})(?:{'|'.join(alternatives)})")
+
+    def _replace(self, match: re.Match) -> str:
+        # the group wrapping the whole alternative is the last one to close, so it's the match's lastindex
+        replacement = self.dispatch[match.lastindex]
+        return replacement if isinstance(replacement, str) else replacement(match)
+
     def format(self, file: str) -> str:
-        # quotation mark replacements
-        file = file.replace(' "', " “")
-        file = file.replace('("', "(“")
-        file = file.replace('"', "”")
-        file = file.replace("'", "’")
-        file = file.replace(" ’", " ‘")
-        # copyright symbols
-        file = file.replace("(tm)", "™")
-        file = file.replace("(r)", "®")
-        # replacing hyphens -- this part is tailored to the exact incorrect rules
-        file = file.replace("}-[", "}—[")
-        file = re.sub(r"(\d\w)-(\w)", r"\1–\2", file)  # sub-rule range
-        file = re.sub(r"(\d)-(\d)", r"\1–\2", file)  # number range
-        file = re.sub(  # type line
-            r"(Artifact|Creature|Enchantment|Planeswalker|Instant|Sorcery|Plane) -", r"\1 —", file
-        )
-        file = file.replace("-[cost]", "—[cost]")  # ability words
-        file = re.sub(  # other random rules that needed to be corrected
-            r"-(they|for|Conspiracy™|even|either|in|or|chooses|not|whose|the|unless|read|that|any|.”) ",
-            r"—\1 ",
-            file,
-        )
-        file = file.replace("- [", "— [")
-
-        # reverting overcorrections
-        file = re.sub(r"(phased|fill)—in", r"\1-in", file)
-        # technically correct with an en dash, but all the surrounding versions also have a hyphen, so we keep it there
-        file = file.replace("601.2g–h", "601.2g-h")
-        return file
+        return self.regex.sub(self._replace, file)
 
 
 class CRFormatterFactory:
+    _formatters: dict[str, CRFormatter] = {}  # compiled once per set code
+
     @staticmethod
     def create_formatter(set_code: str | None = None) -> CRFormatter:
-        if set_code == "RNA":
-            return RnaCRFormatter()
-        return EmptyCRFormatter()
+        if set_code not in corrections:
+            return EmptyCRFormatter()
+        if set_code not in CRFormatterFactory._formatters:
+            CRFormatterFactory._formatters[set_code] = CompiledCRFormatter(corrections[set_code])
+        return CRFormatterFactory._formatters[set_code]
@@ -1,10 +1,15 @@
 from src.db import SessionLocal
-from src.extractor.download_doc import download_doc
+from src.extractor.download_doc import DocumentDownloader, download_doc
 from src.ipg.service import upload_ipg
+from src.utils import invalidation
 
 
 def refresh_ipg(link: str):
-    _, file_name = download_doc(link, "ipg")
+    download = download_doc(link, "ipg")
+    if download is None:
+        return
     with SessionLocal() as session:
         with session.begin():
-            upload_ipg(session, file_name)
+            upload_ipg(session, download.path.name)
+            invalidation.publish(session, "ipg")
+    DocumentDownloader().confirm(download)
@@ -1,12 +1,13 @@
 import datetime
-import os
 import re
 from pathlib import Path
 
-from tika import parser
-
+from src.extractor.mtr.text_backend import get_backend
 from src.mtr.schemas import MtrChunk
 
+# increase whenever the output of extract changes, to invalidate extraction results stored in the ArtifactCache
+extractor_version = 1
+
 
 class ParagraphSplitter:
     """
@@ -150,16 +151,26 @@ def split_into_chunks(content: str) -> [MtrChunk]:
     return chunks
 
 
-def extract(filepath: Path | str) -> (datetime.date, [dict]):
-    if os.environ.get("USE_TIKA") != "1":
+def read_pdf(filepath: Path | str, backend: str | None = None) -> str | None:
+    """
+    Converts the MTR PDF to plaintext using the given (or the configured) backend. Returns None if there's no backend
+    configured.
+    """
+    text_backend = get_backend(backend)
+    if text_backend is None:
+        return None
+    return text_backend.to_text(filepath)
+
+
+def extract(filepath: Path | str, backend: str | None = None) -> (datetime.date, [dict]):
+    content = read_pdf(filepath, backend)
+    if content is None:
         return None
+    return extract_text(content)
 
-    args = [str(filepath)]
-    tika_server = os.environ.get("TIKA_URL")
-    if tika_server:
-        args.append(tika_server)
 
-    content = parser.from_file(*args)["content"]
+def extract_text(content: str) -> (datetime.date, [dict]):
+    """Extracts the effective date and the sections from the plaintext MTR"""
     effective_str = re.search(r"^Effective (.*)$", content, re.MULTILINE)
     effective_date = datetime.datetime.strptime(effective_str.group(1).strip(), "%B %d, %Y").date()
     content = remove_page_nums(trim_content(content))
@@ -1,20 +1,23 @@
 from datetime import date
-from pathlib import Path
 
 from src.db import SessionLocal
 from src.diffs.models import PendingMtrDiff
 from src.difftool.diffmaker import MtrDiffMaker
-from src.extractor.download_doc import download_doc
-from src.extractor.mtr.extract_mtr import extract
+from src.extractor.artifact_cache import extract_mtr_cached
+from src.extractor.download_doc import DocumentDownloader, download_doc
 from src.mtr.models import PendingMtr
 from src.mtr.service import get_current_mtr
+from src.utils import invalidation
 
 
 def refresh_mtr(link: str):
-    dir, file_name = download_doc(link, "mtr")
-    file_path = Path(dir) / file_name
-    effective_date, sections = extract(file_path)
-    mtr = PendingMtr(file_name=file_name, creation_day=date.today(), sections=sections, effective_date=effective_date)
+    download = download_doc(link, "mtr")
+    if download is None:
+        return
+    effective_date, sections = extract_mtr_cached(download.path)
+    mtr = PendingMtr(
+        file_name=download.path.name, creation_day=date.today(), sections=sections, effective_date=effective_date
+    )
     with SessionLocal() as session:
         with session.begin():
             current_mtr = get_current_mtr(session)
@@ -22,3 +25,5 @@ def refresh_mtr(link: str):
             diff = PendingMtrDiff(changes=diff_result.diff, source=current_mtr, dest=mtr)
             session.add(mtr)
             session.add(diff)
+            invalidation.publish(session, "mtr")
+    DocumentDownloader().confirm(download)
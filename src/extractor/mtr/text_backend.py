@@ -0,0 +1,80 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+"""
+Backends that convert the MTR PDF to plaintext. The rest of the MTR pipeline (see extract_mtr) was written against the
+output of Tika, so the other backends normalize their output to look like it: paragraphs separated by blank lines, and
+page numbers on their own line surrounded by blank lines.
+
+The backend is selected by the MTR_PDF_BACKEND env variable. If it's not set, Tika is used if USE_TIKA is enabled.
+"""
+
+
+class TextBackend(ABC):
+    name: str
+
+    @abstractmethod
+    def to_text(self, filepath: Path | str) -> str:
+        pass
+
+
+class TikaBackend(TextBackend):
+    """Sends the document to a Tika server (by default one that's downloaded and started locally, requires Java)"""
+
+    name = "tika"
+
+    def to_text(self, filepath: Path | str) -> str:
+        from tika import parser
+
+        args = [str(filepath)]
+        tika_server = os.environ.get("TIKA_URL")
+        if tika_server:
+            args.append(tika_server)
+        return parser.from_file(*args)["content"]
+
+
+class PdfMinerBackend(TextBackend):
+    """Extracts the text in-process with pdfminer.six (an optional dependency)"""
+
+    name = "pdfminer"
+
+    ligatures = str.maketrans({"ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl", "ﬅ": "st", "ﬆ": "st"})
+    trailing_whitespace_regex = re.compile(r"[ \t]+$", re.MULTILINE)
+    page_number_regex = re.compile(r"\n+(\d+)\n*\f")
+
+    def to_text(self, filepath: Path | str) -> str:
+        try:
+            from pdfminer.high_level import extract_text
+        except ImportError:
+            raise RuntimeError("The pdfminer MTR backend requires the pdfminer.six package to be installed")
+
+        return self.normalize(extract_text(filepath))
+
+    def normalize(self, text: str) -> str:
+        # pages are separated by form feeds, Tika separates them by blank lines
+        # (remove_page_nums expects the page number at the end of a page to be surrounded by at least two of them)
+        text = self.page_number_regex.sub("\n\n\n\\1\n\n\n", text)
+        text = text.replace("\f", "\n\n")
+        text = text.replace("\xa0", " ").translate(self.ligatures)
+        # the header regex in extract_mtr requires headers not to end with a space
+        return self.trailing_whitespace_regex.sub("", text)
+
+
+backends = {backend.name: backend for backend in [TikaBackend, PdfMinerBackend]}
+
+
+def get_backend(name: str | None = None) -> TextBackend | None:
+    """
+    Returns the backend of the given name, or the one configured by the env variables. Returns None if no backend is
+    configured (and therefore MTRs can't be parsed).
+    """
+    name = name or os.environ.get("MTR_PDF_BACKEND")
+    if not name:
+        if os.environ.get("USE_TIKA") != "1":
+            return None
+        name = TikaBackend.name
+    if name not in backends:
+        raise ValueError(f"Unknown MTR PDF backend {name}, use one of: {', '.join(backends)}")
+    return backends[name]()
@@ -1,15 +1,17 @@
 import datetime
 
-from fastapi import APIRouter, Depends, Path, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Path, Request, Response
 from sqlalchemy.orm import Session
 
 from src.db import get_db
 from src.ipg import schemas, service
 from src.openapi.strings import filesTag
+from src.resources import raw_docs
+from src.resources import static_paths as paths
 from src.schemas import Error
+from src.utils import response_cache
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(response_cache.tag("ipg:current"))])
 
 
 @router.get(
@@ -19,7 +21,10 @@ router = APIRouter()
     tags=[filesTag.name],
 )
 def raw_ipg_by_date(
-    response: Response, date: datetime.date = Path(description="Date of the IPG release"), db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    date: datetime.date = Path(description="Date of the IPG release"),
+    db: Session = Depends(get_db),
 ):
     """
     Returns a raw PDF file of the Infraction Procedure Guide released at the specified date.
@@ -32,8 +37,11 @@ def raw_ipg_by_date(
         response.status_code = 404
         return {"detail": "IPG not available for this date"}
 
-    path = "src/static/raw_docs/ipg/" + ipg.file_name  # FIXME hardcoded path
-    return FileResponse(path)
+    file_response = raw_docs.serve(request, paths.ipg_dir + "/" + ipg.file_name)
+    if not file_response:
+        response.status_code = 404
+        return {"detail": "IPG file for this date not found"}
+    return file_response
 
 
 @router.get("/metadata/ipg", response_model=schemas.IpgMetadata, include_in_schema=False)
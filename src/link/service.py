@@ -2,8 +2,10 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from src.link.models import PendingRedirect, Redirect
+from src.utils.memoize import memoized
 
 
+@memoized("links", maxsize=16)
 def get_redirect(db: Session, resource: str) -> str | None:
     stmt = select(Redirect.link).where(Redirect.resource == resource)
     return db.execute(stmt).scalar_one_or_none()
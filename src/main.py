@@ -3,9 +3,10 @@ import os
 import uuid
 from typing import Any, Callable
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.responses import JSONResponse
 
 from src.admin.router import router as admin_router
@@ -14,7 +15,7 @@ from src.diffs.router import router as diff_router
 from src.ipg.router import router as ipg_router
 from src.link.router import router as link_router
 from src.mtr.router import router as mtr_router
-from src.openapi import strings
+from src.openapi import prebuilt, strings
 from src.openapi.openapi_decorators import (
     ApiLogoDecorator,
     BaseResolver,
@@ -24,8 +25,10 @@ from src.openapi.openapi_decorators import (
     ValidationErrorSchemaDecorator,
 )
 from src.resources import seeder
+from src.resources.cache import GlossaryCache, KeywordCache
+from src.utils import invalidation, loop_lag
 from src.utils.logger import logger
-from src.utils.scheduler import Scheduler
+from src.utils.response_cache import ResponseCacheMiddleware
 
 logging.basicConfig(format="%(asctime)s:%(levelname)s:%(name)s:%(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 
@@ -36,10 +39,13 @@ app = FastAPI(
     openapi_tags=strings.tag_dicts,
     license_info=strings.license_info,
     contact=strings.contact_info,
-    redoc_url="/docs",
-    docs_url="/swagger",
+    # the documentation routes are defined below, to serve the prebuilt OpenAPI document
+    openapi_url=None,
+    redoc_url=None,
+    docs_url=None,
 )
 
+app.add_middleware(ResponseCacheMiddleware)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 app.include_router(admin_router)
@@ -49,8 +55,6 @@ app.include_router(ipg_router)
 app.include_router(link_router)
 app.include_router(diff_router)
 
-Scheduler().start()
-
 
 def compose_api_resolver() -> Callable[[], dict[str, Any]]:
     resolver = BaseResolver(app.openapi)
@@ -66,11 +70,70 @@ def compose_api_resolver() -> Callable[[], dict[str, Any]]:
 app.openapi = compose_api_resolver()
 
 
+@app.get("/openapi.json", include_in_schema=False)
+def openapi_document(request: Request):
+    return prebuilt.get_document(app.openapi).response(request)
+
+
+@app.get("/docs", include_in_schema=False)
+def redoc(request: Request):
+    openapi_url = request.scope.get("root_path", "") + "/openapi.json"
+    return get_redoc_html(openapi_url=openapi_url, title=f"{app.title} - ReDoc")
+
+
+@app.get("/swagger", include_in_schema=False)
+def swagger(request: Request):
+    openapi_url = request.scope.get("root_path", "") + "/openapi.json"
+    return get_swagger_ui_html(openapi_url=openapi_url, title=f"{app.title} - Swagger UI")
+
+
 @app.on_event("startup")
 def seed():
     seeder.seed()
 
 
+@app.on_event("startup")
+def load_caches():
+    GlossaryCache().all_searches()
+    KeywordCache().data()
+
+
+@app.on_event("startup")
+def start_invalidation_listener():
+    invalidation.start_listener()
+
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    # async, so that it runs on the event loop it monitors
+    loop_lag.monitor.start()
+
+
+@app.on_event("startup")
+def start_scheduler():
+    # imported here, so that the scheduler isn't loaded by scripts that import the application
+    from src.utils.scheduler import Scheduler
+
+    app.state.scheduler = Scheduler()
+    app.state.scheduler.start()
+
+
+@app.on_event("shutdown")
+def stop_invalidation_listener():
+    invalidation.stop_listener()
+
+
+@app.on_event("shutdown")
+def stop_loop_lag_monitor():
+    loop_lag.monitor.stop()
+
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    if getattr(app.state, "scheduler", None):
+        app.state.scheduler.stop()
+
+
 @app.exception_handler(RequestValidationError)
 def validation_exception_handler(request, exc):
     return JSONResponse({"detail": str(exc)}, status_code=422)
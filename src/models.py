@@ -9,6 +9,7 @@ Base = declarative_base()
 def get_full_base():
     """Imports all database models before returning the Base object. Used for alembic migrations"""
 
+    import src.admin.models  # noqa: F401
     import src.cr.models  # noqa: F401
     import src.diffs.models  # noqa: F401
     import src.ipg.models  # noqa: F401
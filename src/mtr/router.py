@@ -1,15 +1,17 @@
 import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response
 from sqlalchemy.orm import Session
 
 from src.db import get_db
 from src.mtr import schemas, service
 from src.openapi.strings import filesTag, mtrTag
+from src.resources import raw_docs
+from src.resources import static_paths as paths
 from src.schemas import Error
+from src.utils import response_cache
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(response_cache.tag("mtr:current"))])
 
 
 @router.get("/mtr", summary="Get Current MTR", response_model=schemas.Mtr, tags=[mtrTag.name])
@@ -86,7 +88,10 @@ def get_by_title(title: str, db: Session = Depends(get_db)):
     tags=[filesTag.name],
 )
 def raw_mtr_by_date(
-    response: Response, date: datetime.date = Path(description="Date of the MTR release"), db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    date: datetime.date = Path(description="Date of the MTR release"),
+    db: Session = Depends(get_db),
 ):
     """
     Returns a raw PDF file of the Magic Tournament Rules released at the specified date.
@@ -99,8 +104,11 @@ def raw_mtr_by_date(
         response.status_code = 404
         return {"detail": "MTR not available for this date"}
 
-    path = "src/static/raw_docs/mtr/" + mtr.file_name  # FIXME hardcoded path
-    return FileResponse(path)
+    file_response = raw_docs.serve(request, paths.mtr_dir + "/" + mtr.file_name)
+    if not file_response:
+        response.status_code = 404
+        return {"detail": "MTR file for this date not found"}
+    return file_response
 
 
 @router.get("/metadata/mtr", include_in_schema=False, response_model=schemas.MtrMetadata)
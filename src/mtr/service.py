@@ -4,14 +4,17 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from src.mtr.models import Mtr, PendingMtr
+from src.utils.memoize import memoized
 
 
+@memoized("mtr", maxsize=1)
 def get_current_mtr(db: Session) -> Mtr:
     stmt = select(Mtr).order_by(Mtr.creation_day.desc()).limit(1)
     result = db.execute(stmt).scalars().first()
     return result
 
 
+@memoized("mtr", maxsize=4)
 def get_mtr_by_date(db: Session, date: datetime.date) -> Mtr | None:
     return db.execute(select(Mtr).where(Mtr.creation_day == date)).scalar_one_or_none()
 
@@ -0,0 +1,68 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi import Request, Response
+
+from src.resources import static_paths as paths
+from src.resources.artifact_format import write_atomic
+from src.utils.http import accepted_encodings, etag_matches
+from src.utils.logger import logger
+
+"""
+The OpenAPI document rendered ahead of time.
+
+Generating the document (and running it through the resolver decorators in main.py) is slow, so for production it's
+rendered when the image is built (`academyruins openapi`) and each worker only loads the file. The document is
+served from memory, gzipped when the client accepts it, with an ETag so that the docs pages can revalidate it.
+Outside production, the document is generated from the running application instead, so that it reflects code
+changes right away.
+"""
+
+
+class OpenApiDocument:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        self.etag = f'"{hashlib.sha256(data).hexdigest()}"'
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "public, no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match", ""), self.etag):
+            return Response(status_code=304, headers=headers)
+        if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")):
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.compressed, media_type="application/json", headers=headers)
+        return Response(self.data, media_type="application/json", headers=headers)
+
+
+def render(schema: dict[str, Any]) -> bytes:
+    return json.dumps(schema, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def write(schema: dict[str, Any], path: Path | str = paths.openapi_schema) -> Path:
+    path = Path(path)
+    write_atomic(path, render(schema))
+    return path
+
+
+_document: OpenApiDocument | None = None
+
+
+def get_document(generate: Callable[[], dict[str, Any]]) -> OpenApiDocument:
+    """
+    Returns the prebuilt document in production, or the one made by `generate` otherwise (or if it wasn't built).
+    """
+    global _document
+    if _document is None:
+        path = Path(paths.openapi_schema)
+        if os.environ.get("ENV") == "production" and path.is_file():
+            _document = OpenApiDocument(path.read_bytes())
+        else:
+            if os.environ.get("ENV") == "production":
+                logger.warning(f"Prebuilt OpenAPI document not found at {path}, generating it")
+            _document = OpenApiDocument(render(generate()))
+    return _document
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+"""
+Serialization of the generated artifacts that are only read by this application (the structured CR dump and the
+extraction cache). Files that are served to clients as-is (such as the glossary) stay plain JSON.
+
+JSON is used by default. If ARTIFACT_FORMAT is set to msgpack (which requires the optional msgpack package), artifacts
+are written as msgpack instead, which is more compact and faster to load. Binary artifacts start with a header of magic
+bytes followed by the format version, so they can be told apart from JSON and artifacts written by an incompatible
+version are rejected instead of misread.
+"""
+
+magic = b"ARMP"
+format_version = 1
+suffixes = {"json": ".json", "msgpack": ".msgpack"}
+
+
+def _current_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# the mode a newly created file would get (mkstemp creates its files readable by the owner only), read once on import
+# since the umask can only be read by changing it
+file_mode = 0o644 & ~_current_umask()
+
+
+class ArtifactFormatError(ValueError):
+    pass
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise RuntimeError("The msgpack artifact format requires the msgpack package to be installed")
+    return msgpack
+
+
+def artifact_format() -> str:
+    name = os.environ.get("ARTIFACT_FORMAT") or "json"
+    if name not in suffixes:
+        raise ValueError(f"Unknown artifact format {name}, use one of: {', '.join(suffixes)}")
+    return name
+
+
+def dumps(value, fmt: str | None = None) -> bytes:
+    fmt = fmt or artifact_format()
+    if fmt == "msgpack":
+        return magic + bytes([format_version]) + _msgpack().packb(value, use_bin_type=True)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: bytes):
+    """Deserializes an artifact in either format, the format is recognized by the header"""
+    if not data.startswith(magic):
+        return json.loads(data)
+    if len(data) <= len(magic):
+        raise ArtifactFormatError("Truncated artifact, the format version is missing")
+    version = data[len(magic)]
+    if version != format_version:
+        raise ArtifactFormatError(f"Unsupported artifact format version {version} (expected {format_version})")
+    return _msgpack().unpackb(data[len(magic) + 1 :], raw=False)
+
+
+def write_atomic(path: Path | str, data: bytes) -> None:
+    """Writes to a temporary file first, so that a reader never sees a partially written file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.chmod(temp_path, file_mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def dump(value, base_path: Path | str, fmt: str | None = None) -> Path:
+    """
+    Saves the artifact to `base_path` with the suffix of the format, removing a copy in the other format if there's
+    one. Returns the path of the written file.
+    """
+    fmt = fmt or artifact_format()
+    path = Path(str(base_path) + suffixes[fmt])
+    write_atomic(path, dumps(value, fmt))
+    for other, suffix in suffixes.items():
+        if other != fmt:
+            Path(str(base_path) + suffix).unlink(missing_ok=True)
+    return path
+
+
+def load(base_path: Path | str):
+    """Loads the artifact saved by dump (in whichever format it was saved), returns None if there's none"""
+    for suffix in suffixes.values():
+        path = Path(str(base_path) + suffix)
+        if path.is_file():
+            return loads(path.read_bytes())
+    return None
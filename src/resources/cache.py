@@ -1,58 +1,201 @@
+import atexit
+import fcntl
 import json
-from pathlib import Path
+import os
+import threading
+import time
+from contextlib import contextmanager
 
 from src.resources import static_paths as paths
+from src.resources.artifact_format import write_atomic
+from src.utils import invalidation
+
+"""
+In-memory caches of JSON resources, shared by all instances of a cache with the same resource name. The backing files
+are shared between the worker processes as well, so:
+- files are always written atomically (to a temporary file that's then renamed), so that a reader - including a
+  FileResponse streaming the file - never sees a partially written one
+- changes made with set and delete are written behind, batched together once `write_delay` seconds have passed.
+  Other processes may have changed other keys in the meantime, so only the changed keys are written: the file is
+  re-read and the changes merged into it, under a lock on the file so that the processes' writes don't interleave
+- a cache notices when its file was replaced by another process (by its modification time and size, checked at most
+  every `check_interval` seconds) and reloads it
+- the glossary and keyword caches are also reloaded right away when they're invalidated on the invalidation bus (see
+  utils/invalidation.py)
+"""
+
+write_delay = 1.0
+check_interval = 1.0
 
 # global cache store
 _caches = {}
+_stamps = {}  # resource -> (modification time, size) of the file it was last read from or written to
+_last_checks = {}  # resource -> when its file was last checked for changes
+_dirty = {}  # resource -> path, for the resources with changes that weren't written yet
+_changes = {}  # resource -> {key: new value, or _deleted}, the changes that weren't written yet
+_deleted = object()
+_lock = threading.RLock()
+_flush_timer: threading.Timer | None = None
+
+
+def _file_stamp(path) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def _file_lock(path):
+    """Serializes the writes of the file between the processes"""
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write(resource, path):
+    data = json.dumps(_caches[resource]).encode("utf-8")
+    with _file_lock(path):
+        write_atomic(path, data)
+        _stamps[resource] = _file_stamp(path)
+
+
+def _merge(resource, path, changes):
+    """Applies the changes to the current content of the file, which is then also the content of the cache"""
+    with _file_lock(path):
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            data = {}
+        for key, value in changes.items():
+            if value is _deleted:
+                data.pop(key, None)
+            else:
+                data[key] = value
+        write_atomic(path, json.dumps(data).encode("utf-8"))
+        _stamps[resource] = _file_stamp(path)
+    _caches[resource] = data
+    _last_checks[resource] = time.monotonic()
+
+
+def flush():
+    """Writes all the pending changes right away"""
+    global _flush_timer
+    with _lock:
+        if _flush_timer:
+            _flush_timer.cancel()
+            _flush_timer = None
+        dirty = list(_dirty.items())
+        _dirty.clear()
+        for resource, path in dirty:
+            _merge(resource, path, _changes.pop(resource, {}))
+
+
+atexit.register(flush)
 
 
 class ReadOnlyCache:
+    """
+    The resource is loaded from its file on first access rather than when the cache is created, so that creating a
+    cache at import time (as the routers do) doesn't slow down the startup.
+    """
+
     def __init__(self, resource, path):
         self.path = path
         self.resource = resource
-        if resource not in _caches:
-            if path and Path(path).is_file():
-                with open(path, "r") as file:
-                    _caches[resource] = json.load(file)
+
+    def _store(self) -> dict:
+        if self.resource not in _caches:
+            self._load()
+        elif self.path and self.resource not in _dirty:
+            now = time.monotonic()
+            if now - _last_checks.get(self.resource, 0) >= check_interval:
+                _last_checks[self.resource] = now
+                if _file_stamp(self.path) != _stamps.get(self.resource):
+                    self._load()
+        return _caches[self.resource]
+
+    def _load(self):
+        with _lock:
+            _last_checks[self.resource] = time.monotonic()
+            _stamps[self.resource] = self.path and _file_stamp(self.path)
+            if _stamps[self.resource]:
+                with open(self.path, "r") as file:
+                    _caches[self.resource] = json.load(file)
             else:
-                _caches[resource] = {}
+                _caches[self.resource] = {}
+        self._loaded()
+
+    def _loaded(self):
+        """Called whenever the resource was (re)loaded from its file"""
+        pass
+
+    def reload(self) -> bool:
+        """
+        Reloads the resource from its file right away, unless it wasn't loaded yet (it's then loaded on first access as
+        usual) or it has changes that weren't written yet. Returns whether it was reloaded.
+        """
+        with _lock:
+            if self.resource not in _caches or self.resource in _dirty or not self.path:
+                return False
+            self._load()
+            return True
 
     def get(self, key):
-        cache = _caches[self.resource]
-        return cache.get(key)
+        return self._store().get(key)
 
     def has(self, key):
-        return key in _caches[self.resource]
+        return key in self._store()
 
     def keys(self):
-        return _caches[self.resource].keys()
+        return self._store().keys()
 
     def data(self):
-        return _caches[self.resource]
+        return self._store()
 
 
 class UpdatableCache(ReadOnlyCache):
     def replace(self, new_resource):
-        _caches[self.resource] = new_resource
-        self._update()
+        with _lock:
+            _caches[self.resource] = new_resource
+            _dirty.pop(self.resource, None)
+            _changes.pop(self.resource, None)
+            self._update()
 
     def _update(self):
-        if not self.path:
-            return
-        with open(self.path, "w") as file:
-            json.dump(_caches[self.resource], file)
+        if self.path:
+            _write(self.resource, self.path)
 
 
 class Cache(UpdatableCache):
     def set(self, key, value):
-        _caches[self.resource][key] = value
-        self._update()
+        with _lock:
+            self._store()[key] = value
+            self._update_later(key, value)
 
     def delete(self, key):
-        if key in _caches[self.resource]:
-            del _caches[self.resource][key]
-            self._update()
+        with _lock:
+            if key in self._store():
+                del _caches[self.resource][key]
+                self._update_later(key, _deleted)
+
+    def _update_later(self, key, value):
+        global _flush_timer
+        if not self.path:
+            return
+        _dirty[self.resource] = self.path
+        _changes.setdefault(self.resource, {})[key] = value
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(write_delay, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
 
 
 class UnofficialGlossaryCache(ReadOnlyCache):
@@ -66,15 +209,21 @@ class GlossaryCache(UpdatableCache):
         self.unofficial = UnofficialGlossaryCache()
         self.searches = Cache("glossary.searches", None)
 
-        unofficial_searches = self.__generate_searches(self.unofficial.data())
-        self.searches.set("unofficial", unofficial_searches)
-        self.__create_searches()
-
     def __create_searches(self):
+        if not self.searches.has("unofficial"):
+            self.searches.set("unofficial", self.__generate_searches(self.unofficial.data()))
         official_searches = self.__generate_searches(self.data())
         self.searches.set("official", official_searches)
         self.searches.set("all", self.searches.get("unofficial") | official_searches)
 
+    def __get_searches(self, kind):
+        # the searches are generated along with the first use of the glossary, and regenerated whenever it's updated
+        # or reloaded (which accessing the glossary checks for)
+        self._store()
+        if not self.searches.has(kind):
+            self.__create_searches()
+        return self.searches.get(kind)
+
     def __generate_searches(self, store):
         searches = {}
         splits = []
@@ -98,16 +247,40 @@ class GlossaryCache(UpdatableCache):
         super()._update()
         self.__create_searches()
 
+    def _loaded(self):
+        self.searches.delete("official")
+        self.searches.delete("all")
+
     def all_searches(self):
-        return self.searches.get("all")
+        return self.__get_searches("all")
 
     def official_searches(self):
-        return self.searches.get("official")
+        return self.__get_searches("official")
 
     def unofficial_searches(self):
-        return self.searches.get("unofficial")
+        return self.__get_searches("unofficial")
 
 
 class KeywordCache(UpdatableCache):
     def __init__(self):
         super().__init__("keyword", paths.keyword_dict)
+
+
+class DownloadValidatorCache(Cache):
+    def __init__(self):
+        super().__init__("download_validators", paths.download_validators)
+
+
+class RawDocIndexCache(Cache):
+    def __init__(self):
+        super().__init__("raw_docs_index", paths.raw_docs_index)
+
+
+def _reload_glossary():
+    glossary = GlossaryCache()
+    if glossary.reload():
+        glossary.all_searches()  # regenerated here rather than in the next request
+
+
+invalidation.subscribe("glossary", _reload_glossary)
+invalidation.subscribe("keywords", lambda: KeywordCache().reload())
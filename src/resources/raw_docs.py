@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+import os
+from mimetypes import guess_type
+from pathlib import Path
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from src.resources import static_paths as paths
+from src.resources.artifact_format import write_atomic
+from src.resources.cache import RawDocIndexCache
+from src.utils.http import accepted_encodings, etag_matches
+
+"""
+Serving of the raw documents (the files in src/static/raw_docs).
+
+An index of the served files (their size, modification time and SHA-256) is kept in the generated resources, so that
+the hash of each document version is computed only once (when it's downloaded, or on first request). The hash is used
+as a strong ETag, so clients (and proxies) can revalidate their copy with If-None-Match and get a 304, and Range
+requests are answered by FileResponse. Files of historical versions never change, so they're served with a long
+immutable Cache-Control.
+
+Text documents (the CRs) are compressed when they're downloaded, to .gz and .br files next to them (.br only if the
+optional brotli package is installed), and the best of those the client accepts is served instead of the original.
+"""
+
+immutable_cache_control = "public, max-age=31536000, immutable"
+revalidate_cache_control = "public, no-cache"
+compressible_suffixes = {".txt"}
+# in order of preference
+encodings = {"br": ".br", "gzip": ".gz"}
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _index_key(path: Path) -> str:
+    return Path(path).resolve().relative_to(Path(paths.docs_dir).resolve()).as_posix()
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(2**16):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def document_info(path: Path | str, sha256: str | None = None) -> dict | None:
+    """
+    Returns the indexed size, modification time and SHA-256 of the document, (re)indexing it if it isn't indexed or
+    changed since. Returns None if the document doesn't exist. The hash can be passed in if it's already known.
+    """
+    path = Path(path)
+    try:
+        stat_result = path.stat()
+    except FileNotFoundError:
+        return None
+    index = RawDocIndexCache()
+    key = _index_key(path)
+    info = index.get(key)
+    if info and info["size"] == stat_result.st_size and info["mtime"] == stat_result.st_mtime_ns and not sha256:
+        return info
+    info = {"size": stat_result.st_size, "mtime": stat_result.st_mtime_ns, "sha256": sha256 or _hash_file(path)}
+    index.set(key, info)
+    return info
+
+
+def precompress(path: Path | str) -> None:
+    """Writes the compressed versions of a text document next to it"""
+    path = Path(path)
+    if path.suffix not in compressible_suffixes:
+        return
+    data = path.read_bytes()
+    # mtime=0 keeps the output (and thus its ETag) the same for the same document
+    write_atomic(str(path) + encodings["gzip"], gzip.compress(data, compresslevel=9, mtime=0))
+    brotli = _brotli()
+    if brotli:
+        write_atomic(str(path) + encodings["br"], brotli.compress(data, mode=brotli.MODE_TEXT))
+
+
+def _compressed_version(request: Request, path: Path) -> tuple[str | None, Path]:
+    accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+    original_mtime = path.stat().st_mtime_ns
+    for encoding, suffix in encodings.items():
+        compressed = Path(str(path) + suffix)
+        if encoding in accepted or "*" in accepted:
+            # a compressed file older than the document is left over from a previous version of it
+            if compressed.is_file() and compressed.stat().st_mtime_ns >= original_mtime:
+                return encoding, compressed
+    return None, path
+
+
+def serve(request: Request, path: Path | str, immutable: bool = True) -> Response | None:
+    """
+    Responds with the document at `path`, or returns None if it doesn't exist. Documents that can still change (such
+    as the latest CR) should be served with `immutable=False`, so that clients revalidate them.
+    """
+    path = Path(path)
+    info = document_info(path)
+    if info is None:
+        return None
+
+    headers = {"Cache-Control": immutable_cache_control if immutable else revalidate_cache_control}
+    encoding, file_path = None, path
+    if path.suffix in compressible_suffixes:
+        headers["Vary"] = "Accept-Encoding"
+        if "range" not in request.headers:
+            # ranges are only served from the original, so that they're ranges of the same representation
+            encoding, file_path = _compressed_version(request, path)
+    headers["ETag"] = f'"{info["sha256"]}"' if encoding is None else f'"{info["sha256"]}-{encoding}"'
+
+    if etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(file_path, headers=headers, media_type=guess_type(path)[0], stat_result=os.stat(file_path))
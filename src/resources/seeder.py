@@ -15,6 +15,7 @@ def seed():
     logger.info("Making sure necessary directories exist...")
     seed_dir(paths.__dir)
     seed_dir(paths.cr_dir)
+    seed_dir(paths.cr_original_dir)
 
 
 if __name__ == "__main__":
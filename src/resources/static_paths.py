@@ -4,9 +4,18 @@ __dir = os.path.dirname(__file__)
 __gen = __dir + "/generated"
 keyword_dict = __gen + "/keyword-dict.json"
 glossary_dict = __gen + "/glossary.json"
-structured_rules_dict = __gen + "/cr-structured.json"
+structured_rules_dict = __gen + "/cr-structured"  # suffix depends on the artifact format
+download_validators = __gen + "/download-validators.json"
+raw_docs_index = __gen + "/raw-docs-index.json"
+artifact_cache_dir = __gen + "/artifacts"
 unofficial_glossary_dict = __dir + "/unofficial-glossary.json"
 
 docs_dir = "src/static/raw_docs"
 cr_dir = "src/static/raw_docs/cr"
+mtr_dir = "src/static/raw_docs/mtr"
+ipg_dir = "src/static/raw_docs/ipg"
+cr_original_dir = "src/static/raw_docs/cr-original"
+partial_downloads_dir = "src/static/raw_docs/partial"
 current_cr = cr_dir + "/cr-current.txt"
+# rendered when the image is built, outside src (which is mounted over in docker-compose)
+openapi_schema = "build/openapi.json"
@@ -9,6 +9,7 @@ from src.utils.logger import logger
 from src.utils.notifier import notify_new_cr, notify_scrape_error
 
 rules_page_uri = "https://magic.wizards.com/en/rules/"
+timeout = (10, 30)  # (connect, read) in seconds
 
 
 def is_txt_link(tag):
@@ -23,7 +24,11 @@ def scrape_rules_page():
                 logger.debug("New CR redirect already pending, skipping scrape")
                 return
 
-            response = requests.get(rules_page_uri)
+            try:
+                response = requests.get(rules_page_uri, timeout=timeout)
+            except requests.RequestException as e:
+                notify_scrape_error(f"Couldn't fetch rules page ({e})")
+                return
             if response.status_code != requests.codes.ok:
                 notify_scrape_error(f"Couldn't fetch rules page (code {response.status_code})")
                 return
@@ -11,6 +11,7 @@ from src.utils.logger import logger
 from src.utils.notifier import notify_new_doc, notify_scrape_error
 
 docs_page_uri = "https://wpn.wizards.com/en/rules-documents"
+timeout = (10, 30)  # (connect, read) in seconds
 
 docs = {
     "mtr": "Magic: The Gathering Tournament Rules",
@@ -35,7 +36,12 @@ def do_scrape(session: Session):
         logger.debug("All policy docs already pending, skipping scrape")
         return
 
-    response = requests.get(docs_page_uri)
+    try:
+        response = requests.get(docs_page_uri, timeout=timeout)
+    except requests.RequestException as e:
+        notify_scrape_error(f"Couldn't fetch WPN docs page ({e})")
+        set_broken(session)
+        return
     if response.status_code != requests.codes.ok:
         notify_scrape_error(f"Couldn't fetch WPN docs page (code {response.status_code})")
         logger.error(response.reason)
@@ -67,7 +67,7 @@ def run_backup():
     endpoint = os.getenv("BACKUP_ENDPOINT")
     bucket = os.getenv("BACKUP_BUCKET_NAME")
     b2 = Backup(endpoint, key_id, app_key, bucket)
-    for directory in ["cr", "mtr", "ipg"]:
+    for directory in ["cr", "cr-original", "mtr", "ipg"]:
         try:
             b2.sync_directory(paths.docs_dir, directory)
             logger.info("Backup completed for directory " + directory)
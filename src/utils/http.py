@@ -0,0 +1,26 @@
+"""
+Helpers for the conditional and content-negotiated responses (the raw documents and the OpenAPI document).
+"""
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """The content codings accepted by an Accept-Encoding header (those with a non-zero quality)"""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (using the weak comparison, as If-None-Match does)"""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
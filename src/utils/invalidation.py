@@ -0,0 +1,155 @@
+import json
+import select
+import threading
+from collections import Counter, defaultdict
+from typing import Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from src.utils.logger import logger
+
+"""
+Invalidation bus between the worker processes, built on Postgres LISTEN/NOTIFY.
+
+Each worker keeps in-memory copies of some of the data (the glossary and keyword caches, for example). Whenever that
+data changes, the change is published on the bus as a list of topics, and every worker (including the one that
+published it) bumps the version of those topics and runs the handlers subscribed to them on its listener thread.
+
+Notifications are sent as part of the publishing transaction, so they're only delivered if and once it commits. The
+publishing process also bumps the versions itself as soon as the transaction commits, rather than only once the
+notification comes back to its listener (which may be late, or not at all if the listener is disconnected).
+"""
+
+channel = "academyruins_invalidation"
+topics = ["cr", "mtr", "ipg", "links", "glossary", "keywords"]
+
+_handlers: dict[str, list[Callable[[], None]]] = defaultdict(list)
+_versions = Counter()
+_versions_lock = threading.Lock()
+_published_key = "invalidation.published"  # key of the session info with the topics published in its transaction
+_listener: "InvalidationListener | None" = None
+
+
+def subscribe(topic: str, handler: Callable[[], None]) -> None:
+    """Registers a handler to run (on the listener thread) whenever the topic is invalidated"""
+    if topic not in topics:
+        raise ValueError(f"Unknown invalidation topic {topic}")
+    _handlers[topic].append(handler)
+
+
+def version(topic: str) -> int:
+    """The number of times the topic was invalidated since this process started"""
+    return _versions[topic]
+
+
+def _bump(invalidated) -> None:
+    with _versions_lock:
+        for topic in invalidated:
+            _versions[topic] += 1
+
+
+def publish(db: Session, *published_topics: str) -> None:
+    """Publishes the invalidation of the topics, once the transaction of `db` commits"""
+    unknown = set(published_topics) - set(topics)
+    if unknown:
+        raise ValueError(f"Unknown invalidation topics {', '.join(sorted(unknown))}")
+    payload = json.dumps(sorted(set(published_topics)))
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+    db.info.setdefault(_published_key, set()).update(published_topics)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_published(session: Session) -> None:
+    _bump(session.info.pop(_published_key, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_published(session: Session) -> None:
+    session.info.pop(_published_key, None)
+
+
+def dispatch(invalidated: set[str]) -> None:
+    _bump(invalidated)
+    for topic in invalidated:
+        for handler in _handlers[topic]:
+            try:
+                handler()
+            except Exception as e:
+                logger.error(f"Invalidation handler for {topic} failed: {e}")
+
+
+class InvalidationListener(threading.Thread):
+    """
+    Listens for the notifications on a dedicated connection (outside the connection pool). If the connection is lost,
+    it reconnects and invalidates all topics, since notifications sent in the meantime were missed.
+    """
+
+    poll_timeout = 5
+    reconnect_delay = 5
+
+    def __init__(self):
+        super().__init__(name="invalidation-listener", daemon=True)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        connected_before = False
+        while not self._stop_event.is_set():
+            try:
+                connection = self._connect()
+            except Exception as e:
+                logger.warning(f"Couldn't connect the invalidation listener: {e}")
+                self._stop_event.wait(self.reconnect_delay)
+                continue
+            try:
+                if connected_before:
+                    dispatch(set(topics))
+                connected_before = True
+                self._listen(connection)
+            except Exception as e:
+                logger.warning(f"Invalidation listener lost its connection: {e}")
+                self._stop_event.wait(self.reconnect_delay)
+            finally:
+                connection.close()
+
+    @staticmethod
+    def _connect():
+        from src.db import raw_connection
+
+        connection = raw_connection()
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {channel}")
+        return connection
+
+    def _listen(self, connection):
+        logger.info("Listening for cache invalidations")
+        while not self._stop_event.is_set():
+            if not select.select([connection], [], [], self.poll_timeout)[0]:
+                continue
+            connection.poll()
+            invalidated = set()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                try:
+                    invalidated.update(json.loads(notification.payload))
+                except ValueError:
+                    logger.warning(f"Ignoring malformed invalidation {notification.payload!r}")
+            if invalidated:
+                dispatch(invalidated)
+
+
+def start_listener() -> None:
+    global _listener
+    if _listener is None:
+        _listener = InvalidationListener()
+        _listener.start()
+
+
+def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
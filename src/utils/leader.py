@@ -0,0 +1,84 @@
+import os
+import socket
+import threading
+from typing import Callable
+
+from src.utils.logger import logger
+
+"""
+Election of the process that runs the periodic jobs, among all the workers of all the replicas.
+
+Every process tries to take a Postgres advisory lock on a dedicated connection, and the one that holds it is the
+leader. The lock is tied to the connection, so when the leader dies or loses its connection, the database releases it
+and one of the other processes takes over on its next attempt. The leader checks its connection regularly, and steps
+down as soon as it's lost, so that two processes never consider themselves leaders for longer than that.
+
+The processes identify themselves with the connection's application_name, so the current leader can be looked up in
+pg_stat_activity (see admin/service.py).
+"""
+
+lock_key = 1634889828  # arbitrary, fits in 32 bits so that it's the objid of the lock in pg_locks
+process_name = f"academyruins-scheduler:{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderElection(threading.Thread):
+    retry_interval = 15  # how often the other processes try to take over
+    check_interval = 5  # how often the leader checks its connection
+
+    def __init__(self, on_elected: Callable[[], None], on_deposed: Callable[[], None]):
+        super().__init__(name="leader-election", daemon=True)
+        self.on_elected = on_elected
+        self.on_deposed = on_deposed
+        self.is_leader = False
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                connection = self._connect()
+            except Exception as e:
+                logger.warning(f"Couldn't connect for the leader election: {e}")
+                self._stop_event.wait(self.retry_interval)
+                continue
+            try:
+                self._campaign(connection)
+            except Exception as e:
+                logger.warning(f"Leader election lost its connection: {e}")
+            finally:
+                self._step_down()
+                connection.close()  # releases the lock, if it's still held
+            self._stop_event.wait(self.retry_interval)
+
+    @staticmethod
+    def _connect():
+        from src.db import raw_connection
+
+        # the keepalives make a dead connection (and so a dead leader) noticed within about half a minute
+        return raw_connection(
+            application_name=process_name, keepalives=1, keepalives_idle=10, keepalives_interval=5, keepalives_count=3
+        )
+
+    def _campaign(self, connection):
+        while not self._stop_event.is_set():
+            with connection.cursor() as cursor:
+                if self.is_leader:
+                    cursor.execute("SELECT 1")
+                else:
+                    cursor.execute("SELECT pg_try_advisory_lock(%s)", (lock_key,))
+                    if cursor.fetchone()[0]:
+                        self._take_lead()
+            self._stop_event.wait(self.check_interval if self.is_leader else self.retry_interval)
+
+    def _take_lead(self):
+        logger.info(f"{process_name} is now the scheduler leader")
+        self.is_leader = True
+        self.on_elected()
+
+    def _step_down(self):
+        if self.is_leader:
+            logger.info(f"{process_name} is no longer the scheduler leader")
+            self.is_leader = False
+            self.on_deposed()
@@ -0,0 +1,76 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+from src.utils.logger import logger
+
+"""
+Monitor of the event loop's responsiveness.
+
+A task on the loop wakes up every `interval` seconds and records how late it woke up (the loop lag). Anything that
+blocks the loop - such as blocking I/O in an async route - shows up as lag. A watchdog thread also checks that the
+task keeps waking up, and when the loop has been stalled for longer than `threshold` seconds, it logs the stack of the
+loop's thread, which shows what's blocking it.
+"""
+
+interval = 0.5
+threshold = 0.25
+
+
+class LoopLagMonitor:
+    def __init__(self):
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._task: asyncio.Task | None = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Starts monitoring the running event loop"""
+        loop = asyncio.get_running_loop()
+        self._task = loop.create_task(self._measure())
+        loop_thread_id = threading.get_ident()
+        threading.Thread(target=self._watch, args=(loop_thread_id,), name="loop-lag-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(interval)
+            lag = loop.time() - start - interval
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag > threshold:
+                self.stalls += 1
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+
+    def _watch(self, loop_thread_id: int):
+        reported_heartbeat = None
+        while not self._stop_event.wait(interval):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - interval
+            if stalled_for > threshold and heartbeat != reported_heartbeat:
+                # reported once per stall
+                reported_heartbeat = heartbeat
+                frame = sys._current_frames().get(loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "unknown"
+                logger.warning(f"Event loop blocked for over {stalled_for * 1000:.0f} ms in:\n{stack}")
+
+    def stats(self) -> dict:
+        return {
+            "lastMs": round(self.last_lag * 1000, 1),
+            "maxMs": round(self.max_lag * 1000, 1),
+            "stalls": self.stalls,
+        }
+
+
+monitor = LoopLagMonitor()
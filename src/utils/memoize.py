@@ -0,0 +1,124 @@
+import functools
+import os
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from src.utils import invalidation
+from src.utils.logger import logger
+from src.utils.lru import LRUCache
+
+"""
+Memoization of the service functions that read the published documents.
+
+The results are keyed by the function arguments (besides the session) and by the versions of the invalidation topics
+the function depends on, so a result is never reused after its documents change, on any of the workers. In case a
+worker misses an invalidation (while its listener is reconnecting, for example), results also expire after
+MEMOIZE_TTL seconds (5 minutes by default), which bounds how long it can serve outdated data. Memoization
+only applies to sessions that opt into it (the sessions of the API routes, see src.db.get_db), and routes that must
+see the very latest data (admin and pending routes) bypass it with the src.db.bypass_memoization dependency. Scripts
+and background jobs use their own sessions, so they always query the database.
+
+ORM instances are cached detached from any session, and each caller gets its own copy merged into its session
+without querying the database (relationships that weren't loaded are loaded lazily from that session as usual). Other
+results are shared between the callers, so they must not be modified.
+"""
+
+session_flag = "memoize"
+default_ttl = 300.0
+_functions: dict[str, "MemoizedFunction"] = {}
+_missing = object()
+
+
+def _ttl() -> float:
+    value = os.environ.get("MEMOIZE_TTL")
+    if not value:
+        return default_ttl
+    try:
+        ttl = float(value)
+    except ValueError:
+        ttl = 0
+    if ttl <= 0:
+        logger.warning(f"Invalid MEMOIZE_TTL {value!r}, using {default_ttl} seconds")
+        return default_ttl
+    return ttl
+
+
+class MemoizedFunction:
+    def __init__(self, function: Callable, topics: tuple[str, ...], maxsize: int):
+        self.function = function
+        self.topics = topics
+        self.cache = LRUCache(maxsize)
+        self.ttl = _ttl()
+        self.hits = 0
+        self.misses = 0
+        self._versions = None
+        self._stats_lock = threading.Lock()
+        functools.update_wrapper(self, function)
+
+    def __call__(self, db: Session, *args):
+        if not db.info.get(session_flag, False):
+            return self.function(db, *args)
+
+        versions = tuple(invalidation.version(topic) for topic in self.topics)
+        if versions != self._versions:
+            # the cached results are outdated, drop them right away instead of waiting for them to be evicted
+            self.cache.clear()
+            self._versions = versions
+        key = (versions, args)
+        now = time.monotonic()
+        result, expires = self.cache.get(key, (_missing, 0))
+        if result is _missing or expires <= now:
+            self._count(hit=False)
+            result = self.function(db, *args)
+            if _is_instance(result):
+                db.expunge(result)
+            self.cache.put(key, (result, now + self.ttl))
+        else:
+            self._count(hit=True)
+        return db.merge(result, load=False) if _is_instance(result) else result
+
+    def _count(self, hit: bool):
+        # the routes run in a thread pool, so the counters are updated concurrently
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl": self.ttl,
+            "size": len(self.cache),
+            "maxSize": self.cache.maxsize,
+        }
+
+
+def _is_instance(result) -> bool:
+    return result is not None and inspect(result, raiseerr=False) is not None
+
+
+def memoized(*topics: str, maxsize: int = 128) -> Callable[[Callable], MemoizedFunction]:
+    """
+    Memoizes a service function that takes the session as its first argument, followed by hashable arguments. Its
+    results are invalidated whenever any of the topics is.
+    """
+    for topic in topics:
+        if topic not in invalidation.topics:
+            raise ValueError(f"Unknown invalidation topic {topic}")
+
+    def decorator(function: Callable) -> MemoizedFunction:
+        memoized_function = MemoizedFunction(function, topics, maxsize)
+        _functions[f"{function.__module__}.{function.__qualname__}"] = memoized_function
+        return memoized_function
+
+    return decorator
+
+
+def stats() -> dict[str, dict]:
+    return {name: function.stats() for name, function in _functions.items()}
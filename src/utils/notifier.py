@@ -31,7 +31,7 @@ def notify(
     if formatted:
         payload["html"] = 1
 
-    requests.post(_uri, data=payload)
+    requests.post(_uri, data=payload, timeout=10)
     logger.log(log_level, "Sending notification: %s", message)
 
 
@@ -0,0 +1,203 @@
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi import Request
+
+from src.utils import invalidation
+from src.utils.logger import logger
+
+"""
+In-memory cache of whole HTTP responses, so that repeated requests for the (rarely changing) documents are answered
+without touching the database.
+
+Routes opt into caching by tagging their responses with surrogate keys (the `tag` dependency, or `add_keys` for keys
+known only inside the route). Only successful GET responses of tagged routes are cached, keyed by the path and the
+normalized query string. When the data behind a key changes, `purge` drops every response tagged with it. Besides the
+explicit purges in the admin routes, the keys are purged on every worker through the invalidation bus.
+
+The cache is limited by the total size of the cached bodies (RESPONSE_CACHE_BYTES, 64 MiB by default, 0 disables it),
+the least recently used responses are evicted first.
+
+The redirects (/link/...) aren't cached: their routes aren't tagged, and only 200 responses are cached anyway. They're
+served from the memoized redirects (see link/service.py), which follow the "links" invalidation topic.
+"""
+
+default_budget = 64 * 1024 * 1024
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    keys: tuple[str, ...]
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int = default_budget):
+        self.max_bytes = max_bytes
+        # a single response may take at most a quarter of the budget, so that large files don't flush everything else
+        self.max_entry_bytes = max_bytes // 4
+        self.size = 0
+        # bumped by every purge, so that a response rendered before a purge isn't cached after it
+        self.generation = 0
+        self._entries: OrderedDict[tuple[str, str], CachedResponse] = OrderedDict()
+        self._by_key: dict[str, set[tuple[str, str]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def get(self, cache_key: tuple[str, str]) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+            return entry
+
+    def put(self, cache_key: tuple[str, str], entry: CachedResponse, generation: int | None = None) -> None:
+        if len(entry.body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._remove(cache_key)
+            self._entries[cache_key] = entry
+            self.size += len(entry.body)
+            for key in entry.keys:
+                self._by_key[key].add(cache_key)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def purge(self, *keys: str) -> None:
+        """Drops all responses tagged with any of the surrogate keys"""
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                for cache_key in list(self._by_key.get(key, ())):
+                    self._remove(cache_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._by_key.clear()
+            self.size = 0
+
+    def _remove(self, cache_key: tuple[str, str]) -> None:
+        entry = self._entries.pop(cache_key, None)
+        if entry is None:
+            return
+        self.size -= len(entry.body)
+        for key in entry.keys:
+            self._by_key[key].discard(cache_key)
+            if not self._by_key[key]:
+                del self._by_key[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _budget() -> int:
+    value = os.environ.get("RESPONSE_CACHE_BYTES")
+    if not value:
+        return default_budget
+    try:
+        budget = int(value)
+    except ValueError:
+        budget = -1
+    if budget < 0:
+        logger.warning(f"Invalid RESPONSE_CACHE_BYTES {value!r}, using {default_budget} bytes")
+        return default_budget
+    return budget
+
+
+cache = ResponseCache(_budget())
+
+
+def purge(*keys: str) -> None:
+    cache.purge(*keys)
+
+
+def add_keys(request: Request, *keys: str) -> None:
+    """Tags the response to the request with the surrogate keys, which makes it cacheable"""
+    request.state.surrogate_keys = getattr(request.state, "surrogate_keys", ()) + keys
+
+
+def tag(*keys: str) -> Callable[[Request], None]:
+    """Dependency that tags the responses of a route (or of all routes of a router) with the surrogate keys"""
+
+    def dependency(request: Request):
+        add_keys(request, *keys)
+
+    return dependency
+
+
+def normalize_query(query_string: bytes) -> str:
+    return urlencode(sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)))
+
+
+# conditional and partial requests are left to the routes
+bypass_headers = {b"range", b"if-none-match", b"if-modified-since", b"if-range"}
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app, response_cache: ResponseCache = cache):
+        self.app = app
+        self.cache = response_cache
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or self.cache.max_bytes <= 0
+            or any(name in bypass_headers for name, _ in scope["headers"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        cache_key = (scope["path"], normalize_query(scope["query_string"]))
+        entry = self.cache.get(cache_key)
+        if entry is not None:
+            headers = entry.headers + [(b"x-cache", b"HIT")]
+            await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        generation = self.cache.generation
+        state = scope.setdefault("state", {})
+        response = {}
+        chunks = []
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                keys = state.get("surrogate_keys")
+                # responses that vary by the request headers (like the compressed documents) aren't cached, as the
+                # cache is keyed only by the URL
+                vary = any(name.lower() == b"vary" for name, _ in message["headers"])
+                if message["status"] == 200 and keys and not vary:
+                    response.update(status=message["status"], headers=list(message["headers"]), keys=keys, size=0)
+                    message = {**message, "headers": response["headers"] + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and response:
+                body = message.get("body", b"")
+                response["size"] += len(body)
+                if response["size"] <= self.cache.max_entry_bytes:
+                    chunks.append(body)
+                if not message.get("more_body", False) and response["size"] <= self.cache.max_entry_bytes:
+                    entry = CachedResponse(response["status"], response["headers"], b"".join(chunks), response["keys"])
+                    self.cache.put(cache_key, entry, generation)
+            await send(message)
+
+        await self.app(scope, receive, send_and_record)
+
+
+# "links" isn't mapped, since no cached response depends on the redirects
+for topic, surrogate_key in [
+    ("cr", "cr:current"),
+    ("glossary", "cr:current"),
+    ("keywords", "cr:current"),
+    ("mtr", "mtr:current"),
+    ("ipg", "ipg:current"),
+]:
+    invalidation.subscribe(topic, lambda surrogate_key=surrogate_key: purge(surrogate_key))
@@ -1,20 +1,87 @@
+import importlib
+import traceback
+from datetime import datetime, timezone
+
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from src.scraper.cr_scraper import scrape_rules_page
-from src.scraper.docs_scraper import scrape_docs_page
-from src.utils.backup import run_backup
+from src.utils import leader
 from src.utils.logger import logger
 
+# the jobs are referenced by name and imported only once they first run, so that the scrapers (and their dependencies)
+# aren't loaded at startup
+scrape_rules_job = "src.scraper.cr_scraper:scrape_rules_page"
+scrape_docs_job = "src.scraper.docs_scraper:scrape_docs_page"
+backup_job = "src.utils.backup:run_backup"
+
+
+def _record_run(job: str, started: datetime, error: str | None = None) -> None:
+    # a failure to record the run shouldn't fail the job itself
+    try:
+        from src.admin.service import record_job_run
+        from src.db import SessionLocal
+
+        with SessionLocal() as session:
+            with session.begin():
+                record_job_run(session, job, leader.process_name, started, datetime.now(timezone.utc), error)
+    except Exception as e:
+        logger.warning(f"Couldn't record the run of {job}: {e}")
+
+
+def run_job(reference: str):
+    started = datetime.now(timezone.utc)
+    try:
+        module, name = reference.split(":")
+        getattr(importlib.import_module(module), name)()
+    except Exception:
+        _record_run(reference, started, traceback.format_exc())
+        raise
+    _record_run(reference, started)
+
 
 class Scheduler:
+    """
+    Runs the periodic jobs. The jobs are blocking (HTTP requests, parsing, database transactions and uploads), so they
+    run in a thread pool of their own rather than on the event loop or in the pool shared with the rest of the
+    application.
+
+    Every worker has a scheduler, but only the one elected as the leader (see utils/leader.py) runs the jobs, the
+    others are paused until they take over.
+    """
+
+    max_workers = 2
+
     def __init__(self):
         job_store = MemoryJobStore()
-        self.scheduler = AsyncIOScheduler(jobstores={"default": job_store})
+        executor = ThreadPoolExecutor(self.max_workers)
+        self.scheduler = AsyncIOScheduler(jobstores={"default": job_store}, executors={"default": executor})
+        self.election = leader.LeaderElection(on_elected=self._resume, on_deposed=self._pause)
+
+    @property
+    def is_leader(self) -> bool:
+        return self.election.is_leader
 
     def start(self):
-        self.scheduler.start()
-        self.scheduler.add_job(scrape_rules_page, "interval", hours=1, coalesce=True)
-        self.scheduler.add_job(scrape_docs_page, "interval", hours=1, coalesce=True)
-        self.scheduler.add_job(run_backup, "interval", weeks=2, coalesce=True)
-        logger.info("Started periodic scrape job")
+        self.scheduler.start(paused=True)
+        self.add_job(scrape_rules_job, hours=1)
+        self.add_job(scrape_docs_job, hours=1)
+        self.add_job(backup_job, weeks=2)
+        self.election.start()
+        logger.info("Started periodic scrape job (runs once elected as the leader)")
+
+    def _resume(self):
+        if self.scheduler.running:
+            self.scheduler.resume()
+
+    def _pause(self):
+        # the scheduler may have been shut down already, when the election stops along with it
+        if self.scheduler.running:
+            self.scheduler.pause()
+
+    def add_job(self, reference: str, **interval):
+        self.scheduler.add_job(run_job, "interval", args=[reference], name=reference, coalesce=True, **interval)
+
+    def stop(self):
+        self.election.stop()
+        self.scheduler.shutdown(wait=False)